@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 import app.services.user_service
@@ -15,7 +15,7 @@ auth_routes = APIRouter()
 @auth_routes.post("/login")
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     user = await app.services.auth_service.login(db, form_data.username, form_data.password)
     if not user:
@@ -39,7 +39,7 @@ async def logout(
 @auth_routes.post("/register", response_model=schemas.User)
 async def register(
         user: schemas.UserCreateUpdate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
     db_user = await app.services.user_service.get_user_by_username(db, user.username)
     if db_user:
@@ -1,22 +1,22 @@
 import logging
 import os
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from uuid import UUID
 from zipfile import ZipFile
 
-from fastapi import Depends, HTTPException, Form, UploadFile, File, APIRouter
+from fastapi import Depends, HTTPException, Form, UploadFile, File, APIRouter, Header, Query, Request
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 from starlette.responses import JSONResponse, FileResponse
 
 from app import schemas
+from app.config.config import Config
 from app.config.database import get_db
 from app.models.jwt import JwtUser
-from app.models.models import ChatFile
-from app.services import chat_service, prompt_service
+from app.services import chat_service, prompt_service, token_budget_service
 from app.services.auth_service import verify_token
 from app.utils.docx_utils import extract_text_from_docx
 from app.utils.feature_utils import Feature
@@ -29,7 +29,7 @@ logger = logging.getLogger(__name__)
 async def delete_chat_endpoint(
     chat_id: UUID,
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     try:
         result = await chat_service.delete_chat(db, chat_id, current_user.id)
@@ -44,16 +44,29 @@ async def delete_chat_endpoint(
 
 @chat_routes.get("/user/{user_id}/chats")
 async def get_user_chats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     feature: Feature = Feature.GENERAL,
+    limit: int = Query(Config.CHATS_PAGE_SIZE, ge=1, le=Config.CHATS_PAGE_MAX),
+    before: Optional[str] = None,
     user_id: int = 0, # unused
     current_user: JwtUser = Depends(verify_token),
-) -> List[Dict[str, Any]]:
+) -> Dict[str, Any]:
+    """
+    Endpoint untuk mengambil daftar chat user, satu halaman per request.
+
+    Args:
+        limit (int): Jumlah chat per halaman.
+        before (Optional[str]): Cursor `next_cursor`; memuat chat yang lebih lama.
+
+    Returns:
+        Dict: chats (terbaru dulu, dengan jumlah pesan dan cuplikan pesan terakhir)
+            dan next_cursor.
+    """
     logger.info(f"Attempting to fetch chats for user_id: {current_user.id}")
     try:
-        chats = await chat_service.get_user_chats(db, current_user.id, feature)
-        logger.info(f"Successfully fetched {len(chats)} chats for user_id: {current_user.id}")
-        return chats
+        page = await chat_service.get_user_chats(db, current_user.id, feature, limit, before)
+        logger.info(f"Successfully fetched {len(page['chats'])} chats for user_id: {current_user.id}")
+        return page
     except HTTPException as he:
         logger.error(f"HTTP exception in get_user_chats: {str(he)}")
         raise he
@@ -64,10 +77,11 @@ async def get_user_chats(
 
 @chat_routes.post("/chat/send")
 async def send_chat_message(
+    request: Request,
     message: str = Form(...),
     files: List[UploadFile] = File(None),  # Banyak file
     chat_id: UUID = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     feature: Feature = Feature.GENERAL,
     current_user: JwtUser = Depends(verify_token),
 ):
@@ -110,6 +124,12 @@ async def send_chat_message(
                         # Simpan file jika diperlukan
                         # file_path = await save_uploaded_file(file)
                         # chat_manager.add_file_to_chat(db, chat_id, file.filename, file_path)
+
+        # Ukuran prompt dihitung lokal; lampiran disesuaikan dengan batas token fitur
+        # dan request yang pasti ditolak model langsung dijawab 413
+        file_contents, notices = await token_budget_service.preflight_request(
+            db, current_user.id, feature, message, file_contents
+        )
         return await prompt_service.process_chat_message(
             db,
             current_user.id,
@@ -117,7 +137,11 @@ async def send_chat_message(
             message,
             feature,
             file_contents,
+            request,
+            notices,
         )
+    except HTTPException as he:
+        raise he
     except ValueError as e:
         logger.error(f"File upload error: {str(e)}")
         raise HTTPException(status_code=400, detail=f"File upload error: {str(e)}")
@@ -126,52 +150,63 @@ async def send_chat_message(
         raise HTTPException(status_code=500, detail="Error processing chat message")
 
 
+@chat_routes.get("/chat/{chat_id}/stream")
+async def resume_chat_stream(
+    chat_id: UUID,
+    last_event_id: int = Header(0, alias="Last-Event-ID"),
+    db: AsyncSession = Depends(get_db),
+    current_user: JwtUser = Depends(verify_token),
+):
+    """
+    Endpoint untuk menyambung kembali stream jawaban yang terputus.
+
+    Args:
+        chat_id (UUID): ID chat.
+        last_event_id (int): Nomor event terakhir yang diterima klien (header Last-Event-ID).
+
+    Returns:
+        StreamingResponse: Event setelah Last-Event-ID, atau jawaban tersimpan jika generasi sudah selesai.
+    """
+    try:
+        return await prompt_service.resume_chat_stream(
+            db, current_user.id, chat_id, last_event_id
+        )
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Error in resume_chat_stream: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error resuming chat stream")
+
+
 @chat_routes.get("/chat/{chat_id}/messages")
 async def get_chat_messages(
-        chat_id: str,
-        db: Session = Depends(get_db),
+        chat_id: UUID,
+        limit: int = Query(Config.MESSAGES_PAGE_SIZE, ge=1, le=Config.MESSAGES_PAGE_MAX),
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        db: AsyncSession = Depends(get_db),
         current_user: JwtUser = Depends(verify_token),
 ):
     """
-    Endpoint untuk mengambil pesan-pesan dari chat tertentu.
+    Endpoint untuk mengambil pesan-pesan dari chat tertentu, satu halaman per request.
 
     Args:
-        current_user:
-        db:
-        chat_id (str): ID chat.
+        chat_id (UUID): ID chat.
+        limit (int): Jumlah pesan per halaman.
+        before (Optional[str]): Cursor `older_cursor`; memuat pesan yang lebih lama.
+        after (Optional[str]): Cursor `newer_cursor`; memuat pesan yang lebih baru.
 
     Returns:
-        List[Dict[str, str]]: Daftar pesan dalam chat, termasuk informasi file jika ada.
+        Dict: Pesan dalam halaman (urut dari yang terlama, termasuk informasi file
+            jika ada), older_cursor, dan newer_cursor.
     """
-    logging.info(f"Received request for messages of chat_id: {chat_id}")
     try:
-        logging.info(f"Attempting to fetch messages for chat_id: {chat_id}")
-        messages = await chat_service.get_chat_messages(UUID(chat_id))
-        if not messages:
-            logging.info(f"No messages found for chat_id: {chat_id}")
-            return JSONResponse(
-                status_code=status.HTTP_200_OK,
-                content={"messages": [], "chat_id": chat_id},
-            )
-        for message in messages:
-            if message.get("file_id"):
-                file_info = (
-                    db.query(ChatFile).filter(ChatFile.id == message["file_id"]).first()
-                )
-                logging.info(f"TES:{file_info}")
-
-                if file_info:
-                    message["file_name"] = file_info.file_name
-                    message["file_path"] = file_info.file_path
-                    message["file_url"] = (
-                        f"/uploads/{os.path.basename(file_info.file_path)}"
-                    )
-        json_compatible_messages = jsonable_encoder(messages)
-        logging.info(f"Returning {len(json_compatible_messages)} messages")
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content={"messages": json_compatible_messages, "chat_id": chat_id},
+        page = await chat_service.get_chat_messages_page(
+            db, current_user.id, chat_id, limit, before, after
         )
+        return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(page))
+    except HTTPException as he:
+        raise he
     except Exception as e:
         logger.error(f"Error in get_chat_messages: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -180,7 +215,7 @@ async def get_chat_messages(
 @chat_routes.post("/user/{user_id}/chats", response_model=schemas.ChatCreate)
 async def create_new_chat(
         user_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         feature: Feature = Feature.GENERAL,
         current_user: JwtUser = Depends(verify_token),
 ):
@@ -198,6 +233,26 @@ async def create_new_chat(
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
 
 
+@chat_routes.get("/chat/{chat_id}/files/{file_id}")
+async def get_chat_file(
+        chat_id: UUID,
+        file_id: UUID,
+        db: AsyncSession = Depends(get_db),
+        current_user: JwtUser = Depends(verify_token),
+):
+    """
+    Endpoint untuk mengunduh lampiran chat berdasarkan ID file.
+    """
+    try:
+        chat_file = await chat_service.get_chat_file(db, current_user.id, chat_id, file_id)
+        return FileResponse(chat_file.file_path, filename=chat_file.file_name)
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Error in get_chat_file: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
 @chat_routes.get("/uploads/{file_path:path}")
 async def get_file(
         file_path: str,
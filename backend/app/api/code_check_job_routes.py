@@ -0,0 +1,61 @@
+import logging
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.database import get_db
+from app.models.jwt import JwtUser
+from app.services import code_check_job_service
+from app.services.auth_service import verify_token
+from app.utils.feature_utils import Feature
+
+code_check_job_routes = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@code_check_job_routes.post("/code-check/jobs", status_code=202)
+async def create_code_check_job(
+    feature: Feature,
+    file: UploadFile = File(...),
+    message: str = Form(""),
+    current_user: JwtUser = Depends(verify_token),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Endpoint untuk membuat job code check dari file zip. Job diproses di background;
+    respons langsung berisi id job untuk dipantau.
+    """
+    try:
+        return await code_check_job_service.submit_job(
+            db, current_user.id, feature, message, file
+        )
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Error in create_code_check_job: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error creating code check job")
+
+
+@code_check_job_routes.get("/code-check/jobs/{job_id}")
+async def get_code_check_job(
+    job_id: UUID,
+    current_user: JwtUser = Depends(verify_token),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Endpoint untuk melihat status dan progress job code check.
+    """
+    return await code_check_job_service.get_job_status(db, current_user.id, job_id)
+
+
+@code_check_job_routes.get("/code-check/jobs/{job_id}/results")
+async def get_code_check_job_results(
+    job_id: UUID,
+    current_user: JwtUser = Depends(verify_token),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Endpoint untuk mengambil ringkasan dan temuan per file dari job code check.
+    """
+    return await code_check_job_service.get_job_results(db, current_user.id, job_id)
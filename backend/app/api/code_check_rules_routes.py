@@ -1,6 +1,6 @@
 import logging
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.database import get_db
 from app.models.code_check_rules import CreateCheckRules, UpdateCheckRules
 from app.models.jwt import JwtUser
@@ -15,7 +15,7 @@ logger = logging.getLogger(__name__)
 @code_check_rules_routes.get("/code-check-rules")
 async def get_code_check_rules(
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     return await code_check_rules_service.get_rules(db)
 
@@ -24,7 +24,7 @@ async def get_code_check_rules(
 async def add_code_check_rules(
     req_body: CreateCheckRules,
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     return await code_check_rules_service.add_rules(db, req_body.rule, req_body.feature)
 
@@ -32,7 +32,7 @@ async def add_code_check_rules(
 async def get_code_check_rules_by_feature(
     feature: Feature,
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     return await code_check_rules_service.get_rules_by_type(db, feature)
 
@@ -40,7 +40,7 @@ async def get_code_check_rules_by_feature(
 async def delete_code_check_rules(
     feature: Feature,
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     return await code_check_rules_service.delete_rules(db, feature)
 
@@ -50,13 +50,13 @@ async def update_code_check_rules(
     feature: Feature,
     req_body: UpdateCheckRules,
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     return await code_check_rules_service.update_rules(db, feature, req_body.rule)
 
 @code_check_rules_routes.get("/code-check-rules/x/init")
 async def init_code_check_rules(
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     return await code_check_rules_service.init_rules(db)
@@ -2,7 +2,7 @@ import logging
 from uuid import UUID
 
 from fastapi import Form, UploadFile, File, Depends, HTTPException, APIRouter
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config.database import get_db
 from app.models.jwt import JwtUser
@@ -20,7 +20,7 @@ async def upload_context(
     text: str = Form(None),
     file: UploadFile = File(None),
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     try:
         user = await get_user_by_username(db, current_user.username)
@@ -28,12 +28,12 @@ async def upload_context(
             raise HTTPException(status_code=404, detail="User not found")
 
         if text:
-            context = context_manager.add_context(db, user.id, text, "text")
+            context = await context_manager.add_context(db, user.id, text, "text")
         elif file:
             file_path = await save_uploaded_file(file)
             await file.seek(0)
             content = await file.read()
-            context = context_manager.add_context(
+            context = await context_manager.add_context(
                 db, user.id, file.filename, "file", content.decode("utf-8", errors="ignore"), file_path
             )
         else:
@@ -53,14 +53,14 @@ async def upload_context(
 @context_routes.get("/context")
 async def get_context(
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         user = await get_user_by_username(db, current_user.username)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        context = context_manager.get_latest_context(db, user.id)
+        context = await context_manager.get_latest_context(db, user.id)
         if not context:
             return {"message": "No context found"}
         return {
@@ -78,14 +78,14 @@ async def get_context(
 @context_routes.get("/contexts")
 async def get_all_contexts(
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         user = await get_user_by_username(db, current_user.username)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        contexts = context_manager.get_user_contexts(db, user.id)
+        contexts = await context_manager.get_user_contexts(db, user.id)
         return [
             {
                 "id": str(c.id),
@@ -103,14 +103,14 @@ async def get_all_contexts(
 async def delete_context(
     context_id: UUID,
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     try:
         user = await get_user_by_username(db, current_user.username)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        success = context_manager.delete_context(db, context_id, user.id)
+        success = await context_manager.delete_context(db, context_id, user.id)
         if success:
             return {"message": "Context deleted successfully"}
         else:
@@ -0,0 +1,42 @@
+import logging
+import time
+
+from fastapi import APIRouter
+from sqlalchemy import text
+from starlette import status
+from starlette.responses import JSONResponse
+
+from app.config.config import Config
+from app.config.database import async_engine, pool_status
+from app.utils.session_tracker import session_tracker
+
+health_routes = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@health_routes.get("/health")
+async def get_health():
+    """
+    Endpoint health check: koneksi database, statistik connection pool worker ini,
+    dan sesi di luar get_db yang masih terbuka atau terindikasi bocor.
+    Mengembalikan 503 jika database tidak dapat dijangkau.
+    """
+    database = {"ok": True}
+    started = time.perf_counter()
+    try:
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        database["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    except Exception as e:
+        logger.error(f"Health check database error: {str(e)}")
+        database = {"ok": False, "error": str(e)}
+
+    database["pool"] = pool_status()
+    database["sessions"] = {
+        "open": session_tracker.open_count(),
+        "leaked": session_tracker.leaked(Config.DB_SESSION_LEAK_AFTER),
+    }
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if database["ok"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ok" if database["ok"] else "unavailable", "database": database},
+    )
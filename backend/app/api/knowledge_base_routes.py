@@ -1,7 +1,7 @@
 import logging
 
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config.database import get_db
 from app.models.jwt import JwtUser
@@ -17,7 +17,7 @@ knowledge_base_routes = APIRouter()
 @knowledge_base_routes.get("/knowledge-base")
 async def get_knowledge_base(
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         return await knowledge_base_service.get_all_knowledge_base_items(db)
@@ -32,7 +32,7 @@ async def get_knowledge_base(
 async def get_knowledge_base_item(
     item_id: UUID,
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         return await knowledge_base_service.get_knowledge_base_item(db, item_id)
@@ -48,7 +48,7 @@ async def add_knowledge_base_item(
     question: str,
     answer: str,
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         return await knowledge_base_service.add_knowledge_base_item(db, question, answer)
@@ -65,7 +65,7 @@ async def update_knowledge_base_item(
     question: str,
     answer: str,
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         return await knowledge_base_service.update_knowledge_base_item(db, item_id, question, answer)
@@ -80,7 +80,7 @@ async def update_knowledge_base_item(
 async def delete_knowledge_base_item(
     item_id: UUID,
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         return await knowledge_base_service.delete_knowledge_base_item(db, item_id)
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from starlette.responses import PlainTextResponse
+
+from app.utils.metrics import render_prometheus
+
+metrics_routes = APIRouter()
+
+
+@metrics_routes.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Endpoint scrape Prometheus: token, TTFT, kecepatan output, dan durasi tahap
+    pipeline chat milik worker ini.
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import app.services.user_service
 from app import schemas
@@ -13,7 +13,7 @@ user_routes = APIRouter()
 @user_routes.get("/user")
 async def get_current_user(
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     user = await app.services.user_service.get_user_by_username(db, current_user.username)
     if not user:
@@ -26,7 +26,7 @@ async def get_all_users(
     current_user: JwtUser = Depends(verify_token),
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     users = await app.services.user_service.get_users(db, skip, limit)
     return users
@@ -36,7 +36,7 @@ async def get_all_users(
 async def get_user_by_id(
     user_id: int,
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     user = await app.services.user_service.get_user_by_id(db, user_id)
     if not user:
@@ -48,7 +48,7 @@ async def get_user_by_id(
 async def delete_user_by_id(
     user_id: int,
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     user = await app.services.user_service.get_user_by_id(db, user_id)
     if not user:
@@ -61,7 +61,7 @@ async def update_user_by_id(
     user_id: int,
     user_update: schemas.UserCreateUpdate,
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     user = await app.services.user_service.get_user_by_id(db, user_id)
     if not user:
@@ -72,7 +72,7 @@ async def update_user_by_id(
 async def create_user(
     user: schemas.UserCreateUpdate,
     current_user: JwtUser = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     return await app.services.user_service.create_user(
         db,
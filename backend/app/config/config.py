@@ -1,4 +1,6 @@
+import json
 import os
+import tempfile
 
 from dotenv import load_dotenv
 
@@ -24,8 +26,190 @@ class Config:
     # Nama model terbaru yang digunakan
     MODEL_NAME = "claude-3-5-sonnet-20240620"
 
+    # Pengaturan koneksi HTTP ke Claude API (satu client per worker)
+    ANTHROPIC_MAX_CONNECTIONS = int(os.getenv("ANTHROPIC_MAX_CONNECTIONS", 100))
+    ANTHROPIC_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("ANTHROPIC_MAX_KEEPALIVE_CONNECTIONS", 20))
+    ANTHROPIC_KEEPALIVE_EXPIRY = float(os.getenv("ANTHROPIC_KEEPALIVE_EXPIRY", 60))
+    ANTHROPIC_CONNECT_TIMEOUT = float(os.getenv("ANTHROPIC_CONNECT_TIMEOUT", 5))
+    ANTHROPIC_READ_TIMEOUT = float(os.getenv("ANTHROPIC_READ_TIMEOUT", 120))
+    ANTHROPIC_TIMEOUT = float(os.getenv("ANTHROPIC_TIMEOUT", 600))
+    # Backend model: "anthropic" (Claude API) atau "fake" (model palsu lokal untuk load test)
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "anthropic")
+    # Perilaku backend fake: waktu sampai token pertama (ms), kecepatan (token/detik),
+    # panjang jawaban (token), peluang error sebelum token pertama dan putus di tengah stream
+    FAKE_LLM_TTFT_MS = float(os.getenv("FAKE_LLM_TTFT_MS", 300))
+    FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", 60))
+    FAKE_LLM_RESPONSE_TOKENS = int(os.getenv("FAKE_LLM_RESPONSE_TOKENS", 300))
+    FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", 0))
+    FAKE_LLM_DROP_RATE = float(os.getenv("FAKE_LLM_DROP_RATE", 0))
+    FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", 42))
+
+    # Retry dilakukan oleh chat_with_retry_stream, jadi retry bawaan SDK dimatikan
+    ANTHROPIC_MAX_RETRIES = int(os.getenv("ANTHROPIC_MAX_RETRIES", 0))
+
+    # Retry panggilan model: jumlah percobaan dan batas backoff (detik)
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))
+    LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", 1))
+    LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", 30))
+
+    # Admission control untuk stream model: batas global dan per user, panjang antrean,
+    # serta bobot fitur untuk antrean adil (bobot lebih besar = dilayani lebih dulu)
+    ADMISSION_BACKEND = os.getenv("ADMISSION_BACKEND", "memory")  # memory | file
+    ADMISSION_FILE_PATH = os.getenv(
+        "ADMISSION_FILE_PATH", os.path.join(tempfile.gettempdir(), "ai-chatbot-admission.json")
+    )
+    ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", 32))
+    ADMISSION_MAX_PER_USER = int(os.getenv("ADMISSION_MAX_PER_USER", 2))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 100))
+    ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", 10))
+    ADMISSION_POLL_INTERVAL = float(os.getenv("ADMISSION_POLL_INTERVAL", 0.5))
+    ADMISSION_FEATURE_WEIGHTS = {
+        "CS_CHATBOT": 4.0,
+        "GENERAL": 2.0,
+        "CODE_HELPER": 2.0,
+        "CODE_CHECK": 1.0,
+        "CODE_CHECK_FRONTEND": 1.0,
+        "CODE_CHECK_BACKEND": 1.0,
+        "CODE_CHECK_APPS": 1.0,
+        "DOCUMENT_CHECKING": 1.0,
+        **json.loads(os.getenv("ADMISSION_FEATURE_WEIGHTS", "{}")),
+    }
+
+    # Aktifkan prompt caching (cache_control) untuk blok system prompt yang stabil
+    PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() == "true"
+
+    # Batas token riwayat chat yang dikirim ke model per fitur.
+    # Giliran yang lebih lama diganti dengan ringkasan bergulir per chat.
+    HISTORY_TOKEN_BUDGET_DEFAULT = int(os.getenv("HISTORY_TOKEN_BUDGET_DEFAULT", 8000))
+    HISTORY_TOKEN_BUDGET = {
+        "CS_CHATBOT": int(os.getenv("HISTORY_TOKEN_BUDGET_CS_CHATBOT", 3000)),
+        "CODE_CHECK_FRONTEND": int(os.getenv("HISTORY_TOKEN_BUDGET_CODE_CHECK_FRONTEND", 12000)),
+        "CODE_CHECK_BACKEND": int(os.getenv("HISTORY_TOKEN_BUDGET_CODE_CHECK_BACKEND", 12000)),
+        "CODE_CHECK_APPS": int(os.getenv("HISTORY_TOKEN_BUDGET_CODE_CHECK_APPS", 12000)),
+    }
+    # Jumlah hitungan token per pesan yang disimpan di memori worker
+    HISTORY_TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("HISTORY_TOKEN_CACHE_MAX_ENTRIES", 100000))
+
+    # Pemeriksaan ukuran prompt sebelum memanggil model: batas konteks model, cadangan
+    # untuk output, dan batas token lampiran per fitur. File yang melebihi batas dipotong
+    # (minimal ATTACHMENT_MIN_TRUNCATED_TOKENS token tersisa) atau dibuang.
+    MODEL_CONTEXT_TOKENS = int(os.getenv("MODEL_CONTEXT_TOKENS", 200000))
+    PROMPT_OUTPUT_RESERVE_TOKENS = int(os.getenv("PROMPT_OUTPUT_RESERVE_TOKENS", 5000))
+    ATTACHMENT_MIN_TRUNCATED_TOKENS = int(os.getenv("ATTACHMENT_MIN_TRUNCATED_TOKENS", 500))
+    ATTACHMENT_TOKEN_BUDGET_DEFAULT = int(os.getenv("ATTACHMENT_TOKEN_BUDGET_DEFAULT", 50000))
+    ATTACHMENT_TOKEN_BUDGET = {
+        "CS_CHATBOT": int(os.getenv("ATTACHMENT_TOKEN_BUDGET_CS_CHATBOT", 10000)),
+        "CODE_CHECK_FRONTEND": int(os.getenv("ATTACHMENT_TOKEN_BUDGET_CODE_CHECK_FRONTEND", 120000)),
+        "CODE_CHECK_BACKEND": int(os.getenv("ATTACHMENT_TOKEN_BUDGET_CODE_CHECK_BACKEND", 120000)),
+        "CODE_CHECK_APPS": int(os.getenv("ATTACHMENT_TOKEN_BUDGET_CODE_CHECK_APPS", 120000)),
+        "DOCUMENT_CHECKING": int(os.getenv("ATTACHMENT_TOKEN_BUDGET_DOCUMENT_CHECKING", 100000)),
+    }
+
+    # Review kode map-reduce (CODE_CHECK_FRONTEND/BACKEND/APPS): lampiran di atas
+    # CODE_REVIEW_SINGLE_PASS_TOKENS dipecah menjadi batch CODE_REVIEW_BATCH_TOKENS yang
+    # direview bersamaan, lalu hasilnya digabung. Total lampiran dibatasi CODE_REVIEW_MAX_TOKENS.
+    CODE_REVIEW_MAP_REDUCE_ENABLED = os.getenv("CODE_REVIEW_MAP_REDUCE_ENABLED", "true").lower() == "true"
+    CODE_REVIEW_SINGLE_PASS_TOKENS = int(os.getenv("CODE_REVIEW_SINGLE_PASS_TOKENS", 60000))
+    CODE_REVIEW_BATCH_TOKENS = int(os.getenv("CODE_REVIEW_BATCH_TOKENS", 40000))
+    CODE_REVIEW_MAX_TOKENS = int(os.getenv("CODE_REVIEW_MAX_TOKENS", 800000))
+    CODE_REVIEW_CONCURRENCY = int(os.getenv("CODE_REVIEW_CONCURRENCY", 4))
+    CODE_REVIEW_BATCH_MAX_TOKENS = int(os.getenv("CODE_REVIEW_BATCH_MAX_TOKENS", 2000))
+
+    # Job code check asinkron: jumlah worker per proses, interval polling antrean,
+    # batas waktu job running tanpa update sebelum diambil ulang (detik), dan folder zip
+    CODE_CHECK_JOB_WORKERS = int(os.getenv("CODE_CHECK_JOB_WORKERS", 2))
+    CODE_CHECK_JOB_POLL_INTERVAL = float(os.getenv("CODE_CHECK_JOB_POLL_INTERVAL", 5))
+    CODE_CHECK_JOB_STALE_AFTER = float(os.getenv("CODE_CHECK_JOB_STALE_AFTER", 1800))
+    CODE_CHECK_JOB_DIR = os.getenv("CODE_CHECK_JOB_DIR", os.path.join(os.getcwd(), "code_check_jobs"))
+
+    # Model routing: rute dibaca dari file JSON atau string JSON, kosong = rute bawaan
+    FAST_MODEL_NAME = os.getenv("FAST_MODEL_NAME", "claude-3-haiku-20240307")
+    MODEL_ROUTES_FILE = os.getenv("MODEL_ROUTES_FILE", "")
+    MODEL_ROUTES = os.getenv("MODEL_ROUTES", "")
+
+    # Model dan batas token untuk membuat ringkasan riwayat chat
+    SUMMARY_MODEL_NAME = os.getenv("SUMMARY_MODEL_NAME", MODEL_NAME)
+    SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", 1000))
+
+    # Penggabungan delta model menjadi frame SSE: dikirim setiap jendela waktu (ms)
+    # atau ketika teks tertunda mencapai batas ukuran. Isi 0 untuk mematikan.
+    SSE_COALESCE_WINDOW_MS = int(os.getenv("SSE_COALESCE_WINDOW_MS", 50))
+    SSE_COALESCE_MAX_BYTES = int(os.getenv("SSE_COALESCE_MAX_BYTES", 512))
+
+    # Jika semua klien stream terputus dan tidak ada yang menyambung kembali dalam
+    # jangka waktu ini (detik), generasi dibatalkan dan jawaban parsial disimpan
+    STREAM_CANCEL_GRACE = float(os.getenv("STREAM_CANCEL_GRACE", 5))
+
+    # Mode generasi per fitur: "cancel" (dibatalkan saat klien pergi) atau "detach"
+    # (tetap berjalan di background dan jawaban parsial ditulis ke database secara berkala)
+    STREAM_MODE_DEFAULT = os.getenv("STREAM_MODE_DEFAULT", "cancel")
+    STREAM_MODE = {
+        "CODE_CHECK_FRONTEND": "detach",
+        "CODE_CHECK_BACKEND": "detach",
+        "CODE_CHECK_APPS": "detach",
+        "DOCUMENT_CHECKING": "detach",
+        **json.loads(os.getenv("STREAM_MODE", "{}")),
+    }
+    # Generasi detach: interval penulisan jawaban parsial ke database, interval polling
+    # saat klien menyambung dari worker lain, dan batas waktu tanpa update sebelum
+    # generasi dianggap mati (detik)
+    DETACHED_FLUSH_INTERVAL = float(os.getenv("DETACHED_FLUSH_INTERVAL", 1))
+    DETACHED_POLL_INTERVAL = float(os.getenv("DETACHED_POLL_INTERVAL", 1))
+    DETACHED_STALE_AFTER = float(os.getenv("DETACHED_STALE_AFTER", 120))
+
+    # Buffer replay SSE per chat: jumlah event maksimum dan lama disimpan setelah selesai (detik)
+    STREAM_BUFFER_MAX_EVENTS = int(os.getenv("STREAM_BUFFER_MAX_EVENTS", 2000))
+    STREAM_BUFFER_TTL = int(os.getenv("STREAM_BUFFER_TTL", 300))
+
+    # Cache jawaban untuk giliran yang identik (temperature=0)
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1000))
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 3600))
+    # Cache system prompt yang sudah disusun, per (fitur, versi konteks/rules/FAQ).
+    # Versi dinaikkan di worker yang menulis; worker lain memakai TTL sebagai batas basi
+    SYSTEM_PROMPT_CACHE_MAX_ENTRIES = int(os.getenv("SYSTEM_PROMPT_CACHE_MAX_ENTRIES", 1000))
+    SYSTEM_PROMPT_CACHE_TTL = int(os.getenv("SYSTEM_PROMPT_CACHE_TTL", 60))
+    # Request identik yang bersamaan berbagi satu stream model (single-flight)
+    SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+    # Simpan juga ke tabel response_cache di Postgres agar dipakai bersama antar worker
+    RESPONSE_CACHE_PERSISTENT = os.getenv("RESPONSE_CACHE_PERSISTENT", "false").lower() == "true"
+    # Interval penghapusan baris response_cache yang sudah kedaluwarsa (detik)
+    RESPONSE_CACHE_PURGE_INTERVAL = int(os.getenv("RESPONSE_CACHE_PURGE_INTERVAL", 600))
+    # Ukuran potongan teks saat jawaban dari cache dikirim ulang lewat SSE
+    RESPONSE_CACHE_CHUNK_SIZE = int(os.getenv("RESPONSE_CACHE_CHUNK_SIZE", 64))
+
+    # Jumlah pesan per halaman riwayat chat (default dan maksimum parameter limit)
+    MESSAGES_PAGE_SIZE = int(os.getenv("MESSAGES_PAGE_SIZE", 50))
+    MESSAGES_PAGE_MAX = int(os.getenv("MESSAGES_PAGE_MAX", 200))
+    # Jumlah chat per halaman daftar chat, dan panjang cuplikan pesan terakhir (karakter)
+    CHATS_PAGE_SIZE = int(os.getenv("CHATS_PAGE_SIZE", 30))
+    CHATS_PAGE_MAX = int(os.getenv("CHATS_PAGE_MAX", 100))
+    CHAT_PREVIEW_CHARS = int(os.getenv("CHAT_PREVIEW_CHARS", 80))
+
+    # Connection pool database per worker: jumlah koneksi tetap dan tambahan, umur
+    # maksimum koneksi (detik), cek koneksi sebelum dipakai, dan batas tunggu checkout (detik)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+    # Sesi di luar get_db yang memegang transaksi lebih lama dari ini (detik) dilaporkan sebagai bocor
+    DB_SESSION_LEAK_AFTER = float(os.getenv("DB_SESSION_LEAK_AFTER", 60))
+
     SECRET_KEY = os.getenv("SECRET_KEY")
 
     ALGORITHM = os.getenv("ALGORITHM")
 
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+
+    @classmethod
+    def history_token_budget(cls, feature_name: str) -> int:
+        return cls.HISTORY_TOKEN_BUDGET.get(feature_name, cls.HISTORY_TOKEN_BUDGET_DEFAULT)
+
+    @classmethod
+    def attachment_token_budget(cls, feature_name: str) -> int:
+        return cls.ATTACHMENT_TOKEN_BUDGET.get(feature_name, cls.ATTACHMENT_TOKEN_BUDGET_DEFAULT)
+
+    @classmethod
+    def stream_mode(cls, feature_name: str) -> str:
+        return cls.STREAM_MODE.get(feature_name, cls.STREAM_MODE_DEFAULT)
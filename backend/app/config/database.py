@@ -1,8 +1,11 @@
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 import os
+
+from app.config.config import Config
+from app.utils.session_tracker import TrackedSession
 load_dotenv()
 
 DB_NAME = os.getenv("DB_NAME")
@@ -15,25 +18,72 @@ DB_PORT = os.getenv("DB_PORT")
 SQLALCHEMY_DATABASE_URL = (
     f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
+ASYNC_SQLALCHEMY_DATABASE_URL = (
+    f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
 
-# Membuat engine SQLAlchemy
+# Engine sinkron (psycopg2) hanya untuk DDL saat startup
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
-# Membuat SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Engine async (asyncpg) untuk semua query aplikasi, sehingga menunggu Postgres
+# tidak menahan event loop dan stream SSE lain di worker yang sama
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    pool_size=Config.DB_POOL_SIZE,
+    max_overflow=Config.DB_MAX_OVERFLOW,
+    pool_recycle=Config.DB_POOL_RECYCLE,
+    pool_pre_ping=Config.DB_POOL_PRE_PING,
+    pool_timeout=Config.DB_POOL_TIMEOUT,
+)
+
+# Membuat SessionLocal class. expire_on_commit=False karena atribut yang kedaluwarsa
+# tidak dapat dimuat ulang secara implisit pada AsyncSession.
+# Sesi dari SessionLocal dilacak (lihat session_tracker) karena ditutup sendiri oleh pemanggil
+SessionLocal = async_sessionmaker(async_engine, class_=TrackedSession, autoflush=False, expire_on_commit=False)
+# Sesi request selalu ditutup oleh get_db sehingga tidak perlu dilacak
+RequestSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 # Membuat Base class
 Base = declarative_base()
 
 
 # Dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with RequestSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+def pool_status() -> dict:
+    pool = async_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+        "timeout": Config.DB_POOL_TIMEOUT,
+    }
+
+
+# Kolom yang ditambahkan setelah tabel dibuat (create_all tidak mengubah tabel yang sudah ada)
+ADDED_COLUMNS = [
+    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS is_truncated BOOLEAN NOT NULL DEFAULT FALSE",
+    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS is_streaming BOOLEAN NOT NULL DEFAULT FALSE",
+    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE",
+]
+
+# Index yang ditambahkan setelah tabel dibuat, dengan alasan yang sama
+ADDED_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_messages_chat_id_created_at_id ON messages (chat_id, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_chats_user_id_feature_created_at ON chats (user_id, feature, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_response_cache_expires_at ON response_cache (expires_at)",
+]
 
 
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for statement in ADDED_COLUMNS + ADDED_INDEXES:
+            connection.execute(text(statement))
+    # Koneksi sinkron tidak dipakai lagi setelah startup
+    engine.dispose()
@@ -53,9 +53,13 @@ class Chat(Base):
     files = relationship(
         "ChatFile", back_populates="chat", cascade="all, delete-orphan"
     )
+    summary = relationship(
+        "ChatSummary", back_populates="chat", cascade="all, delete-orphan", uselist=False
+    )
     __table_args__ = (
         Index("idx_chats_user_id", "user_id"),
         Index("idx_chats_created_at", "created_at"),
+        Index("idx_chats_user_id_feature_created_at", "user_id", "feature", "created_at", "id"),
     )
 
 
@@ -67,8 +71,28 @@ class Message(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     chat_id = Column(pgUUID(as_uuid=True), ForeignKey("chats.id"), nullable=False)
     file_id = Column(pgUUID(as_uuid=True), ForeignKey("chat_files.id"), nullable=True)
+    # True jika jawaban berhenti sebelum selesai (misalnya klien menutup koneksi)
+    is_truncated = Column(Boolean, nullable=False, default=False, server_default="false")
+    # True selama jawaban generasi detach masih ditulis
+    is_streaming = Column(Boolean, nullable=False, default=False, server_default="false")
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     chat = relationship("Chat", back_populates="messages")
     file = relationship("ChatFile", back_populates="messages")
+    __table_args__ = (
+        # Keyset pagination riwayat chat: WHERE chat_id = ? AND (created_at, id) < (?, ?)
+        Index("idx_messages_chat_id_created_at_id", "chat_id", "created_at", "id"),
+    )
+
+
+class ChatSummary(Base):
+    __tablename__ = "chat_summaries"
+    chat_id = Column(pgUUID(as_uuid=True), ForeignKey("chats.id"), primary_key=True)
+    summary = Column(Text, nullable=False)
+    # Jumlah pesan (dari awal chat) yang sudah tercakup dalam ringkasan
+    message_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    chat = relationship("Chat", back_populates="summary")
 
 
 class ChatFile(Base):
@@ -122,6 +146,66 @@ class PromptLogs(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+class ResponseCache(Base):
+    __tablename__ = "response_cache"
+
+    # sha256 dari (model, fitur, system prompt, messages)
+    key = Column(String(64), primary_key=True)
+    feature = Column(String, nullable=False)
+    user_id = Column(Integer, nullable=True)
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    __table_args__ = (
+        Index("idx_response_cache_feature_user_id", "feature", "user_id"),
+        Index("idx_response_cache_expires_at", "expires_at"),
+    )
+
+
+class CodeCheckJob(Base):
+    __tablename__ = "code_check_jobs"
+
+    id = Column(pgUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    feature = Column(String, nullable=False)
+    message = Column(Text, nullable=False, default="")
+    # queued | running | completed | failed
+    status = Column(String, nullable=False, default="queued")
+    file_path = Column(String, nullable=False)
+    total_files = Column(Integer, nullable=False, default=0)
+    total_batches = Column(Integer, nullable=False, default=0)
+    completed_batches = Column(Integer, nullable=False, default=0)
+    summary = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    findings = relationship(
+        "CodeCheckFinding", back_populates="job", cascade="all, delete-orphan"
+    )
+    __table_args__ = (
+        Index("idx_code_check_jobs_status_created_at", "status", "created_at"),
+        Index("idx_code_check_jobs_user_id", "user_id"),
+    )
+
+
+class CodeCheckFinding(Base):
+    __tablename__ = "code_check_findings"
+
+    id = Column(pgUUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_id = Column(pgUUID(as_uuid=True), ForeignKey("code_check_jobs.id"), nullable=False)
+    batch_index = Column(Integer, nullable=False)
+    # None jika temuan batch tidak dapat dipetakan ke satu file
+    file_name = Column(String, nullable=True)
+    findings = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    job = relationship("CodeCheckJob", back_populates="findings")
+    __table_args__ = (
+        Index("idx_code_check_findings_job_id", "job_id"),
+    )
+
+
 User.contexts = relationship(
     "Context", order_by=Context.created_at, back_populates="user"
 )
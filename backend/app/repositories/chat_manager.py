@@ -1,11 +1,13 @@
 import logging
-from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import DateTime, delete, desc, func, insert, true, tuple_, update
 from app.models.models import User, Chat, Message, ChatFile
 from uuid import UUID
 from fastapi import HTTPException
 import traceback
+import uuid
 from sqlalchemy import select
 import os
 
@@ -15,30 +17,101 @@ logger = logging.getLogger(__name__)
 
 
 class ChatManager:
-    def create_chat(self, db: Session, user_id: int, feature: Feature = Feature.GENERAL) -> Chat:
+    async def create_chat(self, db: AsyncSession, user_id: int, feature: Feature = Feature.GENERAL) -> Chat:
         db_chat = Chat(user_id=user_id, title="New Chat", feature=feature.name)
         db.add(db_chat)
-        db.commit()
-        db.refresh(db_chat)
+        await db.commit()
+        await db.refresh(db_chat)
         return db_chat
 
-    def add_message(
+    async def add_message(
         self,
-        db: Session,
+        db: AsyncSession,
         chat_id: UUID,
         content: str,
         is_user: bool,
         file_id: Optional[UUID] = None,
+        is_truncated: bool = False,
+        is_streaming: bool = False,
+        commit: bool = True,
     ) -> Message:
         db_message = Message(
-            chat_id=chat_id, content=content, is_user=is_user, file_id=file_id
+            chat_id=chat_id,
+            content=content,
+            is_user=is_user,
+            file_id=file_id,
+            is_truncated=is_truncated,
+            is_streaming=is_streaming,
         )
         db.add(db_message)
-        db.commit()
-        db.refresh(db_message)
+        if not commit:
+            await db.flush()
+            return db_message
+        await db.commit()
+        await db.refresh(db_message)
         return db_message
 
-    def get_chat_messages(self, db: Session, chat_id: UUID) -> List[Dict[str, Any]]:
+    async def add_messages(
+        self, db: AsyncSession, chat_id: UUID, messages: List[Dict[str, Any]]
+    ) -> List[UUID]:
+        """
+        Menambahkan beberapa pesan dengan satu INSERT multi-baris, tanpa commit dan
+        tanpa refresh; commit dilakukan pemanggil bersama penulisan lain dalam giliran
+        chat yang sama.
+
+        now() bernilai sama untuk semua baris dalam satu transaksi, sehingga created_at
+        diisi dari clock_timestamp() di dalam INSERT itu sendiri dengan selisih
+        1 mikrodetik per pesan agar urutan tetap.
+
+        Args:
+            messages (List[Dict]): Field pesan: content, is_user, dan opsional
+                file_id, is_truncated, is_streaming.
+
+        Returns:
+            List[UUID]: ID pesan sesuai urutan `messages`.
+        """
+        if not messages:
+            return []
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "chat_id": chat_id,
+                "content": message["content"],
+                "is_user": message["is_user"],
+                "file_id": message.get("file_id"),
+                "is_truncated": message.get("is_truncated", False),
+                "is_streaming": message.get("is_streaming", False),
+                "created_at": func.clock_timestamp(type_=DateTime(timezone=True))
+                + timedelta(microseconds=index),
+            }
+            for index, message in enumerate(messages)
+        ]
+        await db.execute(insert(Message).values(rows))
+        return [row["id"] for row in rows]
+
+    async def update_message(
+        self,
+        db: AsyncSession,
+        message_id: UUID,
+        content: str,
+        is_streaming: bool,
+        is_truncated: bool = False,
+        commit: bool = True,
+    ) -> None:
+        await db.execute(
+            update(Message)
+            .where(Message.id == message_id)
+            .values(content=content, is_streaming=is_streaming, is_truncated=is_truncated)
+            .execution_options(synchronize_session=False)
+        )
+        if commit:
+            await db.commit()
+
+    async def get_message(self, db: AsyncSession, message_id: UUID) -> Optional[Message]:
+        result = await db.execute(select(Message).where(Message.id == message_id))
+        return result.scalars().first()
+
+    async def get_chat_messages(self, db: AsyncSession, chat_id: UUID) -> List[Dict[str, Any]]:
         try:
             query = (
                 select(Message, ChatFile)
@@ -48,7 +121,7 @@ class ChatManager:
             )
             logger.info(f"query:{query}")
 
-            result = db.execute(query).fetchall()
+            result = (await db.execute(query)).fetchall()
 
             messages = []
             for message, chat_file in result:
@@ -67,19 +140,157 @@ class ChatManager:
             logger.error(f"Error retrieving chat messages: {str(e)}", exc_info=True)
             raise  # Re-raise the exception instead of returning an empty list
 
-    def get_user_chats(self, db: Session, user_id: int, feature: Feature = Feature.GENERAL) -> List[Chat]:
-        return (
-            db.query(Chat)
-            .filter(Chat.user_id == user_id, Chat.feature == feature.name)
+    async def get_messages_page(
+        self,
+        db: AsyncSession,
+        chat_id: UUID,
+        limit: int,
+        before: Optional[Tuple[datetime, UUID]] = None,
+        after: Optional[Tuple[datetime, UUID]] = None,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Mengambil satu halaman pesan dengan keyset pagination pada (created_at, id),
+        memakai index idx_messages_chat_id_created_at_id. Hanya kolom yang ditampilkan
+        yang dipilih. Tanpa cursor, halaman yang diambil adalah pesan terbaru.
+
+        Args:
+            before: Cursor (created_at, id); ambil pesan yang lebih lama.
+            after: Cursor (created_at, id); ambil pesan yang lebih baru.
+
+        Returns:
+            Tuple[List[Dict], bool]: Pesan urut dari yang terlama, dan apakah masih ada
+                pesan berikutnya ke arah pencarian (lebih lama, atau lebih baru untuk `after`).
+        """
+        query = (
+            select(
+                Message.id,
+                Message.content,
+                Message.is_user,
+                Message.created_at,
+                Message.is_truncated,
+                Message.is_streaming,
+                Message.file_id,
+                ChatFile.file_name,
+            )
+            .outerjoin(ChatFile, Message.file_id == ChatFile.id)
+            .where(Message.chat_id == chat_id)
+        )
+        key = tuple_(Message.created_at, Message.id)
+        if after is not None:
+            query = query.where(key > tuple_(*after)).order_by(
+                Message.created_at.asc(), Message.id.asc()
+            )
+        else:
+            if before is not None:
+                query = query.where(key < tuple_(*before))
+            query = query.order_by(Message.created_at.desc(), Message.id.desc())
+
+        # Satu baris tambahan untuk mengetahui apakah masih ada halaman berikutnya
+        rows = (await db.execute(query.limit(limit + 1))).mappings().all()
+        has_more = len(rows) > limit
+        messages = [dict(row) for row in rows[:limit]]
+        if after is None:
+            messages.reverse()
+        return messages, has_more
+
+    async def get_chat_file(
+        self, db: AsyncSession, chat_id: UUID, file_id: UUID
+    ) -> Optional[ChatFile]:
+        result = await db.execute(
+            select(ChatFile).where(ChatFile.id == file_id, ChatFile.chat_id == chat_id)
+        )
+        return result.scalars().first()
+
+    async def get_chat(self, db: AsyncSession, chat_id: UUID) -> Optional[Chat]:
+        result = await db.execute(select(Chat).where(Chat.id == chat_id))
+        return result.scalars().first()
+
+    async def get_last_message(self, db: AsyncSession, chat_id: UUID) -> Optional[Message]:
+        result = await db.execute(
+            select(Message)
+            .where(Message.chat_id == chat_id)
+            .order_by(desc(Message.created_at))
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    async def get_user_chats(self, db: AsyncSession, user_id: int, feature: Feature = Feature.GENERAL) -> List[Chat]:
+        result = await db.execute(
+            select(Chat)
+            .where(Chat.user_id == user_id, Chat.feature == feature.name)
             .order_by(desc(Chat.created_at))
-            .all()
         )
+        return list(result.scalars().all())
+
+    async def get_user_chats_page(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        feature: Feature,
+        limit: int,
+        preview_chars: int,
+        before: Optional[Tuple[datetime, UUID]] = None,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Mengambil satu halaman daftar chat (terbaru dulu) beserta jumlah pesan, waktu
+        dan cuplikan pesan terakhir dalam satu query. Chat diambil lewat keyset
+        (created_at, id) pada index idx_chats_user_id_feature_created_at; statistik
+        pesan dihitung per chat di halaman saja lewat LEFT JOIN LATERAL yang memakai
+        index idx_messages_chat_id_created_at_id.
+
+        Args:
+            preview_chars: Panjang cuplikan; satu karakter lebih diambil agar pemanggil
+                tahu apakah cuplikan terpotong.
+            before: Cursor (created_at, id); ambil chat yang lebih lama.
+
+        Returns:
+            Tuple[List[Dict], bool]: Chat dalam halaman, dan apakah masih ada chat yang lebih lama.
+        """
+        message_count = (
+            select(func.count().label("message_count"))
+            .where(Message.chat_id == Chat.id)
+            .lateral("message_count")
+        )
+        last_message = (
+            select(
+                Message.created_at,
+                func.left(Message.content, preview_chars + 1).label("preview"),
+                Message.is_user,
+            )
+            .where(Message.chat_id == Chat.id)
+            .order_by(Message.created_at.desc(), Message.id.desc())
+            .limit(1)
+            .lateral("last_message")
+        )
+        query = (
+            select(
+                Chat.id,
+                Chat.title,
+                Chat.created_at,
+                Chat.user_id,
+                message_count.c.message_count,
+                last_message.c.created_at.label("last_message_at"),
+                last_message.c.preview,
+                last_message.c.is_user.label("last_message_is_user"),
+            )
+            .select_from(Chat)
+            .outerjoin(message_count, true())
+            .outerjoin(last_message, true())
+            .where(Chat.user_id == user_id, Chat.feature == feature.name)
+        )
+        if before is not None:
+            query = query.where(tuple_(Chat.created_at, Chat.id) < tuple_(*before))
+        query = query.order_by(Chat.created_at.desc(), Chat.id.desc())
+
+        # Satu baris tambahan untuk mengetahui apakah masih ada halaman berikutnya
+        rows = (await db.execute(query.limit(limit + 1))).mappings().all()
+        return [dict(row) for row in rows[:limit]], len(rows) > limit
 
-    def delete_chat(self, db: Session, chat_id: UUID, user_id: int) -> bool:
+    async def delete_chat(self, db: AsyncSession, chat_id: UUID, user_id: int) -> bool:
         """
         Menghapus chat berdasarkan ID.
         Args:
-            db (Session): Sesi repositories SQLAlchemy.
+            db (AsyncSession): Sesi repositories SQLAlchemy.
             chat_id (UUID): ID chat yang akan dihapus.
 
         Returns:
@@ -89,58 +300,64 @@ class ChatManager:
             HTTPException: Jika chat tidak ditemukan atau terjadi kesalahan server.
         """
         try:
-            chat = (
-                db.query(Chat)
-                .filter(Chat.id == chat_id, Chat.user_id == user_id)
-                .first()
+            result = await db.execute(
+                select(Chat).where(Chat.id == chat_id, Chat.user_id == user_id)
             )
+            chat = result.scalars().first()
             logger.info(f"{chat}")
             if not chat:
                 return False
-            db.query(Message).filter(Message.chat_id == chat_id).delete(
-                synchronize_session="fetch"
+            await db.execute(
+                delete(Message)
+                .where(Message.chat_id == chat_id)
+                .execution_options(synchronize_session="fetch")
             )
 
-            db.delete(chat)
-            db.commit()
+            await db.delete(chat)
+            await db.commit()
             logger.info(f"Chat with id {chat_id} successfully deleted")
             return True
         except Exception as e:
             logger.error(f"Error deleting chat {chat_id}: {str(e)}")
             logger.error(traceback.format_exc())  # Ini akan mencetak traceback ke log
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=500, detail="Internal server error while deleting chat"
             )
             return False
 
-    def update_chat_title(self, db: Session, chat_id: UUID, title: str) -> bool:
-        chat = db.query(Chat).filter(Chat.id == chat_id).first()
-        if chat:
-            chat.title = title
-            db.commit()
-            return True
-        return False
+    async def update_chat_title(
+        self, db: AsyncSession, chat_id: UUID, title: str, commit: bool = True
+    ) -> bool:
+        result = await db.execute(
+            update(Chat)
+            .where(Chat.id == chat_id)
+            .values(title=title)
+            .execution_options(synchronize_session=False)
+        )
+        if commit:
+            await db.commit()
+        return result.rowcount > 0
 
-    def get_latest_chat_id(self, db: Session, user_id: int) -> Optional[UUID]:
-        latest_chat = (
-            db.query(Chat)
-            .filter(Chat.user_id == user_id)
+    async def get_latest_chat_id(self, db: AsyncSession, user_id: int) -> Optional[UUID]:
+        result = await db.execute(
+            select(Chat.id)
+            .where(Chat.user_id == user_id)
             .order_by(desc(Chat.created_at))
-            .first()
+            .limit(1)
         )
-        return latest_chat.id if latest_chat else None
+        return result.scalars().first()
 
-    def add_file_to_chat(
-        self, db: Session, chat_id: UUID, file_name: str, file_path: str
+    async def add_file_to_chat(
+        self, db: AsyncSession, chat_id: UUID, file_name: str, file_path: str
     ) -> UUID:
         try:
             chat_file = ChatFile(
                 chat_id=chat_id, file_name=file_name, file_path=file_path
             )
             db.add(chat_file)
-            db.commit()
-            db.refresh(chat_file)
+            await db.commit()
+            await db.refresh(chat_file)
             logger.info(f"File added to chat {chat_id}: {file_name}")
             return chat_file.id
         except Exception as e:
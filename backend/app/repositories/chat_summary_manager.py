@@ -0,0 +1,46 @@
+import logging
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import ChatSummary
+
+logger = logging.getLogger(__name__)
+
+
+class ChatSummaryManager:
+    async def get_summary(self, db: AsyncSession, chat_id: UUID) -> Optional[ChatSummary]:
+        result = await db.execute(select(ChatSummary).where(ChatSummary.chat_id == chat_id))
+        return result.scalars().first()
+
+    async def save_summary(
+        self, db: AsyncSession, chat_id: UUID, summary: str, message_count: int
+    ) -> Optional[ChatSummary]:
+        """
+        Menyimpan ringkasan chat. Ringkasan yang mencakup lebih sedikit pesan
+        dari yang sudah tersimpan diabaikan (hasil refresh yang kalah cepat).
+        """
+        try:
+            chat_summary = await self.get_summary(db, chat_id)
+            if chat_summary is None:
+                chat_summary = ChatSummary(
+                    chat_id=chat_id, summary=summary, message_count=message_count
+                )
+                db.add(chat_summary)
+            elif chat_summary.message_count >= message_count:
+                return chat_summary
+            else:
+                chat_summary.summary = summary
+                chat_summary.message_count = message_count
+            await db.commit()
+            await db.refresh(chat_summary)
+            return chat_summary
+        except Exception as e:
+            logger.error(f"Error saving chat summary: {str(e)}")
+            await db.rollback()
+            raise
+
+
+chat_summary_manager = ChatSummaryManager()
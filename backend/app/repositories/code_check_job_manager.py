@@ -0,0 +1,134 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import CodeCheckJob, CodeCheckFinding
+from app.utils.feature_utils import Feature
+
+logger = logging.getLogger(__name__)
+
+
+class CodeCheckJobManager:
+    async def create_job(
+        self, db: AsyncSession, job_id: UUID, user_id: int, feature: Feature, message: str, file_path: str
+    ) -> CodeCheckJob:
+        job = CodeCheckJob(
+            id=job_id,
+            user_id=user_id,
+            feature=feature.value,
+            message=message,
+            file_path=file_path,
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        return job
+
+    async def get_job(
+        self, db: AsyncSession, job_id: UUID, user_id: Optional[int] = None
+    ) -> Optional[CodeCheckJob]:
+        query = select(CodeCheckJob).where(CodeCheckJob.id == job_id)
+        if user_id is not None:
+            query = query.where(CodeCheckJob.user_id == user_id)
+        result = await db.execute(query)
+        return result.scalars().first()
+
+    async def claim_next_job(self, db: AsyncSession, stale_after: float) -> Optional[CodeCheckJob]:
+        """
+        Mengambil satu job antrean (atau job running yang tidak diperbarui selama
+        `stale_after` detik karena workernya mati) dan menandainya running.
+        FOR UPDATE SKIP LOCKED memastikan satu job hanya diambil satu worker.
+        """
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=stale_after)
+        try:
+            result = await db.execute(
+                select(CodeCheckJob)
+                .where(
+                    or_(
+                        CodeCheckJob.status == "queued",
+                        (CodeCheckJob.status == "running")
+                        & (CodeCheckJob.updated_at < stale_before),
+                    )
+                )
+                .order_by(CodeCheckJob.created_at.asc())
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            job = result.scalars().first()
+            if job is None:
+                await db.rollback()
+                return None
+            job.status = "running"
+            job.started_at = datetime.now(timezone.utc)
+            job.completed_batches = 0
+            # Temuan dari percobaan sebelumnya yang terhenti dibuang
+            await db.execute(delete(CodeCheckFinding).where(CodeCheckFinding.job_id == job.id))
+            await db.commit()
+            await db.refresh(job)
+            return job
+        except Exception as e:
+            logger.error(f"Error claiming code check job: {str(e)}")
+            await db.rollback()
+            raise
+
+    async def set_batches(self, db: AsyncSession, job_id: UUID, total_files: int, total_batches: int):
+        await db.execute(
+            update(CodeCheckJob)
+            .where(CodeCheckJob.id == job_id)
+            .values(total_files=total_files, total_batches=total_batches)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    async def add_batch_findings(
+        self, db: AsyncSession, job_id: UUID, batch_index: int, findings: Dict[Optional[str], str], completed: int
+    ):
+        """
+        Menyimpan temuan satu batch dan memperbarui progress job dalam satu transaksi.
+        """
+        db.add_all(
+            [
+                CodeCheckFinding(
+                    job_id=job_id, batch_index=batch_index, file_name=file_name, findings=text
+                )
+                for file_name, text in findings.items()
+            ]
+        )
+        await db.execute(
+            update(CodeCheckJob)
+            .where(CodeCheckJob.id == job_id)
+            .values(completed_batches=completed)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    async def finish_job(
+        self, db: AsyncSession, job_id: UUID, status: str, summary: Optional[str] = None, error: Optional[str] = None
+    ):
+        await db.execute(
+            update(CodeCheckJob)
+            .where(CodeCheckJob.id == job_id)
+            .values(
+                status=status,
+                summary=summary,
+                error=error,
+                finished_at=datetime.now(timezone.utc),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    async def get_findings(self, db: AsyncSession, job_id: UUID) -> List[CodeCheckFinding]:
+        result = await db.execute(
+            select(CodeCheckFinding)
+            .where(CodeCheckFinding.job_id == job_id)
+            .order_by(CodeCheckFinding.batch_index.asc(), CodeCheckFinding.file_name.asc())
+        )
+        return list(result.scalars().all())
+
+
+code_check_job_manager = CodeCheckJobManager()
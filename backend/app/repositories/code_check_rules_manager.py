@@ -1,16 +1,18 @@
 import logging
 from typing import Any, Dict, List
 
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.code_check_rules import CodeCheckRules
+from app.repositories.data_versions import data_versions, CODE_CHECK_RULES
 from app.utils.feature_utils import Feature
 
 logger = logging.getLogger(__name__)
 
 class CodeCheckRulesManager:
     @staticmethod
-    def add_rules(db: Session,
+    async def add_rules(db: AsyncSession,
                   rules: str,
                   feature: Feature
                   ):
@@ -20,50 +22,58 @@ class CodeCheckRulesManager:
                 rule=rules
             )
             db.add(new_rule)
-            db.commit()
-            db.refresh(new_rule)
+            await db.commit()
+            await db.refresh(new_rule)
+            await data_versions.bump(CODE_CHECK_RULES, feature)
             return new_rule
         except Exception as e:
             logger.error(f"Error adding code check rule: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise
 
     @staticmethod
-    def get_rules(db: Session) -> List[Dict[str, Any]]:
+    async def get_rules(db: AsyncSession) -> List[Dict[str, Any]]:
         try:
-            rules = db.query(CodeCheckRules).all()
-            return [rule.__dict__ for rule in rules]
+            result = await db.execute(select(CodeCheckRules))
+            return [rule.__dict__ for rule in result.scalars().all()]
         except Exception as e:
             logger.error(f"Error retrieving code check rules: {str(e)}")
             raise
 
     @staticmethod
-    def get_rules_by_type(db: Session, feature: Feature) -> Dict[str, Any]:
+    async def get_rules_by_type(db: AsyncSession, feature: Feature) -> Dict[str, Any]:
         try:
-            rule = db.query(CodeCheckRules).filter(CodeCheckRules.feature == feature.name).first()
+            result = await db.execute(
+                select(CodeCheckRules).where(CodeCheckRules.feature == feature.name)
+            )
+            rule = result.scalars().first()
             return rule.__dict__
         except Exception as e:
             logger.error(f"Error retrieving code check rules: {str(e)}")
             raise
 
     @staticmethod
-    def delete_rules(db: Session, feature: Feature) -> bool:
+    async def delete_rules(db: AsyncSession, feature: Feature) -> bool:
         try:
-            db.query(CodeCheckRules).filter(CodeCheckRules.feature == feature.name).delete()
-            db.commit()
+            await db.execute(delete(CodeCheckRules).where(CodeCheckRules.feature == feature.name))
+            await db.commit()
+            await data_versions.bump(CODE_CHECK_RULES, feature)
             return True
         except Exception as e:
             logger.error(f"Error deleting code check rules: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise
 
     @staticmethod
-    def update_rules(db: Session, feature: Feature, rules: str) -> bool:
+    async def update_rules(db: AsyncSession, feature: Feature, rules: str) -> bool:
         try:
-            db.query(CodeCheckRules).filter(CodeCheckRules.feature == feature.name).update({CodeCheckRules.rule: rules})
-            db.commit()
+            await db.execute(
+                update(CodeCheckRules).where(CodeCheckRules.feature == feature.name).values(rule=rules)
+            )
+            await db.commit()
+            await data_versions.bump(CODE_CHECK_RULES, feature)
             return True
         except Exception as e:
             logger.error(f"Error updating code check rules: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise
\ No newline at end of file
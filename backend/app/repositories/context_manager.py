@@ -2,16 +2,18 @@ import logging
 import uuid
 from typing import List, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.models import Context
+from app.repositories.data_versions import data_versions, USER_CONTEXT
 
 logger = logging.getLogger(__name__)
 
 class ContextManager:
-    def add_context(
+    async def add_context(
         self,
-        db: Session,
+        db: AsyncSession,
         user_id: int,
         content: str,
         content_type: str,
@@ -28,36 +30,37 @@ class ContextManager:
                 content_raw=content_raw,
             )
             db.add(new_context)
-            db.commit()
-            db.refresh(new_context)
+            await db.commit()
+            await db.refresh(new_context)
+            await data_versions.bump(USER_CONTEXT, user_id)
             logger.info(f"Context added successfully: {new_context.id}")
             return new_context
         except Exception as e:
             logger.error(f"Error adding context: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise
 
-    def get_user_contexts(self, db: Session, user_id: int) -> List[Context]:
+    async def get_user_contexts(self, db: AsyncSession, user_id: int) -> List[Context]:
         try:
-            return (
-                db.query(Context)
-                .filter(Context.user_id == user_id)
+            result = await db.execute(
+                select(Context)
+                .where(Context.user_id == user_id)
                 .order_by(Context.updated_at.desc())
-                .all()
             )
+            return list(result.scalars().all())
         except Exception as e:
             logger.error(f"Error getting user contexts: {str(e)}")
             raise
 
-    def get_latest_context(self, db: Session, user_id: int) -> Optional[List[Context]]:
+    async def get_latest_context(self, db: AsyncSession, user_id: int) -> Optional[List[Context]]:
         try:
             logger.info(f"Getting latest context for user_id: {user_id}")
-            context = (
-                db.query(Context)
-                .filter(Context.user_id == user_id)
+            result = await db.execute(
+                select(Context)
+                .where(Context.user_id == user_id)
                 .order_by(Context.updated_at.desc())
-                .all()
             )
+            context = list(result.scalars().all())
             if not context:  # Jika tidak ada context
                 logger.info(f"No context found for user {user_id}")
                 return None  # Atau berikan nilai default sesuai keperluan
@@ -66,21 +69,21 @@ class ContextManager:
             logger.error(f"Error getting latest context: {str(e)}")
             raise
 
-    def delete_context(self, db: Session, context_id: uuid.UUID, user_id: int) -> bool:
+    async def delete_context(self, db: AsyncSession, context_id: uuid.UUID, user_id: int) -> bool:
         try:
-            context = (
-                db.query(Context)
-                .filter(Context.id == context_id, Context.user_id == user_id)
-                .first()
+            result = await db.execute(
+                select(Context).where(Context.id == context_id, Context.user_id == user_id)
             )
+            context = result.scalars().first()
             if context:
-                db.delete(context)
-                db.commit()
+                await db.delete(context)
+                await db.commit()
+                await data_versions.bump(USER_CONTEXT, user_id)
                 return True
             return False
         except Exception as e:
             logger.error(f"Error deleting context: {str(e)}")
-            db.rollback()
+            await db.rollback()
             raise
 
 
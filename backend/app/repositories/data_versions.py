@@ -0,0 +1,47 @@
+import inspect
+import logging
+import threading
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Sumber data yang dipakai untuk menyusun system prompt
+KNOWLEDGE_BASE = "knowledge_base"
+CODE_CHECK_RULES = "code_check_rules"
+USER_CONTEXT = "user_context"
+
+
+class DataVersions:
+    """
+    Nomor versi per sumber data (opsional per key, misalnya per fitur atau per user)
+    yang dinaikkan manager setiap kali data ditulis. Cache turunan (system prompt,
+    response cache) memakai versi ini sebagai bagian key atau mendaftarkan listener.
+
+    Versi disimpan di memori proses: worker lain baru melihat perubahan setelah
+    entri cache-nya kedaluwarsa (TTL).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[Tuple[str, Optional[Hashable]], int] = {}
+        self._listeners: List[Callable[[str, Optional[Hashable]], Union[None, Awaitable]]] = []
+
+    def get(self, source: str, key: Optional[Hashable] = None) -> int:
+        return self._versions.get((source, key), 0)
+
+    async def bump(self, source: str, key: Optional[Hashable] = None):
+        with self._lock:
+            self._versions[(source, key)] = self._versions.get((source, key), 0) + 1
+        for listener in self._listeners:
+            try:
+                result = listener(source, key)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Error in data version listener for {source}: {str(e)}")
+
+    def on_change(self, listener: Callable[[str, Optional[Hashable]], Union[None, Awaitable]]):
+        self._listeners.append(listener)
+
+
+data_versions = DataVersions()
@@ -0,0 +1,80 @@
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCacheManager:
+    @staticmethod
+    async def get_response(db: AsyncSession, key: str) -> Optional[ResponseCache]:
+        result = await db.execute(
+            select(ResponseCache).where(
+                ResponseCache.key == key,
+                ResponseCache.expires_at > datetime.now(timezone.utc),
+            )
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    async def save_response(
+        db: AsyncSession,
+        key: str,
+        feature: str,
+        user_id: Optional[int],
+        response: str,
+        expires_at: datetime,
+    ) -> ResponseCache:
+        try:
+            entry = await db.merge(
+                ResponseCache(
+                    key=key,
+                    feature=feature,
+                    user_id=user_id,
+                    response=response,
+                    expires_at=expires_at,
+                )
+            )
+            await db.commit()
+            return entry
+        except Exception as e:
+            logger.error(f"Error saving cached response: {str(e)}")
+            await db.rollback()
+            raise
+
+    @staticmethod
+    async def delete_responses(db: AsyncSession, feature: str, user_id: Optional[int] = None) -> int:
+        try:
+            statement = delete(ResponseCache).where(ResponseCache.feature == feature)
+            if user_id is not None:
+                statement = statement.where(ResponseCache.user_id == user_id)
+            result = await db.execute(statement.execution_options(synchronize_session=False))
+            await db.commit()
+            return result.rowcount
+        except Exception as e:
+            logger.error(f"Error deleting cached responses: {str(e)}")
+            await db.rollback()
+            raise
+
+    @staticmethod
+    async def delete_expired(db: AsyncSession) -> int:
+        try:
+            result = await db.execute(
+                delete(ResponseCache)
+                .where(ResponseCache.expires_at <= datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            return result.rowcount
+        except Exception as e:
+            logger.error(f"Error deleting expired cached responses: {str(e)}")
+            await db.rollback()
+            raise
+
+
+response_cache_manager = ResponseCacheManager()
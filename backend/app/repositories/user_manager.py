@@ -1,41 +1,45 @@
 from typing import Optional, Type
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.models import User
 
 
 class UserManager:
     @staticmethod
-    def get_user(db: Session, username: str) -> Optional[User]:
-        return db.query(User).filter(User.username == username).first()
+    async def get_user(db: AsyncSession, username: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.username == username))
+        return result.scalars().first()
 
     @staticmethod
-    def get_users(db: Session, skip: int = 0, limit: int = 100) -> list[Type[User]]:
-        return db.query(User).offset(skip).limit(limit).all()
+    async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100) -> list[Type[User]]:
+        result = await db.execute(select(User).offset(skip).limit(limit))
+        return list(result.scalars().all())
 
     @staticmethod
-    def create_user(db: Session, username: str, hashed_password: str) -> User:
+    async def create_user(db: AsyncSession, username: str, hashed_password: str) -> User:
         db_user = User(username=username, hashed_password=hashed_password)
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         return db_user
 
     @staticmethod
-    def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
-        return db.query(User).filter(User.id == user_id).first()
+    async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
+        result = await db.execute(select(User).where(User.id == user_id))
+        return result.scalars().first()
 
     @staticmethod
-    def update_user(db: Session, user: User, user_update: dict) -> User:
+    async def update_user(db: AsyncSession, user: User, user_update: dict) -> User:
         for key, value in user_update.items():
             setattr(user, key, value)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         return user
 
     @staticmethod
-    def delete_user(db: Session, user: User) -> bool:
-        db.delete(user)
-        db.commit()
+    async def delete_user(db: AsyncSession, user: User) -> bool:
+        await db.delete(user)
+        await db.commit()
         return True
@@ -0,0 +1,309 @@
+import asyncio
+import fcntl
+import itertools
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.config.config import Config
+from app.utils.feature_utils import Feature
+from app.utils.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+admission_rejections = counter(
+    "admission_rejections_total", "Request yang ditolak karena antrean model penuh", ("feature",)
+)
+admission_queued = counter(
+    "admission_queued_total", "Request yang harus mengantre sebelum memanggil model", ("feature",)
+)
+
+
+class AdmissionQueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Antrean permintaan ke model sedang penuh, silakan coba lagi.")
+        self.retry_after = retry_after
+
+
+class AdmissionBackend:
+    """
+    Penghitung slot panggilan model. Implementasi bersama (lintas proses) cukup
+    menyediakan operasi atomik try_acquire/release yang sama. Keduanya async agar
+    implementasi yang memakai I/O tidak menahan event loop.
+    """
+
+    def __init__(self, max_concurrent: int, max_per_user: int):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+
+    async def try_acquire(self, user_id: int) -> bool:
+        raise NotImplementedError
+
+    async def release(self, user_id: int):
+        raise NotImplementedError
+
+
+class InProcessBackend(AdmissionBackend):
+    """
+    Slot dihitung di memori worker ini saja.
+    """
+
+    def __init__(self, max_concurrent: int, max_per_user: int):
+        super().__init__(max_concurrent, max_per_user)
+        self._active = 0
+        self._per_user: Dict[int, int] = {}
+
+    async def try_acquire(self, user_id: int) -> bool:
+        if self._active >= self.max_concurrent:
+            return False
+        if self._per_user.get(user_id, 0) >= self.max_per_user:
+            return False
+        self._active += 1
+        self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+        return True
+
+    async def release(self, user_id: int):
+        self._active = max(0, self._active - 1)
+        remaining = self._per_user.get(user_id, 0) - 1
+        if remaining > 0:
+            self._per_user[user_id] = remaining
+        else:
+            self._per_user.pop(user_id, None)
+
+
+class FileBackend(AdmissionBackend):
+    """
+    Pengganti lokal untuk penyimpanan slot bersama (misalnya Redis): slot semua worker
+    di satu mesin disimpan dalam satu file JSON yang dikunci dengan flock.
+    Slot milik proses yang sudah mati dibersihkan otomatis. Penguncian dan baca/tulis
+    file dijalankan di thread, karena flock menunggu worker lain yang memegang kunci.
+    """
+
+    def __init__(self, max_concurrent: int, max_per_user: int, path: str):
+        super().__init__(max_concurrent, max_per_user)
+        self.path = path
+
+    def _update(self, change: Callable[[List[dict]], bool]) -> bool:
+        with open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                slots = json.loads(raw) if raw else []
+                slots = [slot for slot in slots if _process_alive(slot["pid"])]
+                result = change(slots)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(slots))
+                f.flush()
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    async def try_acquire(self, user_id: int) -> bool:
+        def change(slots: List[dict]) -> bool:
+            if len(slots) >= self.max_concurrent:
+                return False
+            if sum(1 for slot in slots if slot["user_id"] == user_id) >= self.max_per_user:
+                return False
+            slots.append({"user_id": user_id, "pid": os.getpid(), "acquired_at": time.time()})
+            return True
+
+        return await asyncio.to_thread(self._update, change)
+
+    async def release(self, user_id: int):
+        pid = os.getpid()
+
+        def change(slots: List[dict]) -> bool:
+            for index, slot in enumerate(slots):
+                if slot["user_id"] == user_id and slot["pid"] == pid:
+                    del slots[index]
+                    return True
+            return False
+
+        await asyncio.to_thread(self._update, change)
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+class AdmissionReservation:
+    """
+    Posisi antrean yang dipesan saat request diterima route. Reservasi dipakai oleh
+    `acquire` (posisinya digantikan waiter atau slot), atau dilepas jika giliran
+    selesai tanpa memanggil model (misalnya jawaban dari cache).
+    """
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self.active = True
+
+    def release(self):
+        if self.active:
+            self.active = False
+            self._controller._reserved -= 1
+
+
+class _Waiter:
+    def __init__(self, user_id: int, feature: Feature, start: float, finish: float, seq: int):
+        self.user_id = user_id
+        self.feature = feature
+        self.start = start
+        self.finish = finish
+        self.seq = seq
+        self.granted = False
+        self.event = asyncio.Event()
+
+
+class AdmissionController:
+    """
+    Membatasi jumlah stream model yang berjalan (global dan per user) dengan antrean adil.
+
+    Antrean memakai weighted fair queuing: setiap permintaan mendapat tag selesai
+    virtual `start + 1 / bobot_fitur`, dengan `start` tidak lebih kecil dari tag user
+    itu sebelumnya. Slot yang kosong diberikan ke tag terkecil, sehingga user yang
+    mengirim banyak permintaan besar tidak menghabiskan giliran user lain, dan fitur
+    dengan bobot lebih tinggi (misalnya CS Chatbot) lebih cepat dilayani.
+    """
+
+    def __init__(self, backend: AdmissionBackend, max_queue: int, weights: Dict[str, float]):
+        self.backend = backend
+        self.max_queue = max_queue
+        self.weights = weights
+        self._waiters: List[_Waiter] = []
+        self._reserved = 0
+        self._user_finish: Dict[int, float] = {}
+        self._vclock = 0.0
+        self._seq = itertools.count()
+
+    def check_capacity(self, feature: Feature = Feature.GENERAL) -> AdmissionReservation:
+        """
+        Menolak permintaan baru lebih awal jika antrean sudah penuh, dan memesan satu
+        posisi antrean untuk request yang diterima. Reservasi diserahkan ke `acquire`,
+        sehingga request yang sudah dijawab 200 tidak ditolak lagi di tengah stream.
+
+        Returns:
+            AdmissionReservation: Reservasi yang harus dipakai `acquire` atau dilepas.
+
+        Raises:
+            AdmissionQueueFull: Jika antrean penuh.
+        """
+        if len(self._waiters) + self._reserved >= self.max_queue:
+            admission_rejections.inc(feature=feature.value)
+            raise AdmissionQueueFull(Config.ADMISSION_RETRY_AFTER)
+        self._reserved += 1
+        return AdmissionReservation(self)
+
+    def _position(self, waiter: _Waiter) -> int:
+        return 1 + sum(
+            1 for other in self._waiters if (other.finish, other.seq) < (waiter.finish, waiter.seq)
+        )
+
+    async def _dispatch(self):
+        for waiter in sorted(self._waiters, key=lambda w: (w.finish, w.seq)):
+            # Daftar waiter dapat berubah selama menunggu backend
+            if waiter.granted or waiter not in self._waiters:
+                continue
+            if not await self.backend.try_acquire(waiter.user_id):
+                continue
+            if waiter not in self._waiters:
+                # Waiter dibatalkan selama slot diambil
+                await self.backend.release(waiter.user_id)
+                continue
+            self._waiters.remove(waiter)
+            self._vclock = max(self._vclock, waiter.start)
+            waiter.granted = True
+            waiter.event.set()
+
+    async def acquire(
+        self,
+        user_id: int,
+        feature: Feature = Feature.GENERAL,
+        on_position: Optional[Callable[[int], Awaitable]] = None,
+        reservation: Optional[AdmissionReservation] = None,
+    ):
+        """
+        Menunggu slot model. Kapasitas antrean tidak diperiksa lagi di sini: request
+        dari route sudah memesan posisi lewat `check_capacity`, dan panggilan lain
+        (batch review, job) berasal dari pekerjaan yang sudah diterima.
+        """
+        if reservation is not None:
+            # Posisi yang dipesan digantikan oleh slot atau waiter di bawah
+            reservation.release()
+        if not self._waiters and await self.backend.try_acquire(user_id):
+            return
+
+        admission_queued.inc(feature=feature.value)
+        cost = 1 / self.weights.get(feature.value, 1.0)
+        start = max(self._user_finish.get(user_id, 0.0), self._vclock)
+        waiter = _Waiter(user_id, feature, start, start + cost, next(self._seq))
+        self._user_finish[user_id] = waiter.finish
+        self._waiters.append(waiter)
+
+        last_position = None
+        try:
+            while True:
+                await self._dispatch()
+                if waiter.granted:
+                    return
+                position = self._position(waiter)
+                if on_position is not None and position != last_position:
+                    await on_position(position)
+                    last_position = position
+                waiter.event.clear()
+                try:
+                    # Slot dari worker lain tidak memicu event, jadi backend dicek berkala
+                    async with asyncio.timeout(Config.ADMISSION_POLL_INTERVAL):
+                        await waiter.event.wait()
+                except TimeoutError:
+                    pass
+        except BaseException:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if waiter.granted:
+                await asyncio.shield(self.release(user_id))
+            raise
+
+    async def release(self, user_id: int):
+        await self.backend.release(user_id)
+        await self._dispatch()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        user_id: int,
+        feature: Feature = Feature.GENERAL,
+        on_position: Optional[Callable[[int], Awaitable]] = None,
+        reservation: Optional[AdmissionReservation] = None,
+    ):
+        await self.acquire(user_id, feature, on_position, reservation)
+        try:
+            yield
+        finally:
+            # Slot tetap dikembalikan walaupun task dibatalkan lagi saat melepasnya
+            await asyncio.shield(self.release(user_id))
+
+
+def _build_backend() -> AdmissionBackend:
+    if Config.ADMISSION_BACKEND == "file":
+        return FileBackend(
+            Config.ADMISSION_MAX_CONCURRENT,
+            Config.ADMISSION_MAX_PER_USER,
+            Config.ADMISSION_FILE_PATH,
+        )
+    return InProcessBackend(Config.ADMISSION_MAX_CONCURRENT, Config.ADMISSION_MAX_PER_USER)
+
+
+admission = AdmissionController(
+    _build_backend(), Config.ADMISSION_MAX_QUEUE, Config.ADMISSION_FEATURE_WEIGHTS
+)
@@ -0,0 +1,72 @@
+import logging
+from typing import Optional
+
+import httpx
+from anthropic import AsyncAnthropic
+
+from app.config.config import Config
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[AsyncAnthropic] = None
+
+
+def _build_client() -> AsyncAnthropic:
+    timeout = httpx.Timeout(
+        Config.ANTHROPIC_TIMEOUT,
+        connect=Config.ANTHROPIC_CONNECT_TIMEOUT,
+        read=Config.ANTHROPIC_READ_TIMEOUT,
+    )
+    http_client = httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=Config.ANTHROPIC_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.ANTHROPIC_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=Config.ANTHROPIC_KEEPALIVE_EXPIRY,
+        ),
+        follow_redirects=True,
+    )
+    return AsyncAnthropic(
+        api_key=Config.CLAUDE_API_KEY,
+        http_client=http_client,
+        timeout=timeout,
+        max_retries=Config.ANTHROPIC_MAX_RETRIES,
+    )
+
+
+async def init_client() -> AsyncAnthropic:
+    """
+    Membuat client Claude API yang dipakai bersama oleh seluruh request dalam satu worker.
+    Dipanggil sekali dari lifespan aplikasi.
+    """
+    global _client
+    if _client is None:
+        _client = _build_client()
+        logger.info(
+            "Anthropic client initialized "
+            f"(max_connections={Config.ANTHROPIC_MAX_CONNECTIONS}, "
+            f"keepalive={Config.ANTHROPIC_MAX_KEEPALIVE_CONNECTIONS})"
+        )
+    return _client
+
+
+def get_client() -> AsyncAnthropic:
+    """
+    Mengembalikan client bersama. Jika lifespan belum berjalan (misalnya dari script),
+    client dibuat saat pertama kali dibutuhkan.
+    """
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
+
+
+async def close_client():
+    """
+    Menutup connection pool client bersama saat aplikasi berhenti.
+    """
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+        logger.info("Anthropic client closed")
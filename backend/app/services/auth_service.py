@@ -4,7 +4,7 @@ from typing import Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config.config import Config
 import bcrypt
@@ -58,12 +58,12 @@ def verify_password(plain_password, hashed_password):
         logger.error(f"Error during password verification: {e}")
 
 
-async def login(db: Session, username: str, password: str) -> Optional[models.User]:
+async def login(db: AsyncSession, username: str, password: str) -> Optional[models.User]:
     """
     Mengautentikasi pengguna berdasarkan username dan password.
 
     Args:
-        db (Session): Sesi repositories SQLAlchemy.
+        db (AsyncSession): Sesi repositories SQLAlchemy.
         username (str): Username pengguna.
         password (str): Password pengguna.
 
@@ -15,14 +15,14 @@ operasi non-blocking.
 import asyncio
 import json
 import logging
+import os
 import traceback
 from typing import Dict, Any
 from typing import List, Optional
 from uuid import UUID
 
-from anthropic import AsyncAnthropic
 from fastapi import UploadFile, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import StreamingResponse
 
 from app.config.config import Config
@@ -31,8 +31,11 @@ from app.models import models
 from app.repositories.chat_manager import ChatManager
 from app.repositories.context_manager import context_manager
 from app.repositories.knowledge_base_manager import KnowledgeManager
+from app.services.llm_backend import get_backend
 from app.utils.feature_utils import Feature
 from app.utils.file_utils import save_uploaded_file
+from app.utils.pagination_utils import decode_cursor, encode_cursor
+from app.utils.timing_utils import span
 from app.repositories.prompt_logs_manager import prompt_logs_manager
 
 logger = logging.getLogger(__name__)
@@ -47,38 +50,72 @@ chat_manager = ChatManager()
 kb = KnowledgeManager()
 
 
-async def get_user_chats(db: Session, user_id: int, feature: Feature = Feature.GENERAL) -> List[Dict[str, Any]]:
+async def get_user_chats(
+    db: AsyncSession,
+    user_id: int,
+    feature: Feature = Feature.GENERAL,
+    limit: int = Config.CHATS_PAGE_SIZE,
+    before: Optional[str] = None,
+) -> Dict[str, Any]:
     """
-    Mengambil daftar chat untuk pengguna tertentu.
+    Mengambil satu halaman daftar chat untuk pengguna tertentu, dari yang terbaru.
 
     Args:
-        feature:
-        db (Session): Sesi repositories SQLAlchemy.
+        db (AsyncSession): Sesi repositories SQLAlchemy.
         user_id (int): ID pengguna.
+        feature (Feature): Fitur chat.
+        limit (int): Jumlah chat per halaman.
+        before (Optional[str]): Cursor `next_cursor` dari halaman sebelumnya.
 
     Returns:
-        List[models.Chat]: Daftar objek Chat milik pengguna.
+        Dict: chats (termasuk message_count, last_message_at dan preview pesan terakhir)
+            dan next_cursor (None jika tidak ada chat yang lebih lama).
 
     Raises:
-        HTTPException: Jika terjadi kesalahan server internal saat mengambil daftar chat.
+        HTTPException: 400 jika cursor tidak valid, 500 jika terjadi kesalahan server
+            internal saat mengambil daftar chat.
     """
     try:
-        chats = chat_manager.get_user_chats(db, user_id, feature)
-        return [
-            {
-                "chat_id": str(chat.id),
-                "title": chat.title,
-                "created_at": chat.created_at.isoformat(),
-                "user_id": str(chat.user_id),
-            }
-            for chat in chats
-        ]
+        before_key = decode_cursor(before) if before else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    preview_chars = Config.CHAT_PREVIEW_CHARS
+    try:
+        with span("get_user_chats", user_id=user_id):
+            chats, has_more = await chat_manager.get_user_chats_page(
+                db, user_id, feature, limit, preview_chars, before_key
+            )
     except Exception as e:
         logger.error(f"Error getting user chats: {str(e)}")
         raise HTTPException(
             status_code=500, detail="Internal server error while fetching user chats"
         )
 
+    next_cursor = None
+    if has_more and chats:
+        next_cursor = encode_cursor(chats[-1]["created_at"], chats[-1]["id"])
+
+    items = []
+    for chat in chats:
+        preview = chat["preview"]
+        if preview is not None and len(preview) > preview_chars:
+            preview = preview[:preview_chars].rstrip() + "…"
+        last_message_at = chat["last_message_at"]
+        items.append(
+            {
+                "chat_id": str(chat["id"]),
+                "title": chat["title"],
+                "created_at": chat["created_at"].isoformat(),
+                "user_id": str(chat["user_id"]),
+                "message_count": chat["message_count"] or 0,
+                "last_message_at": last_message_at.isoformat() if last_message_at else None,
+                "last_message_is_user": chat["last_message_is_user"],
+                "preview": preview,
+            }
+        )
+    return {"chats": items, "next_cursor": next_cursor}
+
 
 async def is_first_message(chat_id: UUID) -> bool:
     """
@@ -130,7 +167,7 @@ def get_system_prompt(feature: Feature) -> str:
 
 
 async def process_chat_message(
-    db: Session,
+    db: AsyncSession,
     user_id: int,
     chat_id: UUID,
     message: str,
@@ -152,31 +189,31 @@ async def process_chat_message(
                 title = message[:50] + "..." if len(message) > 50 else message
                 await update_chat_title(db, chat_id, title)
 
-            chat_history = chat_manager.get_chat_messages(db, chat_id)
+            chat_history = await chat_manager.get_chat_messages(db, chat_id)
             if chat_history and chat_history[-1]["is_user"]:
                 placeholder_response = "I'm processing your previous message."
-                chat_manager.add_message(
+                await chat_manager.add_message(
                     db, chat_id, placeholder_response, is_user=False
                 )
 
-            kb_results = kb.search_items(db, message)
+            kb_results = await kb.search_items(db, message)
             if kb_results:
                 kb_response = kb_results[0]
                 response = f"{kb_response.get('answer', '')}"
                 if kb_response.get("image_path"):
                     response += f"\n {kb_response['image_path']}"
-                chat_manager.add_message(db, chat_id, response, is_user=False)
+                await chat_manager.add_message(db, chat_id, response, is_user=False)
                 yield f"data: {json.dumps({'type': 'message', 'content': response})}\n\n"
                 yield f"data: {json.dumps({'type': 'done'})}\n\n"
                 return
 
-            chat_manager.add_message(db, chat_id, message, is_user=True)
+            await chat_manager.add_message(db, chat_id, message, is_user=True)
 
             # Menambahkan informasi file ke pesan chat
             if file_contents:
                 for file in file_contents:
                     file_info = f"File attached: {file['name']}"
-                    chat_manager.add_message(db, chat_id, file_info, is_user=True)
+                    await chat_manager.add_message(db, chat_id, file_info, is_user=True)
 
             bot_response = ""
             async for chunk in chat_with_retry_stream(
@@ -186,7 +223,7 @@ async def process_chat_message(
                 yield f"data: {json.dumps({'type': 'message', 'content': chunk})}\n\n"
 
             if bot_response:
-                chat_manager.add_message(db, chat_id, bot_response, is_user=False)
+                await chat_manager.add_message(db, chat_id, bot_response, is_user=False)
 
             yield f"data: {json.dumps({'type': 'done'})}\n\n"
 
@@ -234,7 +271,7 @@ async def chat_with_retry_stream(
 
             db = SessionLocal()
             try:
-                knowledge_base_items = kb.get_all_items(db)
+                knowledge_base_items = await kb.get_all_items(db)
                 logger.info(
                     f"Retrieved {len(knowledge_base_items)} items from knowledge base"
                 )
@@ -251,7 +288,7 @@ async def chat_with_retry_stream(
                     + f"\n\nInformasi tambahan:\n\n{knowledge_str}"
                 )
 
-                context = context_manager.get_latest_context(db, user_id)
+                context = await context_manager.get_latest_context(db, user_id)
                 logger.info(f"Fetching context for user_id: {user_id}")
                 logger.info(f"DB session: {db}")
                 if context:
@@ -281,26 +318,28 @@ async def chat_with_retry_stream(
 
                 messages = prepare_messages(chat_history, message, file_contents)
 
-                async with AsyncAnthropic(api_key=CLAUDE_API_KEY) as client:
-                    stream = await client.messages.create(
-                        model=MODEL_NAME,
-                        messages=messages,
-                        system=system_message,
-                        max_tokens=1000,
-                        temperature=0,
-                        stream=True,
-                    )
-
-                    async for chunk in stream:
-                        if chunk.type == "content_block_delta":
-                            yield chunk.delta.text
+                events = get_backend().stream(
+                    model=MODEL_NAME,
+                    messages=messages,
+                    system=system_message,
+                    max_tokens=1000,
+                    temperature=0,
+                )
+
+                try:
+                    async for event in events:
+                        if event.type == "text":
+                            yield event.text
+                finally:
+                    # Kembalikan koneksi ke pool walaupun stream berhenti di tengah jalan
+                    await events.aclose()
                 logger.info(
                     f"Finished processing stream response for user {user_id}, chat {chat_id}"
                 )
-                prompt_logs_manager.add_prompt_logs(db, user_id, str(messages), system_message)
+                await prompt_logs_manager.add_prompt_logs(db, user_id, str(messages), system_message)
                 return
             finally:
-                db.close()  # Pastikan untuk menutup session repositories
+                await db.close()  # Pastikan untuk menutup session repositories
 
         except Exception as e:
             logger.error(
@@ -372,9 +411,10 @@ async def get_chat_messages(chat_id: UUID) -> List[dict]:
     Raises:
         HTTPException: Jika terjadi kesalahan server internal saat mengambil pesan chat.
     """
-    db = SessionLocal()
     try:
-        return chat_manager.get_chat_messages(db, chat_id)
+        async with SessionLocal() as db:
+            with span("get_chat_messages", chat_id=chat_id):
+                return await chat_manager.get_chat_messages(db, chat_id)
     except Exception as e:
         logger.error(f"Error getting chat messages: {str(e)}")
         raise HTTPException(
@@ -382,13 +422,92 @@ async def get_chat_messages(chat_id: UUID) -> List[dict]:
         )
 
 
-async def create_new_chat(db: Session, user_id: int, feature: Feature = Feature.GENERAL) -> dict:
+async def get_chat_messages_page(
+    db: AsyncSession,
+    user_id: int,
+    chat_id: UUID,
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Mengambil satu halaman riwayat chat milik user. Tanpa cursor yang diambil adalah
+    halaman terbaru; `before` memuat pesan yang lebih lama dan `after` yang lebih baru.
+
+    Returns:
+        Dict: messages (urut dari yang terlama), older_cursor dan newer_cursor
+            (None jika tidak ada halaman ke arah tersebut).
+
+    Raises:
+        HTTPException: 400 jika cursor tidak valid, 404 jika chat tidak ditemukan.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
+    try:
+        before_key = decode_cursor(before) if before else None
+        after_key = decode_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    chat = await chat_manager.get_chat(db, chat_id)
+    if not chat or chat.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Chat not found")
+
+    with span("get_chat_messages", chat_id=chat_id):
+        messages, has_more = await chat_manager.get_messages_page(
+            db, chat_id, limit, before_key, after_key
+        )
+
+    # Lokasi file di server tidak dikirim ke client; lampiran diunduh lewat ID-nya
+    for message in messages:
+        if message["file_id"]:
+            message["file_url"] = f"/chat/{chat_id}/files/{message['file_id']}"
+
+    # Halaman `after` selalu punya pesan yang lebih lama (pesan cursor itu sendiri),
+    # dan halaman `before` selalu punya pesan yang lebih baru
+    if after_key is None:
+        has_older, has_newer = has_more, before_key is not None
+    else:
+        has_older, has_newer = True, has_more
+
+    older_cursor = newer_cursor = None
+    if messages:
+        first, last = messages[0], messages[-1]
+        if has_older:
+            older_cursor = encode_cursor(first["created_at"], first["id"])
+        if has_newer:
+            newer_cursor = encode_cursor(last["created_at"], last["id"])
+    return {
+        "chat_id": str(chat_id),
+        "messages": messages,
+        "older_cursor": older_cursor,
+        "newer_cursor": newer_cursor,
+    }
+
+
+async def get_chat_file(db: AsyncSession, user_id: int, chat_id: UUID, file_id: UUID):
+    """
+    Mengambil lampiran chat milik user.
+
+    Raises:
+        HTTPException: 404 jika chat atau file tidak ditemukan.
+    """
+    chat = await chat_manager.get_chat(db, chat_id)
+    if not chat or chat.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Chat not found")
+    chat_file = await chat_manager.get_chat_file(db, chat_id, file_id)
+    if not chat_file or not os.path.exists(chat_file.file_path):
+        raise HTTPException(status_code=404, detail="File not found")
+    return chat_file
+
+
+async def create_new_chat(db: AsyncSession, user_id: int, feature: Feature = Feature.GENERAL) -> dict:
     """
     Membuat chat baru untuk pengguna tertentu.
 
     Args:
         feature:
-        db (Session): Sesi repositories SQLAlchemy.
+        db (AsyncSession): Sesi repositories SQLAlchemy.
         user_id (int): ID pengguna yang membuat chat.
 
     Returns:
@@ -398,7 +517,7 @@ async def create_new_chat(db: Session, user_id: int, feature: Feature = Feature.
         HTTPException: Jika terjadi kesalahan server internal saat membuat chat baru.
     """
     try:
-        new_chat = chat_manager.create_chat(db, user_id, feature)
+        new_chat = await chat_manager.create_chat(db, user_id, feature)
         return {
             "id": str(new_chat.id),
             "title": new_chat.title,
@@ -412,13 +531,13 @@ async def create_new_chat(db: Session, user_id: int, feature: Feature = Feature.
 
 
 async def add_knowledge_base_item(
-    db: Session, question: str, answer: str, image: Optional[UploadFile] = None
+    db: AsyncSession, question: str, answer: str, image: Optional[UploadFile] = None
 ) -> dict:
     """
     Menambahkan item baru ke knowledge base.
 
     Args:
-        db (Session): Sesi repositories SQLAlchemy.
+        db (AsyncSession): Sesi repositories SQLAlchemy.
         question (str): Pertanyaan untuk item knowledge base.
         answer (str): Jawaban untuk item knowledge base.
         image (Optional[UploadFile]): File gambar yang diunggah, jika ada.
@@ -434,7 +553,7 @@ async def add_knowledge_base_item(
         if image:
             image_path = await save_uploaded_file(image)
 
-        return kb.add_item(db, question, answer, image_path)
+        return await kb.add_item(db, question, answer, image_path)
     except Exception as e:
         logger.error(f"Error adding knowledge base item: {str(e)}")
         raise HTTPException(
@@ -443,12 +562,12 @@ async def add_knowledge_base_item(
         )
 
 
-async def update_chat_title(db: Session, chat_id: UUID, title: str) -> bool:
+async def update_chat_title(db: AsyncSession, chat_id: UUID, title: str) -> bool:
     """
     Memperbarui judul chat.
 
     Args:
-        db (Session): Sesi repositories SQLAlchemy.
+        db (AsyncSession): Sesi repositories SQLAlchemy.
         chat_id (int): ID chat yang akan diperbarui.
         title (str): Judul baru untuk chat.
 
@@ -459,7 +578,7 @@ async def update_chat_title(db: Session, chat_id: UUID, title: str) -> bool:
         HTTPException: Jika terjadi kesalahan server internal saat memperbarui judul chat.
     """
     try:
-        return chat_manager.update_chat_title(db, chat_id, title)
+        return await chat_manager.update_chat_title(db, chat_id, title)
     except Exception as e:
         logger.error(f"Error updating chat title: {str(e)}")
         raise HTTPException(
@@ -467,12 +586,12 @@ async def update_chat_title(db: Session, chat_id: UUID, title: str) -> bool:
         )
 
 
-async def delete_chat(db: Session, chat_id: UUID, user_id: int):
+async def delete_chat(db: AsyncSession, chat_id: UUID, user_id: int):
     """
     Menghapus chat berdasarkan ID.
 
     Args:
-        db (Session): Sesi repositories SQLAlchemy.
+        db (AsyncSession): Sesi repositories SQLAlchemy.
         chat_id (int): ID chat yang akan dihapus.
 
     Returns:
@@ -481,7 +600,7 @@ async def delete_chat(db: Session, chat_id: UUID, user_id: int):
     # Panggil fungsi di chat_manager untuk menghapus chat
     try:
         # Panggilan ke chat_manager.delete_chat dengan argumen yang benar
-        success = chat_manager.delete_chat(db, chat_id, user_id)
+        success = await chat_manager.delete_chat(db, chat_id, user_id)
         if not success:
             raise HTTPException(
                 status_code=404,
@@ -494,12 +613,12 @@ async def delete_chat(db: Session, chat_id: UUID, user_id: int):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-async def get_latest_chat_id(db: Session, user_id: int) -> Optional[UUID]:
+async def get_latest_chat_id(db: AsyncSession, user_id: int) -> Optional[UUID]:
     """
     Mendapatkan ID chat terbaru untuk pengguna tertentu.
 
     Args:
-        db (Session): Sesi repositories SQLAlchemy.
+        db (AsyncSession): Sesi repositories SQLAlchemy.
         user_id (int): ID pengguna.
 
     Returns:
@@ -509,7 +628,7 @@ async def get_latest_chat_id(db: Session, user_id: int) -> Optional[UUID]:
         HTTPException: Jika terjadi kesalahan server internal saat mengambil ID chat terbaru.
     """
     try:
-        return chat_manager.get_latest_chat_id(db, user_id)
+        return await chat_manager.get_latest_chat_id(db, user_id)
     except Exception as e:
         logger.error(f"Error getting latest chat ID: {str(e)}")
         raise HTTPException(
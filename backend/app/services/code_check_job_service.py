@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import os
+import re
+import uuid
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.config import Config
+from app.config.database import SessionLocal
+from app.repositories.code_check_job_manager import code_check_job_manager
+from app.repositories.prompt_logs_manager import prompt_logs_manager
+from app.services import code_review_service, prompt_service, response_cache_service
+from app.services.model_router import model_router
+from app.services.token_budget_service import fit_attachments
+from app.utils.feature_utils import Feature
+from app.utils.file_utils import read_zip_contents
+
+logger = logging.getLogger(__name__)
+
+# Prompt map untuk job: temuan ditulis per file agar dapat disimpan per file
+JOB_MAP_PROMPT = (
+    "Review file-file berikut (batch {index} dari {total}) terhadap rules di atas. "
+    "Untuk setiap file yang melanggar rules, awali temuannya dengan satu baris "
+    "`### FILE: <nama file>` lalu tuliskan pelanggaran dan perbaikan kode yang seharusnya. "
+    "Lewati file yang sudah sesuai. Tulis temuan secara ringkas tanpa pembuka atau penutup."
+    "\n\nPermintaan user: {message}"
+)
+
+FILE_HEADING = re.compile(r"^### FILE:\s*(.+?)\s*$", re.MULTILINE)
+
+_workers: List[asyncio.Task] = []
+_wakeup: Optional[asyncio.Event] = None
+
+
+def split_findings(text: str, file_names: List[str]) -> Dict[Optional[str], str]:
+    """
+    Memecah temuan satu batch menjadi temuan per file berdasarkan baris `### FILE:`.
+    Teks di luar bagian file yang dikenal disimpan dengan nama file None.
+    """
+    findings: Dict[Optional[str], str] = {}
+    matches = list(FILE_HEADING.finditer(text))
+    preamble = text[: matches[0].start()] if matches else text
+    if preamble.strip():
+        findings[None] = preamble.strip()
+    for position, match in enumerate(matches):
+        end = matches[position + 1].start() if position + 1 < len(matches) else len(text)
+        name = match.group(1).strip("` ")
+        section = text[match.end():end].strip()
+        key = name if name in file_names else None
+        if key is None:
+            section = f"{match.group(0).strip()}\n{section}"
+        findings[key] = f"{findings[key]}\n\n{section}" if key in findings else section
+    return findings
+
+
+async def submit_job(
+    db: AsyncSession, user_id: int, feature: Feature, message: str, file: UploadFile
+) -> Dict:
+    """
+    Menyimpan zip ke CODE_CHECK_JOB_DIR dan membuat job code check berstatus queued.
+    Job diproses oleh worker background; status dan hasil dibaca lewat endpoint GET.
+
+    Raises:
+        HTTPException: Jika fitur bukan fitur code check atau file bukan zip.
+    """
+    if feature not in code_review_service.CODE_REVIEW_FEATURES:
+        raise HTTPException(status_code=400, detail=f"Feature {feature.value} tidak mendukung job code check")
+    if not file.filename or not file.filename.endswith(".zip"):
+        raise HTTPException(status_code=400, detail="File harus berupa zip")
+
+    job_id = uuid.uuid4()
+    os.makedirs(Config.CODE_CHECK_JOB_DIR, exist_ok=True)
+    file_path = os.path.join(Config.CODE_CHECK_JOB_DIR, f"{job_id}.zip")
+    with open(file_path, "wb") as f:
+        f.write(await file.read())
+
+    job = await code_check_job_manager.create_job(db, job_id, user_id, feature, message or "", file_path)
+    if _wakeup is not None:
+        _wakeup.set()
+    logger.info(f"Queued code check job {job.id} for user {user_id} ({feature.value})")
+    return job_status(job)
+
+
+def job_status(job) -> Dict:
+    return {
+        "id": str(job.id),
+        "feature": job.feature,
+        "status": job.status,
+        "total_files": job.total_files,
+        "total_batches": job.total_batches,
+        "completed_batches": job.completed_batches,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+async def get_job_status(db: AsyncSession, user_id: int, job_id: UUID) -> Dict:
+    job = await code_check_job_manager.get_job(db, job_id, user_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_status(job)
+
+
+async def get_job_results(db: AsyncSession, user_id: int, job_id: UUID) -> Dict:
+    """
+    Mengembalikan ringkasan dan temuan per file. Temuan batch yang sudah selesai
+    sudah tersedia selama job masih berjalan; ringkasan baru ada setelah selesai.
+    """
+    job = await code_check_job_manager.get_job(db, job_id, user_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    findings = await code_check_job_manager.get_findings(db, job_id)
+    return {
+        **job_status(job),
+        "summary": job.summary,
+        "findings": [
+            {
+                "batch_index": finding.batch_index,
+                "file_name": finding.file_name,
+                "findings": finding.findings,
+            }
+            for finding in findings
+        ],
+    }
+
+
+def remove_job_file(file_path: Optional[str]):
+    """
+    Menghapus zip job yang sudah selesai; file tidak dipakai lagi setelah status final.
+    """
+    if not file_path:
+        return
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+async def process_job(job_id: UUID):
+    """
+    Menjalankan review map-reduce untuk satu job dan menyimpan temuan setiap batch
+    begitu selesai. Prompt system dan rules sama dengan review lewat chat.
+    Zip job dihapus setelah job completed atau failed.
+    """
+    db = SessionLocal()
+    file_path = None
+    try:
+        job = await code_check_job_manager.get_job(db, job_id)
+        file_path = job.file_path
+        user_id, feature, message = job.user_id, Feature(job.feature), job.message
+
+        file_contents = await asyncio.to_thread(read_zip_contents, job.file_path)
+        file_contents, notices, _ = await asyncio.to_thread(
+            fit_attachments, file_contents, Config.CODE_REVIEW_MAX_TOKENS, Config.CODE_REVIEW_BATCH_TOKENS
+        )
+        if not file_contents:
+            raise ValueError("Zip tidak berisi file yang dapat direview")
+
+        system_blocks = await prompt_service.build_system_blocks(db, user_id, feature)
+        batches = code_review_service.make_batches(file_contents, Config.CODE_REVIEW_BATCH_TOKENS)
+        await code_check_job_manager.set_batches(db, job_id, len(file_contents), len(batches))
+        route = model_router.select(feature, Config.CODE_REVIEW_BATCH_TOKENS, len(file_contents))
+
+        async def on_batch(index: int, findings: str, ok: bool, completed: int):
+            file_names = [f["name"] for f in batches[index - 1]]
+            await code_check_job_manager.add_batch_findings(
+                db, job_id, index, split_findings(findings, file_names), completed
+            )
+
+        results = await code_review_service.review_batches(
+            user_id, feature, route, system_blocks, message, batches, on_batch, JOB_MAP_PROMPT
+        )
+
+        system_message = prompt_service.system_text(system_blocks)
+        messages = code_review_service.reduce_messages(results, message)
+        await prompt_logs_manager.add_prompt_logs(db, user_id, str(messages), system_message)
+        response_key = response_cache_service.cache_key(route.model, feature, system_blocks, messages)
+        summary_parts = [
+            text
+            async for text in prompt_service.stream_with_retries(
+                user_id, job_id, feature, route, system_blocks, system_message, messages, response_key
+            )
+        ]
+        summary = "".join(summary_parts)
+        if notices:
+            summary = "\n".join(f"> {notice}" for notice in notices) + "\n\n" + summary
+        await code_check_job_manager.finish_job(db, job_id, "completed", summary=summary)
+        remove_job_file(file_path)
+        logger.info(f"Code check job {job_id} completed ({len(batches)} batches)")
+    except asyncio.CancelledError:
+        # Worker dihentikan: job tetap running dan diambil ulang setelah dianggap stale
+        raise
+    except Exception as e:
+        logger.error(f"Code check job {job_id} failed: {str(e)}", exc_info=True)
+        await db.rollback()
+        await code_check_job_manager.finish_job(db, job_id, "failed", error=str(e))
+        remove_job_file(file_path)
+    finally:
+        await db.close()
+
+
+async def worker_loop(worker_id: int):
+    """
+    Mengambil job dari tabel code_check_jobs satu per satu. Worker di semua proses
+    berbagi antrean yang sama lewat FOR UPDATE SKIP LOCKED.
+    """
+    while True:
+        try:
+            async with SessionLocal() as db:
+                job = await code_check_job_manager.claim_next_job(db, Config.CODE_CHECK_JOB_STALE_AFTER)
+                job_id = job.id if job is not None else None
+
+            if job_id is None:
+                _wakeup.clear()
+                try:
+                    async with asyncio.timeout(Config.CODE_CHECK_JOB_POLL_INTERVAL):
+                        await _wakeup.wait()
+                except TimeoutError:
+                    pass
+                continue
+
+            logger.info(f"Worker {worker_id} processing code check job {job_id}")
+            await process_job(job_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Code check worker {worker_id} error: {str(e)}", exc_info=True)
+            await asyncio.sleep(Config.CODE_CHECK_JOB_POLL_INTERVAL)
+
+
+def start_workers():
+    global _wakeup
+    _wakeup = asyncio.Event()
+    for worker_id in range(Config.CODE_CHECK_JOB_WORKERS):
+        _workers.append(asyncio.create_task(worker_loop(worker_id)))
+
+
+async def stop_workers():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
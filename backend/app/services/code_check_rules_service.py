@@ -1,6 +1,6 @@
 import logging
 from typing import Dict, Any, List
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.repositories.code_check_rules_manager import CodeCheckRulesManager
 from app.utils.feature_utils import Feature
 
@@ -8,29 +8,29 @@ logger = logging.getLogger(__name__)
 code_rules_manager = CodeCheckRulesManager()
 
 async def add_rules(
-        db: Session,
+        db: AsyncSession,
         rules: str,
         feature: Feature
 ):
-    return code_rules_manager.add_rules(db, rules, feature)
+    return await code_rules_manager.add_rules(db, rules, feature)
 
 
-async def get_rules_by_type(db: Session, feature: Feature) -> Dict[str, Any]:
-    return code_rules_manager.get_rules_by_type(db, feature)
+async def get_rules_by_type(db: AsyncSession, feature: Feature) -> Dict[str, Any]:
+    return await code_rules_manager.get_rules_by_type(db, feature)
 
 
-async def get_rules(db: Session) -> List[Dict[str, Any]]:
-    return code_rules_manager.get_rules(db)
+async def get_rules(db: AsyncSession) -> List[Dict[str, Any]]:
+    return await code_rules_manager.get_rules(db)
 
 
-async def update_rules(db: Session, feature: Feature, rules: str) -> bool:
-    return code_rules_manager.update_rules(db, feature, rules)
+async def update_rules(db: AsyncSession, feature: Feature, rules: str) -> bool:
+    return await code_rules_manager.update_rules(db, feature, rules)
 
 
-async def delete_rules(db: Session, feature: Feature) -> bool:
-    return code_rules_manager.delete_rules(db, feature)
+async def delete_rules(db: AsyncSession, feature: Feature) -> bool:
+    return await code_rules_manager.delete_rules(db, feature)
 
-async def init_rules(db: Session) -> bool:
+async def init_rules(db: AsyncSession) -> bool:
     for feature in Feature:
         await add_rules(db, "", feature)
     return True
\ No newline at end of file
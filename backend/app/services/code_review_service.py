@@ -0,0 +1,257 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID
+
+from app.config.config import Config
+from app.config.database import SessionLocal
+from app.repositories.prompt_logs_manager import prompt_logs_manager
+from app.services import prompt_service, response_cache_service
+from app.services.admission_service import admission, AdmissionReservation
+from app.services.llm_backend import get_backend
+from app.services.model_router import ModelRoute, model_router
+from app.utils.feature_utils import Feature
+from app.utils.timing_utils import span
+from app.utils.token_utils import estimate_tokens, MESSAGE_OVERHEAD_TOKENS
+
+logger = logging.getLogger(__name__)
+
+CODE_REVIEW_FEATURES = (
+    Feature.CODE_CHECK_FRONTEND,
+    Feature.CODE_CHECK_BACKEND,
+    Feature.CODE_CHECK_APPS,
+)
+
+MAP_PROMPT = (
+    "Review file-file berikut (batch {index} dari {total}) terhadap rules di atas. "
+    "Untuk setiap file yang melanggar rules, sebutkan nama file, pelanggarannya, dan "
+    "perbaikan kode yang seharusnya. Lewati file yang sudah sesuai. Tulis temuan secara "
+    "ringkas tanpa pembuka atau penutup.\n\nPermintaan user: {message}"
+)
+
+REDUCE_PROMPT = (
+    "Berikut hasil review per batch dari sebuah project:\n\n{findings}\n\n"
+    "Gabungkan hasil tersebut menjadi satu laporan review yang utuh: kelompokkan temuan "
+    "per file, hilangkan duplikasi, dan akhiri dengan ringkasan prioritas perbaikan.\n\n"
+    "Permintaan user: {message}"
+)
+
+
+def is_map_reduce_feature(feature: Feature) -> bool:
+    return Config.CODE_REVIEW_MAP_REDUCE_ENABLED and feature in CODE_REVIEW_FEATURES
+
+
+def file_tokens(file: Dict[str, str]) -> int:
+    return estimate_tokens(file["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def needs_map_reduce(feature: Feature, file_contents: Optional[List[Dict[str, str]]]) -> bool:
+    """
+    Review dipecah jika fitur mendukung map-reduce dan total token lampiran melebihi
+    CODE_REVIEW_SINGLE_PASS_TOKENS.
+    """
+    if not file_contents or not is_map_reduce_feature(feature):
+        return False
+    return sum(file_tokens(file) for file in file_contents) > Config.CODE_REVIEW_SINGLE_PASS_TOKENS
+
+
+def make_batches(
+    file_contents: List[Dict[str, str]], batch_tokens: int
+) -> List[List[Dict[str, str]]]:
+    """
+    Mengelompokkan file menjadi batch dengan total token tidak melebihi `batch_tokens`.
+    File diurutkan berdasarkan path agar file dalam folder yang sama berada di batch yang sama.
+    """
+    batches: List[List[Dict[str, str]]] = []
+    current: List[Dict[str, str]] = []
+    used = 0
+    for file in sorted(file_contents, key=lambda f: f["name"]):
+        tokens = file_tokens(file)
+        if current and used + tokens > batch_tokens:
+            batches.append(current)
+            current, used = [], 0
+        current.append(file)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def review_batch(
+    feature: Feature,
+    route: ModelRoute,
+    system_blocks: List[Dict],
+    message: str,
+    batch: List[Dict[str, str]],
+    index: int,
+    total: int,
+    prompt: str = MAP_PROMPT,
+) -> str:
+    """
+    Mereview satu batch file (tahap map) dengan panggilan model non-streaming.
+    Blok rules di system prompt sama untuk semua batch sehingga dibaca dari prompt cache.
+    """
+    content = [
+        {"type": "text", "text": f"File: {f['name']}\nContent:\n{f['content']}"} for f in batch
+    ]
+    content.append(
+        {"type": "text", "text": prompt.format(index=index, total=total, message=message or "-")}
+    )
+    # Percobaan pertama selalu dijalankan walaupun LLM_MAX_RETRIES bernilai 0
+    attempts = max(1, Config.LLM_MAX_RETRIES)
+    for attempt in range(attempts):
+        try:
+            response = await get_backend().complete(
+                model=route.model,
+                system=system_blocks,
+                messages=[{"role": "user", "content": content}],
+                max_tokens=Config.CODE_REVIEW_BATCH_MAX_TOKENS,
+                temperature=0,
+                timeout=route.timeout,
+            )
+            prompt_service.record_usage(feature, response.usage, f"{route.name}-map")
+            return response.text
+        except Exception as e:
+            logger.error(f"Error reviewing batch {index}/{total}: {str(e)}")
+            if attempt == attempts - 1 or not prompt_service.is_retryable(e):
+                raise
+            await asyncio.sleep(prompt_service.retry_delay(attempt, e))
+
+
+async def review_batches(
+    user_id: int,
+    feature: Feature,
+    route: ModelRoute,
+    system_blocks: List[Dict],
+    message: str,
+    batches: List[List[Dict[str, str]]],
+    on_batch: Optional[Callable[[int, str, bool, int], Awaitable]] = None,
+    prompt: str = MAP_PROMPT,
+) -> Dict[int, str]:
+    """
+    Tahap map: mereview semua batch bersamaan, paling banyak CODE_REVIEW_CONCURRENCY
+    sekaligus. Setiap panggilan model batch mengambil slot admission sendiri, sehingga
+    satu review tidak memakai lebih banyak koneksi upstream daripada yang diizinkan.
+    Batch yang gagal dicatat sebagai temuan, bukan menggagalkan seluruh review.
+
+    Args:
+        on_batch (Optional): Dipanggil setiap batch selesai dengan
+            (nomor batch, temuan, berhasil, jumlah batch yang sudah selesai).
+
+    Returns:
+        Dict[int, str]: Temuan per nomor batch (mulai dari 1).
+    """
+    total = len(batches)
+    semaphore = asyncio.Semaphore(Config.CODE_REVIEW_CONCURRENCY)
+
+    async def run_batch(index: int, batch: List[Dict[str, str]]):
+        async with semaphore:
+            try:
+                async with admission.slot(user_id, feature):
+                    findings = await review_batch(
+                        feature, route, system_blocks, message, batch, index, total, prompt
+                    )
+                return index, findings, True
+            except Exception as e:
+                names = ", ".join(f["name"] for f in batch)
+                return index, f"Batch ini gagal direview ({names}): {str(e)}", False
+
+    results: Dict[int, str] = {}
+    tasks = [
+        asyncio.create_task(run_batch(index, batch))
+        for index, batch in enumerate(batches, start=1)
+    ]
+    try:
+        for completed, next_result in enumerate(asyncio.as_completed(tasks), start=1):
+            index, findings, ok = await next_result
+            results[index] = findings
+            if on_batch is not None:
+                await on_batch(index, findings, ok, completed)
+    finally:
+        for task in tasks:
+            task.cancel()
+    return results
+
+
+def reduce_messages(results: Dict[int, str], message: str) -> List[Dict]:
+    """
+    Menyusun pesan tahap reduce dari temuan semua batch.
+    """
+    total = len(results)
+    findings = "\n\n".join(
+        f"## Batch {index} dari {total}\n{results[index]}" for index in sorted(results)
+    )
+    return [
+        {
+            "role": "user",
+            "content": REDUCE_PROMPT.format(findings=findings, message=message or "-"),
+        }
+    ]
+
+
+async def map_reduce_review(
+    user_id: int,
+    chat_id: UUID,
+    message: str,
+    feature: Feature,
+    file_contents: List[Dict[str, str]],
+    on_event: Optional[Callable[[Dict], Awaitable]] = None,
+    on_prompt: Optional[Callable[[str, str], None]] = None,
+    reservation: Optional[AdmissionReservation] = None,
+) -> AsyncIterator[str]:
+    """
+    Review kode untuk lampiran yang terlalu besar untuk satu prompt.
+
+    Tahap map: file dikelompokkan menjadi batch (CODE_REVIEW_BATCH_TOKENS) dan setiap
+    batch direview bersamaan, paling banyak CODE_REVIEW_CONCURRENCY sekaligus, terhadap
+    rules fitur. Setiap batch yang selesai dikirim sebagai event
+    {'type': 'progress', 'completed': n, 'total': m}. Tahap reduce: hasil semua batch
+    digabung menjadi satu laporan yang di-stream seperti jawaban chat biasa.
+    Prompt log tahap reduce diserahkan ke `on_prompt` jika diisi (lihat chat_with_retry_stream).
+    Posisi antrean `reservation` dilepas saat tahap map dimulai, karena setiap batch
+    mengantre sendiri di admission control.
+
+    Yields:
+        str: Potongan laporan gabungan.
+    """
+    async with SessionLocal() as db:
+        system_blocks = await prompt_service.build_system_blocks(db, user_id, feature)
+
+    batches = make_batches(file_contents, Config.CODE_REVIEW_BATCH_TOKENS)
+    total = len(batches)
+    route = model_router.select(feature, Config.CODE_REVIEW_BATCH_TOKENS, len(file_contents))
+    logger.info(
+        f"Map-reduce review for chat {chat_id}: {len(file_contents)} files in {total} batches"
+    )
+
+    async def emit(event: Dict):
+        if on_event is not None:
+            await on_event(event)
+
+    async def on_batch(index: int, findings: str, ok: bool, completed: int):
+        await emit(
+            {"type": "progress", "completed": completed, "total": total, "batch": index, "ok": ok}
+        )
+
+    await emit({"type": "progress", "completed": 0, "total": total})
+    if reservation is not None:
+        reservation.release()
+    with span("review_map", feature, chat_id=chat_id, batches=total):
+        results = await review_batches(
+            user_id, feature, route, system_blocks, message, batches, on_batch
+        )
+
+    system_message = prompt_service.system_text(system_blocks)
+    messages = reduce_messages(results, message)
+    if on_prompt is not None:
+        on_prompt(str(messages), system_message)
+    else:
+        async with SessionLocal() as db:
+            await prompt_logs_manager.add_prompt_logs(db, user_id, str(messages), system_message)
+
+    response_key = response_cache_service.cache_key(route.model, feature, system_blocks, messages)
+    async for text in prompt_service.stream_with_retries(
+        user_id, chat_id, feature, route, system_blocks, system_message, messages,
+        response_key, on_event,
+    ):
+        yield text
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.config import Config
+from app.config.database import SessionLocal
+from app.repositories.chat_summary_manager import chat_summary_manager
+from app.services.llm_backend import get_backend
+from app.utils.feature_utils import Feature
+from app.utils.token_utils import estimate_message_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = (
+    "Anda meringkas percakapan antara user dan asisten AI muatmuat.com. "
+    "Pertahankan fakta penting, keputusan, nama file, potongan kode yang masih relevan, "
+    "dan pertanyaan yang belum terjawab. Tulis ringkasan dalam bahasa percakapan, "
+    "maksimal beberapa paragraf, tanpa pembuka atau penutup."
+)
+
+# Batas karakter per pesan saat menyusun transkrip untuk diringkas
+SUMMARY_MESSAGE_CHAR_LIMIT = 4000
+
+# Chat yang ringkasannya sedang diperbarui, agar tidak ada refresh ganda
+_refreshing: Set[UUID] = set()
+_background_tasks: Set[asyncio.Task] = set()
+
+# Jumlah token per pesan, key (id pesan, panjang isi). Pesan yang sudah selesai tidak
+# berubah, sehingga setiap giliran hanya perlu menghitung token pesan baru.
+_message_tokens: "OrderedDict[Tuple[UUID, int], int]" = OrderedDict()
+
+
+def completed_messages(chat_history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Membuang pesan kosong dan jawaban detach yang masih ditulis dari riwayat untuk model.
+    """
+    return [
+        message
+        for message in chat_history
+        if message["content"] and not message.get("is_streaming")
+    ]
+
+
+def _message_tokens_key(message: Dict[str, Any]) -> Optional[Tuple[UUID, int]]:
+    if message.get("id") is None:
+        return None
+    return message["id"], len(message.get("content") or "")
+
+
+async def message_token_counts(chat_history: List[Dict[str, Any]]) -> List[int]:
+    """
+    Mengembalikan jumlah token setiap pesan riwayat. Hitungan diambil dari cache per
+    pesan; pesan yang belum ada di cache ditokenisasi di thread agar event loop tidak
+    tertahan.
+    """
+    keys = [_message_tokens_key(message) for message in chat_history]
+    counts: List[Optional[int]] = [_message_tokens.get(key) if key else None for key in keys]
+    missing = [index for index, count in enumerate(counts) if count is None]
+    if missing:
+        computed = await asyncio.to_thread(
+            lambda: [estimate_message_tokens(chat_history[index]) for index in missing]
+        )
+        for index, count in zip(missing, computed):
+            counts[index] = count
+
+    for key, count in zip(keys, counts):
+        if key is not None:
+            _message_tokens[key] = count
+            _message_tokens.move_to_end(key)
+    while len(_message_tokens) > Config.HISTORY_TOKEN_CACHE_MAX_ENTRIES:
+        _message_tokens.popitem(last=False)
+    return counts
+
+
+def window_start(token_counts: List[int], token_budget: int) -> int:
+    """
+    Menentukan indeks pesan pertama yang masih masuk ke jendela riwayat.
+    Pesan diambil dari yang terbaru sampai batas token tercapai.
+
+    Args:
+        token_counts (List[int]): Jumlah token setiap pesan riwayat, berurutan dari yang terlama.
+        token_budget (int): Batas token untuk riwayat.
+
+    Returns:
+        int: Indeks awal jendela (0 berarti seluruh riwayat muat).
+    """
+    used = 0
+    start = len(token_counts)
+    for index in range(len(token_counts) - 1, -1, -1):
+        used += token_counts[index]
+        if used > token_budget:
+            break
+        start = index
+    return start
+
+
+async def build_history_window(
+    db: AsyncSession,
+    chat_id: UUID,
+    chat_history: List[Dict[str, Any]],
+    feature: Feature = Feature.GENERAL,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Memotong riwayat chat sesuai batas token fitur dan mengembalikan ringkasan
+    untuk giliran yang terpotong. Jika jendela bergeser melewati cakupan ringkasan,
+    ringkasan diperbarui di background dan ringkasan lama dipakai untuk giliran ini.
+
+    Returns:
+        Tuple[List[Dict], Optional[str]]: Riwayat dalam jendela dan teks ringkasan (jika ada).
+    """
+    token_counts = await message_token_counts(chat_history)
+    start = window_start(token_counts, Config.history_token_budget(feature.name))
+    if start == 0:
+        return chat_history, None
+
+    chat_summary = await chat_summary_manager.get_summary(db, chat_id)
+    summary = chat_summary.summary if chat_summary else None
+    covered = chat_summary.message_count if chat_summary else 0
+
+    if start > covered:
+        schedule_summary_refresh(chat_id, chat_history[covered:start], summary, start)
+
+    logger.info(
+        f"History window for chat {chat_id}: {len(chat_history) - start} of "
+        f"{len(chat_history)} messages, summary covers {covered}"
+    )
+    return chat_history[start:], summary
+
+
+def schedule_summary_refresh(
+    chat_id: UUID,
+    new_messages: List[Dict[str, Any]],
+    previous_summary: Optional[str],
+    message_count: int,
+):
+    if chat_id in _refreshing:
+        return
+    _refreshing.add(chat_id)
+    # Salin isi pesan agar task tidak memegang objek ORM dari sesi request
+    transcript = [
+        {"is_user": msg["is_user"], "content": msg.get("content") or ""}
+        for msg in new_messages
+    ]
+    task = asyncio.create_task(
+        _refresh_summary(chat_id, transcript, previous_summary, message_count)
+    )
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _refresh_summary(
+    chat_id: UUID,
+    new_messages: List[Dict[str, Any]],
+    previous_summary: Optional[str],
+    message_count: int,
+):
+    try:
+        summary = await summarize_messages(new_messages, previous_summary)
+        async with SessionLocal() as db:
+            await chat_summary_manager.save_summary(db, chat_id, summary, message_count)
+        logger.info(f"Chat summary refreshed for chat {chat_id} ({message_count} messages)")
+    except Exception as e:
+        logger.error(f"Error refreshing chat summary for chat {chat_id}: {str(e)}")
+    finally:
+        _refreshing.discard(chat_id)
+
+
+async def summarize_messages(
+    messages: List[Dict[str, Any]], previous_summary: Optional[str] = None
+) -> str:
+    """
+    Membuat ringkasan bergulir: ringkasan sebelumnya digabung dengan pesan-pesan baru.
+    """
+    parts = []
+    if previous_summary:
+        parts.append(f"Ringkasan sebelumnya:\n{previous_summary}")
+    lines = []
+    for msg in messages:
+        speaker = "User" if msg["is_user"] else "Asisten"
+        content = msg["content"]
+        if len(content) > SUMMARY_MESSAGE_CHAR_LIMIT:
+            content = content[:SUMMARY_MESSAGE_CHAR_LIMIT] + "..."
+        lines.append(f"{speaker}: {content}")
+    parts.append("Percakapan lanjutan:\n" + "\n\n".join(lines))
+
+    response = await get_backend().complete(
+        model=Config.SUMMARY_MODEL_NAME,
+        max_tokens=Config.SUMMARY_MAX_TOKENS,
+        temperature=0,
+        system=SUMMARY_PROMPT,
+        messages=[{"role": "user", "content": "\n\n".join(parts)}],
+    )
+    return response.text
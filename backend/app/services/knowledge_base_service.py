@@ -2,7 +2,7 @@ import logging
 from typing import Optional
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.repositories.knowledge_base_manager import KnowledgeManager
 from uuid import UUID
@@ -12,10 +12,10 @@ kb = KnowledgeManager()
 
 
 async def add_knowledge_base_item(
-    db: Session, question: str, answer: str
+    db: AsyncSession, question: str, answer: str
 ) -> dict:
     try:
-        return kb.add_item(db, question, answer)
+        return await kb.add_item(db, question, answer)
     except Exception as e:
         logger.error(f"Error adding knowledge base item: {str(e)}")
         raise HTTPException(
@@ -25,10 +25,10 @@ async def add_knowledge_base_item(
 
 
 async def update_knowledge_base_item(
-    db: Session, item_id: UUID, question: str, answer: str
+    db: AsyncSession, item_id: UUID, question: str, answer: str
 ) -> dict:
     try:
-        return kb.update_item(db, item_id, question, answer)
+        return await kb.update_item(db, item_id, question, answer)
     except Exception as e:
         logger.error(f"Error updating knowledge base item: {str(e)}")
         raise HTTPException(
@@ -37,9 +37,9 @@ async def update_knowledge_base_item(
         )
 
 
-async def delete_knowledge_base_item(db: Session, item_id: UUID) -> bool:
+async def delete_knowledge_base_item(db: AsyncSession, item_id: UUID) -> bool:
     try:
-        return kb.delete_item(db, item_id)
+        return await kb.delete_item(db, item_id)
     except Exception as e:
         logger.error(f"Error deleting knowledge base item: {str(e)}")
         raise HTTPException(
@@ -48,9 +48,9 @@ async def delete_knowledge_base_item(db: Session, item_id: UUID) -> bool:
         )
 
 
-async def get_all_knowledge_base_items(db: Session) -> list:
+async def get_all_knowledge_base_items(db: AsyncSession) -> list:
     try:
-        return kb.get_all_items(db)
+        return await kb.get_all_items(db)
     except Exception as e:
         logger.error(f"Error getting all knowledge base items: {str(e)}")
         raise HTTPException(
@@ -59,9 +59,9 @@ async def get_all_knowledge_base_items(db: Session) -> list:
         )
 
 
-async def get_knowledge_base_item(db: Session, item_id: UUID) -> Optional[dict]:
+async def get_knowledge_base_item(db: AsyncSession, item_id: UUID) -> Optional[dict]:
     try:
-        return kb.get_item_by_id(db, item_id)
+        return await kb.get_item_by_id(db, item_id)
     except Exception as e:
         logger.error(f"Error getting knowledge base item: {str(e)}")
         raise HTTPException(
@@ -0,0 +1,285 @@
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Union
+
+from app.config.config import Config
+from app.services.anthropic_client import get_client
+
+logger = logging.getLogger(__name__)
+
+System = Union[str, List[Dict]]
+
+
+@dataclass
+class LLMUsage:
+    """
+    Pemakaian token yang sudah dinormalisasi. Field input bernilai None pada event
+    usage yang hanya membawa token output (akhir stream).
+    """
+
+    output_tokens: int = 0
+    input_tokens: Optional[int] = None
+    cache_read_input_tokens: Optional[int] = None
+    cache_creation_input_tokens: Optional[int] = None
+
+
+@dataclass
+class LLMEvent:
+    """
+    Event stream yang sudah dinormalisasi: "text" (potongan jawaban) atau "usage".
+    """
+
+    type: str
+    text: str = ""
+    usage: Optional[LLMUsage] = None
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    usage: LLMUsage
+
+
+class LLMBackend:
+    """
+    Antarmuka pemanggilan model. `system` dapat berupa teks atau daftar blok
+    (dengan cache_control); backend yang tidak mendukung blok menggabungkannya.
+    """
+
+    name = "base"
+
+    def stream(
+        self,
+        model: str,
+        system: System,
+        messages: List[Dict],
+        max_tokens: int,
+        temperature: float = 0,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[LLMEvent]:
+        raise NotImplementedError
+
+    async def complete(
+        self,
+        model: str,
+        system: System,
+        messages: List[Dict],
+        max_tokens: int,
+        temperature: float = 0,
+        timeout: Optional[float] = None,
+    ) -> LLMResponse:
+        raise NotImplementedError
+
+
+def system_as_text(system: System) -> str:
+    if isinstance(system, str):
+        return system
+    return "".join(block["text"] for block in system)
+
+
+class AnthropicBackend(LLMBackend):
+    """
+    Claude API lewat client AsyncAnthropic bersama. Jika PROMPT_CACHE_ENABLED, blok
+    system dikirim apa adanya lewat API prompt caching.
+    """
+
+    name = "anthropic"
+
+    def _create(self, system: System, timeout: Optional[float], **kwargs):
+        client = get_client()
+        if timeout is not None:
+            # timeout=None pada SDK berarti tanpa batas waktu, jadi hanya dikirim jika diisi
+            kwargs["timeout"] = timeout
+        if Config.PROMPT_CACHE_ENABLED and not isinstance(system, str):
+            return client.beta.prompt_caching.messages.create(system=system, **kwargs)
+        return client.messages.create(system=system_as_text(system), **kwargs)
+
+    async def stream(
+        self,
+        model: str,
+        system: System,
+        messages: List[Dict],
+        max_tokens: int,
+        temperature: float = 0,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[LLMEvent]:
+        stream = await self._create(
+            system,
+            timeout,
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+        )
+        try:
+            async for chunk in stream:
+                if chunk.type == "content_block_delta":
+                    yield LLMEvent("text", text=chunk.delta.text)
+                elif chunk.type == "message_start":
+                    yield LLMEvent("usage", usage=_usage(chunk.message.usage, include_output=False))
+                elif chunk.type == "message_delta" and chunk.usage is not None:
+                    yield LLMEvent("usage", usage=LLMUsage(output_tokens=chunk.usage.output_tokens or 0))
+        finally:
+            # Kembalikan koneksi ke pool walaupun stream berhenti di tengah jalan
+            await stream.close()
+
+    async def complete(
+        self,
+        model: str,
+        system: System,
+        messages: List[Dict],
+        max_tokens: int,
+        temperature: float = 0,
+        timeout: Optional[float] = None,
+    ) -> LLMResponse:
+        response = await self._create(
+            system,
+            timeout,
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        text = "".join(block.text for block in response.content if block.type == "text")
+        return LLMResponse(text=text, usage=_usage(response.usage))
+
+
+def _usage(usage, include_output: bool = True) -> LLMUsage:
+    return LLMUsage(
+        output_tokens=(usage.output_tokens or 0) if include_output else 0,
+        input_tokens=usage.input_tokens or 0,
+        cache_read_input_tokens=getattr(usage, "cache_read_input_tokens", None) or 0,
+        cache_creation_input_tokens=getattr(usage, "cache_creation_input_tokens", None) or 0,
+    )
+
+
+class FakeLLMError(Exception):
+    """
+    Error yang disuntikkan backend palsu. `status_code` meniru error provider
+    sehingga logika retry diuji dengan jalur yang sama.
+    """
+
+    def __init__(self, message: str, status_code: int = 529):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = None
+
+
+FAKE_WORDS = (
+    "kode", "fungsi", "variabel", "standar", "perbaikan", "module", "request", "response",
+    "database", "query", "komponen", "service", "handler", "validasi", "error", "test",
+)
+
+
+class FakeBackend(LLMBackend):
+    """
+    Model palsu lokal untuk load test tanpa jaringan.
+
+    Jawaban deterministik per request (kata-kata dipilih dengan seed dari model, jumlah
+    pesan, dan panjang teks request), dikirim satu kata per delta setelah FAKE_LLM_TTFT_MS dengan kecepatan
+    FAKE_LLM_TOKENS_PER_SECOND. FAKE_LLM_ERROR_RATE menyuntikkan error sebelum token
+    pertama dan FAKE_LLM_DROP_RATE memutus stream di tengah jawaban.
+    """
+
+    name = "fake"
+
+    def __init__(self):
+        self._faults = random.Random(Config.FAKE_LLM_SEED)
+
+    @staticmethod
+    def _request_chars(system: System, messages: List[Dict]) -> int:
+        """
+        Panjang teks request tanpa serialisasi atau tokenisasi, agar backend palsu
+        tidak menahan event loop lebih lama dari backend sungguhan.
+        """
+        chars = len(system_as_text(system))
+        for message in messages:
+            content = message["content"]
+            if isinstance(content, str):
+                chars += len(content)
+            else:
+                chars += sum(len(block.get("text", "")) for block in content)
+        return chars
+
+    def _words(self, model: str, messages: List[Dict], chars: int, max_tokens: int) -> List[str]:
+        rng = random.Random(f"{model}:{len(messages)}:{chars}:{Config.FAKE_LLM_SEED}")
+        count = min(max_tokens, Config.FAKE_LLM_RESPONSE_TOKENS)
+        return [rng.choice(FAKE_WORDS) + " " for _ in range(count)]
+
+    @staticmethod
+    def _usage(chars: int) -> LLMUsage:
+        # Perkiraan kasar ~4 karakter per token
+        return LLMUsage(
+            input_tokens=chars // 4,
+            cache_read_input_tokens=0,
+            cache_creation_input_tokens=0,
+        )
+
+    async def stream(
+        self,
+        model: str,
+        system: System,
+        messages: List[Dict],
+        max_tokens: int,
+        temperature: float = 0,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[LLMEvent]:
+        chars = self._request_chars(system, messages)
+        words = self._words(model, messages, chars, max_tokens)
+        yield LLMEvent("usage", usage=self._usage(chars))
+        await asyncio.sleep(Config.FAKE_LLM_TTFT_MS / 1000)
+        if self._faults.random() < Config.FAKE_LLM_ERROR_RATE:
+            raise FakeLLMError("Fake backend overloaded")
+
+        drop_at = None
+        if self._faults.random() < Config.FAKE_LLM_DROP_RATE:
+            drop_at = self._faults.randrange(1, max(2, len(words)))
+        interval = 1 / Config.FAKE_LLM_TOKENS_PER_SECOND if Config.FAKE_LLM_TOKENS_PER_SECOND > 0 else 0
+        for index, word in enumerate(words):
+            if index == drop_at:
+                raise FakeLLMError("Fake backend dropped the stream", status_code=500)
+            if index and interval:
+                await asyncio.sleep(interval)
+            yield LLMEvent("text", text=word)
+        yield LLMEvent("usage", usage=LLMUsage(output_tokens=len(words)))
+
+    async def complete(
+        self,
+        model: str,
+        system: System,
+        messages: List[Dict],
+        max_tokens: int,
+        temperature: float = 0,
+        timeout: Optional[float] = None,
+    ) -> LLMResponse:
+        chars = self._request_chars(system, messages)
+        words = self._words(model, messages, chars, max_tokens)
+        interval = 1 / Config.FAKE_LLM_TOKENS_PER_SECOND if Config.FAKE_LLM_TOKENS_PER_SECOND > 0 else 0
+        await asyncio.sleep(Config.FAKE_LLM_TTFT_MS / 1000 + interval * len(words))
+        if self._faults.random() < Config.FAKE_LLM_ERROR_RATE:
+            raise FakeLLMError("Fake backend overloaded")
+        usage = self._usage(chars)
+        usage.output_tokens = len(words)
+        return LLMResponse(text="".join(words), usage=usage)
+
+
+BACKENDS = {
+    AnthropicBackend.name: AnthropicBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+_backend: Optional[LLMBackend] = None
+
+
+def get_backend() -> LLMBackend:
+    """
+    Mengembalikan backend model sesuai Config.LLM_BACKEND (anthropic | fake).
+    """
+    global _backend
+    if _backend is None:
+        _backend = BACKENDS[Config.LLM_BACKEND]()
+        logger.info(f"Using LLM backend: {_backend.name}")
+    return _backend
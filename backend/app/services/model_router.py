@@ -0,0 +1,101 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from app.config.config import Config
+from app.utils.feature_utils import Feature
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelRoute:
+    """
+    Satu rute model. Rute berlaku jika fitur termasuk `features` (kosong = semua fitur),
+    ukuran prompt tidak melebihi `max_prompt_tokens`, dan jumlah lampiran tidak
+    melebihi `max_attachments` (None = tanpa batas).
+    """
+
+    name: str
+    model: str
+    max_tokens: int = 5000
+    timeout: float = Config.ANTHROPIC_TIMEOUT
+    features: List[str] = field(default_factory=list)
+    max_prompt_tokens: Optional[int] = None
+    max_attachments: Optional[int] = None
+
+    def matches(self, feature: Feature, prompt_tokens: int, attachment_count: int) -> bool:
+        if self.features and feature.value not in self.features:
+            return False
+        if self.max_prompt_tokens is not None and prompt_tokens > self.max_prompt_tokens:
+            return False
+        if self.max_attachments is not None and attachment_count > self.max_attachments:
+            return False
+        return True
+
+
+# Rute bawaan: pertanyaan CS Chatbot yang pendek tanpa lampiran memakai model cepat,
+# review kode tetap memakai model besar dengan batas waktu yang lebih panjang.
+DEFAULT_ROUTES = [
+    {
+        "name": "cs-short",
+        "model": Config.FAST_MODEL_NAME,
+        "max_tokens": 1024,
+        "timeout": 60,
+        "features": ["CS_CHATBOT"],
+        "max_prompt_tokens": 30000,
+        "max_attachments": 0,
+    },
+    {
+        "name": "code-review",
+        "model": Config.MODEL_NAME,
+        "max_tokens": 5000,
+        "timeout": 600,
+        "features": ["CODE_CHECK", "CODE_CHECK_FRONTEND", "CODE_CHECK_BACKEND", "CODE_CHECK_APPS"],
+    },
+]
+
+DEFAULT_ROUTE = ModelRoute(name="default", model=Config.MODEL_NAME, max_tokens=5000)
+
+
+class ModelRouter:
+    def __init__(self, routes: List[ModelRoute], default_route: ModelRoute = DEFAULT_ROUTE):
+        self.routes = routes
+        self.default_route = default_route
+
+    def select(self, feature: Feature, prompt_tokens: int, attachment_count: int = 0) -> ModelRoute:
+        """
+        Memilih rute pertama yang cocok sesuai urutan konfigurasi.
+
+        Args:
+            feature (Feature): Fitur chat.
+            prompt_tokens (int): Perkiraan token input (system + messages).
+            attachment_count (int): Jumlah file yang dilampirkan.
+
+        Returns:
+            ModelRoute: Rute yang dipakai, atau rute default jika tidak ada yang cocok.
+        """
+        for route in self.routes:
+            if route.matches(feature, prompt_tokens, attachment_count):
+                return route
+        return self.default_route
+
+
+def load_routes() -> List[ModelRoute]:
+    """
+    Memuat rute dari MODEL_ROUTES_FILE (file JSON) atau MODEL_ROUTES (string JSON).
+    Jika keduanya kosong, rute bawaan dipakai.
+    """
+    raw = None
+    if Config.MODEL_ROUTES_FILE:
+        with open(Config.MODEL_ROUTES_FILE) as f:
+            raw = json.load(f)
+    elif Config.MODEL_ROUTES:
+        raw = json.loads(Config.MODEL_ROUTES)
+    routes = [ModelRoute(**route) for route in (raw if raw is not None else DEFAULT_ROUTES)]
+    logger.info(f"Loaded model routes: {[route.name for route in routes]}")
+    return routes
+
+
+model_router = ModelRouter(load_routes())
@@ -4,7 +4,7 @@ from typing import List, Optional
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config.config import Config
 from app.config.database import SessionLocal
@@ -22,13 +22,13 @@ MODEL_NAME = Config.MODEL_NAME
 chat_manager = ChatManager()
 
 
-async def get_user_chats(db: Session, user_id: int, feature: Feature = Feature.GENERAL) -> List[Dict[str, Any]]:
+async def get_user_chats(db: AsyncSession, user_id: int, feature: Feature = Feature.GENERAL) -> List[Dict[str, Any]]:
     """
     Mengambil daftar chat untuk pengguna tertentu.
 
     Args:
         feature:
-        db (Session): Sesi repositories SQLAlchemy.
+        db (AsyncSession): Sesi repositories SQLAlchemy.
         user_id (int): ID pengguna.
 
     Returns:
@@ -38,7 +38,7 @@ async def get_user_chats(db: Session, user_id: int, feature: Feature = Feature.G
         HTTPException: Jika terjadi kesalahan server internal saat mengambil daftar chat.
     """
     try:
-        chats = chat_manager.get_user_chats(db, user_id, feature)
+        chats = await chat_manager.get_user_chats(db, user_id, feature)
         return [
             {
                 "chat_id": str(chat.id),
@@ -91,9 +91,9 @@ async def get_chat_messages(chat_id: UUID) -> List[dict]:
     Raises:
         HTTPException: Jika terjadi kesalahan server internal saat mengambil pesan chat.
     """
-    db = SessionLocal()
     try:
-        return chat_manager.get_chat_messages(db, chat_id)
+        async with SessionLocal() as db:
+            return await chat_manager.get_chat_messages(db, chat_id)
     except Exception as e:
         logger.error(f"Error getting chat messages: {str(e)}")
         raise HTTPException(
@@ -101,13 +101,13 @@ async def get_chat_messages(chat_id: UUID) -> List[dict]:
         )
 
 
-async def create_new_chat(db: Session, user_id: int, feature: Feature = Feature.GENERAL) -> dict:
+async def create_new_chat(db: AsyncSession, user_id: int, feature: Feature = Feature.GENERAL) -> dict:
     """
     Membuat chat baru untuk pengguna tertentu.
 
     Args:
         feature:
-        db (Session): Sesi repositories SQLAlchemy.
+        db (AsyncSession): Sesi repositories SQLAlchemy.
         user_id (int): ID pengguna yang membuat chat.
 
     Returns:
@@ -117,7 +117,7 @@ async def create_new_chat(db: Session, user_id: int, feature: Feature = Feature.
         HTTPException: Jika terjadi kesalahan server internal saat membuat chat baru.
     """
     try:
-        new_chat = chat_manager.create_chat(db, user_id, feature)
+        new_chat = await chat_manager.create_chat(db, user_id, feature)
         return {
             "id": str(new_chat.id),
             "title": new_chat.title,
@@ -130,12 +130,12 @@ async def create_new_chat(db: Session, user_id: int, feature: Feature = Feature.
         )
 
 
-async def update_chat_title(db: Session, chat_id: UUID, title: str) -> bool:
+async def update_chat_title(db: AsyncSession, chat_id: UUID, title: str) -> bool:
     """
     Memperbarui judul chat.
 
     Args:
-        db (Session): Sesi repositories SQLAlchemy.
+        db (AsyncSession): Sesi repositories SQLAlchemy.
         chat_id (int): ID chat yang akan diperbarui.
         title (str): Judul baru untuk chat.
 
@@ -146,7 +146,7 @@ async def update_chat_title(db: Session, chat_id: UUID, title: str) -> bool:
         HTTPException: Jika terjadi kesalahan server internal saat memperbarui judul chat.
     """
     try:
-        return chat_manager.update_chat_title(db, chat_id, title)
+        return await chat_manager.update_chat_title(db, chat_id, title)
     except Exception as e:
         logger.error(f"Error updating chat title: {str(e)}")
         raise HTTPException(
@@ -154,12 +154,12 @@ async def update_chat_title(db: Session, chat_id: UUID, title: str) -> bool:
         )
 
 
-async def delete_chat(db: Session, chat_id: UUID, user_id: int):
+async def delete_chat(db: AsyncSession, chat_id: UUID, user_id: int):
     """
     Menghapus chat berdasarkan ID.
 
     Args:
-        db (Session): Sesi repositories SQLAlchemy.
+        db (AsyncSession): Sesi repositories SQLAlchemy.
         chat_id (int): ID chat yang akan dihapus.
 
     Returns:
@@ -168,7 +168,7 @@ async def delete_chat(db: Session, chat_id: UUID, user_id: int):
     # Panggil fungsi di chat_manager untuk menghapus chat
     try:
         # Panggilan ke chat_manager.delete_chat dengan argumen yang benar
-        success = chat_manager.delete_chat(db, chat_id, user_id)
+        success = await chat_manager.delete_chat(db, chat_id, user_id)
         if not success:
             raise HTTPException(
                 status_code=404,
@@ -181,12 +181,12 @@ async def delete_chat(db: Session, chat_id: UUID, user_id: int):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-async def get_latest_chat_id(db: Session, user_id: int) -> Optional[UUID]:
+async def get_latest_chat_id(db: AsyncSession, user_id: int) -> Optional[UUID]:
     """
     Mendapatkan ID chat terbaru untuk pengguna tertentu.
 
     Args:
-        db (Session): Sesi repositories SQLAlchemy.
+        db (AsyncSession): Sesi repositories SQLAlchemy.
         user_id (int): ID pengguna.
 
     Returns:
@@ -196,7 +196,7 @@ async def get_latest_chat_id(db: Session, user_id: int) -> Optional[UUID]:
         HTTPException: Jika terjadi kesalahan server internal saat mengambil ID chat terbaru.
     """
     try:
-        return chat_manager.get_latest_chat_id(db, user_id)
+        return await chat_manager.get_latest_chat_id(db, user_id)
     except Exception as e:
         logger.error(f"Error getting latest chat ID: {str(e)}")
         raise HTTPException(
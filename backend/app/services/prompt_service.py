@@ -1,77 +1,414 @@
 import asyncio
-import json
-from typing import Optional, List, Dict
+import random
+import textwrap
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, List, Dict, Set, Callable, Awaitable, AsyncIterator, Tuple
 from uuid import UUID
-from anthropic import AsyncAnthropic
-from sqlalchemy.orm import Session
+from fastapi import HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import StreamingResponse
+from app.config.config import Config
 from app.config.database import SessionLocal
 from app.repositories.context_manager import context_manager
+from app.repositories.data_versions import data_versions, CODE_CHECK_RULES, KNOWLEDGE_BASE, USER_CONTEXT
 from app.repositories.prompt_logs_manager import prompt_logs_manager
-from app.services.new_chat_service import create_new_chat, is_first_message, update_chat_title, chat_manager, \
-    get_chat_messages, CLAUDE_API_KEY, MODEL_NAME
+from app.services.new_chat_service import create_new_chat, chat_manager, get_chat_messages
+from app.services.admission_service import admission, AdmissionQueueFull, AdmissionReservation
+from app.services.llm_backend import LLMUsage, get_backend
+from app.services.history_service import build_history_window, completed_messages
 from app.services.knowledge_base_service import logger, kb
-from app.services import code_check_rules_service
+from app.services.model_router import ModelRoute, model_router
+from app.services import code_check_rules_service, code_review_service, response_cache_service, \
+    stream_buffer
+from app.services.single_flight import model_flights, single_flight_joins
+from app.services.stream_buffer import StreamBuffer
 from app.utils.feature_utils import Feature
+from app.utils.metrics import (
+    llm_input_tokens,
+    llm_output_tokens,
+    llm_cache_read_tokens,
+    llm_cache_creation_tokens,
+    llm_route_requests,
+    llm_route_ttft,
+    llm_route_latency,
+    llm_ttft,
+    llm_tokens_per_second,
+)
+from app.utils.sse_utils import format_event
+from app.utils.stream_utils import coalesce_chunks
+from app.utils.timing_utils import record_span, span
+from app.utils.token_utils import estimate_request_tokens
+
+# Task generasi yang sedang berjalan, disimpan agar tidak dibersihkan garbage collector
+_generation_tasks: Set[asyncio.Task] = set()
+
 
 async def process_chat_message(
-    db: Session,
+    db: AsyncSession,
     user_id: int,
     chat_id: UUID,
     message: str,
     feature: Feature = Feature.GENERAL,
     file_contents: Optional[List[Dict[str, str]]] = None,
+    request: Optional[Request] = None,
+    notices: Optional[List[str]] = None,
 ):
-    async def event_generator():
-        nonlocal chat_id
-        try:
-            if not message and not file_contents:
-                raise ValueError(
-                    "Pesan tidak boleh kosong dan tidak ada file yang diunggah"
-                )
+    """
+    Memulai generasi jawaban di background dan mengembalikan stream SSE-nya.
+
+    Generasi ditulis ke buffer replay per chat, sehingga klien yang terputus dapat
+    menyambung kembali lewat `GET /chat/{chat_id}/stream` tanpa memicu panggilan model baru.
+    Pada fitur dengan mode "cancel", jika tidak ada klien yang menyambung kembali dalam
+    STREAM_CANCEL_GRACE detik, panggilan model dibatalkan dan jawaban parsial disimpan
+    sebagai terpotong. Pada mode "detach", generasi tetap berjalan sampai selesai.
+
+    Posisi antrean model dipesan di sini, sehingga antrean penuh dijawab 429 dengan
+    Retry-After sebelum stream dimulai, bukan sebagai event error di dalam stream.
+    """
+    try:
+        reservation = admission.check_capacity(feature)
+    except AdmissionQueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    try:
+        if chat_id is None:
+            new_chat = await create_new_chat(db, user_id, feature)
+            chat_id = UUID(new_chat["id"])
+
+        buffer = stream_buffer.create_buffer(chat_id, user_id)
+        # Catatan pre-flight (misalnya lampiran yang dipotong) dikirim sebelum jawaban
+        for notice in notices or []:
+            await buffer.publish({"type": "notice", "content": notice})
+    except BaseException:
+        reservation.release()
+        raise
+    task = asyncio.create_task(
+        generate_chat_response(
+            buffer, user_id, chat_id, message, feature, file_contents, reservation
+        )
+    )
+    _generation_tasks.add(task)
+    task.add_done_callback(_generation_tasks.discard)
+    if Config.stream_mode(feature.value) == "cancel":
+        cancel_when_abandoned(buffer, task)
 
-            if chat_id is None:
-                chat_id = create_new_chat(db, user_id, feature)
+    return StreamingResponse(
+        stream_until_disconnect(request, buffer.subscribe()),
+        media_type="text/event-stream",
+    )
 
-            if await is_first_message(chat_id):
+
+def cancel_when_abandoned(buffer: StreamBuffer, task: asyncio.Task):
+    """
+    Membatalkan task generasi jika tidak ada pembaca buffer selama STREAM_CANCEL_GRACE
+    detik: baik karena semua pembaca pergi, maupun karena klien tidak pernah mulai
+    membaca (misalnya POST dibatalkan tepat setelah task dibuat). Timer dimulai saat
+    task dibuat dan dihentikan setiap kali ada pembaca yang menyambung.
+    """
+    loop = asyncio.get_running_loop()
+    timer: Optional[asyncio.TimerHandle] = None
+
+    def cancel_if_still_idle():
+        if buffer.subscribers == 0 and not buffer.done and not task.done():
+            logger.info(f"No client left for chat {buffer.chat_id}, cancelling generation")
+            task.cancel()
+
+    def stop_timer():
+        nonlocal timer
+        if timer is not None:
+            timer.cancel()
+            timer = None
+
+    def start_timer():
+        nonlocal timer
+        stop_timer()
+        timer = loop.call_later(Config.STREAM_CANCEL_GRACE, cancel_if_still_idle)
+
+    buffer.on_idle = start_timer
+    buffer.on_subscribe = stop_timer
+    task.add_done_callback(lambda _: stop_timer())
+    start_timer()
+
+
+async def stream_until_disconnect(
+    request: Optional[Request], frames: AsyncIterator[str]
+) -> AsyncIterator[str]:
+    """
+    Meneruskan frame SSE dan berhenti begitu klien memutus koneksi, sehingga pembaca
+    buffer dilepas secepatnya.
+    """
+    try:
+        async for frame in frames:
+            if request is not None and await request.is_disconnected():
+                logger.info("Client disconnected from chat stream")
+                return
+            yield frame
+    finally:
+        await frames.aclose()
+
+
+async def generate_chat_response(
+    buffer: StreamBuffer,
+    user_id: int,
+    chat_id: UUID,
+    message: str,
+    feature: Feature = Feature.GENERAL,
+    file_contents: Optional[List[Dict[str, str]]] = None,
+    reservation: Optional[AdmissionReservation] = None,
+):
+    """
+    Menjalankan satu giliran chat dan menulis setiap event ke buffer replay.
+    Berjalan terpisah dari request HTTP dan memakai sesi database sendiri.
+    `reservation` (dari process_chat_message) diserahkan ke admission control saat
+    model dipanggil, dan dilepas di akhir jika giliran selesai tanpa memanggil model.
+
+    Pada mode "detach", pesan bot dibuat lebih dulu dengan status streaming dan isinya
+    diperbarui setiap DETACHED_FLUSH_INTERVAL detik, sehingga worker lain dapat
+    mengikuti jawaban yang sedang berjalan dan jawaban tidak hilang jika proses berhenti.
+    """
+    db = SessionLocal()
+    response_parts = []
+    prompt_logs: List[Tuple[str, str]] = []
+    bot_message_id = None
+    try:
+        if not message and not file_contents:
+            raise ValueError(
+                "Pesan tidak boleh kosong dan tidak ada file yang diunggah"
+            )
+
+        with span("get_chat_messages", feature, chat_id=chat_id):
+            stored_messages = await chat_manager.get_chat_messages(db, chat_id)
+            chat_history = completed_messages(stored_messages)
+
+        # Semua penulisan sebelum generasi (judul, pesan user, info file, pesan bot
+        # detach) masuk dalam satu transaksi
+        with span("save_user_message", feature, chat_id=chat_id):
+            if not stored_messages:
                 title = message[:50] + "..." if len(message) > 50 else message
-                await update_chat_title(db, chat_id, title)
+                await chat_manager.update_chat_title(db, chat_id, title, commit=False)
 
-            chat_history = chat_manager.get_chat_messages(db, chat_id)
+            new_messages = []
             if chat_history and chat_history[-1]["is_user"]:
                 placeholder_response = "I'm processing your previous message."
-                chat_manager.add_message(
-                    db, chat_id, placeholder_response, is_user=False
-                )
+                new_messages.append({"content": placeholder_response, "is_user": False})
 
-            chat_manager.add_message(db, chat_id, message, is_user=True)
+            new_messages.append({"content": message, "is_user": True})
 
             # Menambahkan informasi file ke pesan chat
             if file_contents:
                 for file in file_contents:
                     file_info = f"File attached: {file['name']}"
-                    chat_manager.add_message(db, chat_id, file_info, is_user=True)
+                    new_messages.append({"content": file_info, "is_user": True})
+
+            detach = Config.stream_mode(feature.value) == "detach"
+            if detach:
+                new_messages.append({"content": "", "is_user": False, "is_streaming": True})
+
+            message_ids = await chat_manager.add_messages(db, chat_id, new_messages)
+            await db.commit()
+            if detach:
+                bot_message_id = message_ids[-1]
+        flushed_at = time.monotonic()
+
+        # Prompt log ditulis bersama jawaban bot di akhir giliran
+        def on_prompt(prompt_message: str, system_message: str):
+            prompt_logs.append((prompt_message, system_message))
+
+        # Lampiran review kode yang terlalu besar untuk satu prompt direview per batch
+        if await asyncio.to_thread(code_review_service.needs_map_reduce, feature, file_contents):
+            chunks = code_review_service.map_reduce_review(
+                user_id, chat_id, message, feature, file_contents,
+                on_event=buffer.publish, on_prompt=on_prompt, reservation=reservation,
+            )
+        else:
+            chunks = chat_with_retry_stream(
+                user_id, chat_id, message, feature, file_contents,
+                on_event=buffer.publish, on_prompt=on_prompt, reservation=reservation,
+            )
 
-            bot_response = ""
-            async for chunk in chat_with_retry_stream(
-                user_id, chat_id, message, feature, file_contents
-            ):
-                bot_response += chunk
-                yield f"data: {json.dumps({'type': 'message', 'content': chunk})}\n\n"
+        # Delta kecil dari model digabung agar jumlah frame SSE per jawaban jauh lebih sedikit
+        async for chunk in coalesce_chunks(
+            chunks,
+            Config.SSE_COALESCE_WINDOW_MS / 1000,
+            Config.SSE_COALESCE_MAX_BYTES,
+        ):
+            response_parts.append(chunk)
+            await buffer.publish({"type": "message", "content": chunk})
+            if bot_message_id and time.monotonic() - flushed_at >= Config.DETACHED_FLUSH_INTERVAL:
+                await chat_manager.update_message(
+                    db, bot_message_id, "".join(response_parts), is_streaming=True
+                )
+                flushed_at = time.monotonic()
 
-            if bot_response:
-                chat_manager.add_message(db, chat_id, bot_response, is_user=False)
+        bot_response = "".join(response_parts)
+        with span("save_bot_message", feature, chat_id=chat_id):
+            if bot_message_id:
+                await chat_manager.update_message(
+                    db, bot_message_id, bot_response, is_streaming=False, commit=False
+                )
+            elif bot_response:
+                await chat_manager.add_message(db, chat_id, bot_response, is_user=False, commit=False)
+            await save_prompt_logs(db, user_id, prompt_logs)
+            await db.commit()
+
+        await buffer.publish({"type": "done"})
+
+    except asyncio.CancelledError:
+        # Klien pergi: stream model sudah ditutup, simpan bagian yang sempat diterima
+        partial_response = "".join(response_parts)
+        await save_partial_response(db, user_id, chat_id, bot_message_id, partial_response, prompt_logs)
+        logger.info(
+            f"Generation for chat {chat_id} cancelled after {len(partial_response)} characters"
+        )
+        raise
+    except ValueError as ve:
+        logger.error(f"ValueError in process_chat: {str(ve)}")
+        await save_partial_response(
+            db, user_id, chat_id, bot_message_id, "".join(response_parts), prompt_logs
+        )
+        await buffer.publish({"type": "error", "content": str(ve)})
+    except Exception as e:
+        logger.error(f"Error in process_chat: {str(e)}")
+        await save_partial_response(
+            db, user_id, chat_id, bot_message_id, "".join(response_parts), prompt_logs
+        )
+        await buffer.publish({"type": "error", "content": str(e)})
+    finally:
+        if reservation is not None:
+            reservation.release()
+        await db.close()
+        await stream_buffer.finish_buffer(buffer)
 
-            yield f"data: {json.dumps({'type': 'done'})}\n\n"
 
-        except ValueError as ve:
-            logger.error(f"ValueError in process_chat: {str(ve)}")
-            yield f"data: {json.dumps({'type': 'error', 'content': str(ve)})}\n\n"
-        except Exception as e:
-            logger.error(f"Error in process_chat: {str(e)}")
-            yield f"data: {json.dumps({'type': 'error', 'content': str(e)})}\n\n"
+async def save_partial_response(
+    db: AsyncSession,
+    user_id: int,
+    chat_id: UUID,
+    bot_message_id: Optional[UUID],
+    partial_response: str,
+    prompt_logs: List[Tuple[str, str]],
+):
+    """
+    Menyimpan jawaban yang berhenti di tengah jalan sebagai pesan terpotong, bersama
+    prompt log giliran ini. Pada mode detach, pesan bot yang sudah dibuat ditutup
+    (tidak lagi streaming).
+    """
+    # Penulisan sebelumnya yang gagal di tengah transaksi dibatalkan lebih dulu
+    await db.rollback()
+    if bot_message_id:
+        await chat_manager.update_message(
+            db, bot_message_id, partial_response, is_streaming=False, is_truncated=True, commit=False
+        )
+    elif partial_response:
+        await chat_manager.add_message(
+            db, chat_id, partial_response, is_user=False, is_truncated=True, commit=False
+        )
+    await save_prompt_logs(db, user_id, prompt_logs)
+    await db.commit()
+
+
+async def save_prompt_logs(db: AsyncSession, user_id: int, prompt_logs: List[Tuple[str, str]]):
+    for prompt_message, system_message in prompt_logs:
+        await prompt_logs_manager.add_prompt_logs(
+            db, user_id, prompt_message, system_message, commit=False
+        )
+
+
+async def resume_chat_stream(
+    db: AsyncSession, user_id: int, chat_id: UUID, last_event_id: int = 0
+) -> StreamingResponse:
+    """
+    Melanjutkan stream jawaban setelah koneksi terputus.
+
+    Jika generasi masih berjalan (atau baru selesai) di worker ini, event setelah
+    `last_event_id` diputar ulang dari buffer. Jika generasi detach berjalan di worker
+    lain, pesan bot di database diikuti dengan polling sampai selesai. Jika tidak,
+    jawaban terakhir yang tersimpan di database dikirim ulang.
+
+    Raises:
+        HTTPException: Jika chat tidak ditemukan atau belum ada jawaban untuk diputar ulang.
+    """
+    buffer = stream_buffer.get_buffer(chat_id)
+    if buffer is not None:
+        if buffer.user_id != user_id:
+            raise HTTPException(status_code=404, detail="Chat not found")
+        return StreamingResponse(
+            buffer.subscribe(last_event_id), media_type="text/event-stream"
+        )
+
+    chat = await chat_manager.get_chat(db, chat_id)
+    if not chat or chat.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Chat not found")
+    last_message = await chat_manager.get_last_message(db, chat_id)
+    if not last_message or last_message.is_user:
+        raise HTTPException(status_code=404, detail="No response to resume")
+
+    if last_message.is_streaming:
+        return StreamingResponse(
+            follow_streaming_message(last_message.id, bool(last_event_id)),
+            media_type="text/event-stream",
+        )
+
+    content = last_message.content
+    # Klien yang sudah menerima sebagian jawaban mengganti teksnya dengan snapshot
+    event_type = "snapshot" if last_event_id else "message"
+
+    done_event = {"type": "done"}
+    if last_message.is_truncated:
+        done_event["truncated"] = True
+
+    async def replay():
+        yield format_event({"type": event_type, "content": content}, 1)
+        yield format_event(done_event, 2)
+
+    return StreamingResponse(replay(), media_type="text/event-stream")
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+async def follow_streaming_message(message_id: UUID, has_partial: bool) -> AsyncIterator[str]:
+    """
+    Mengikuti pesan bot generasi detach yang sedang ditulis oleh worker lain.
+
+    Pesan dibaca ulang setiap DETACHED_POLL_INTERVAL detik dan hanya teks baru yang
+    dikirim. Frame pertama berisi seluruh teks sejauh ini (sebagai snapshot jika klien
+    sudah memiliki sebagian jawaban). Jika pesan tidak diperbarui selama
+    DETACHED_STALE_AFTER detik, generasi dianggap berhenti dan stream ditutup.
+    """
+    sent = 0
+    event_id = 0
+    while True:
+        async with SessionLocal() as db:
+            bot_message = await chat_manager.get_message(db, message_id)
+        if bot_message is None:
+            return
+
+        content = bot_message.content
+        if len(content) > sent or event_id == 0:
+            event_type = "snapshot" if event_id == 0 and has_partial else "message"
+            event_id += 1
+            yield format_event({"type": event_type, "content": content[sent:]}, event_id)
+            sent = len(content)
+
+        last_update = bot_message.updated_at or bot_message.created_at
+        stale = (
+            last_update is not None
+            and (datetime.now(timezone.utc) - last_update).total_seconds()
+            > Config.DETACHED_STALE_AFTER
+        )
+        if not bot_message.is_streaming or stale:
+            done_event = {"type": "done"}
+            if bot_message.is_truncated or bot_message.is_streaming:
+                done_event["truncated"] = True
+            yield format_event(done_event, event_id + 1)
+            return
+
+        await asyncio.sleep(Config.DETACHED_POLL_INTERVAL)
 
 
 async def chat_with_retry_stream(
@@ -80,10 +417,16 @@ async def chat_with_retry_stream(
     message: str,
     feature: Feature = Feature.GENERAL,
     file_contents: Optional[List[Dict[str, str]]] = None,
+    on_event: Optional[Callable[[Dict], Awaitable]] = None,
+    on_prompt: Optional[Callable[[str, str], None]] = None,
+    reservation: Optional[AdmissionReservation] = None,
 ):
     """
     Mengirim pesan ke Claude API dengan mekanisme retry dan streaming respons.
 
+    Jika stream gagal setelah sebagian jawaban terkirim, percobaan berikutnya mengirim
+    jawaban parsial sebagai prefill assistant dan hanya meneruskan lanjutannya.
+
     Args:
         file_contents:
         feature:
@@ -91,6 +434,12 @@ async def chat_with_retry_stream(
         chat_id (int): ID chat.
         message (str): Pesan dari pengguna.
         file_contents (Optional): Konten file yang diunggah, jika ada.
+        on_event (Optional): Callback untuk event kontrol SSE, misalnya posisi antrean
+            ({'type': 'queued', 'position': n}) saat menunggu slot model.
+        on_prompt (Optional): Menerima (messages, system message) prompt log agar
+            disimpan pemanggil dalam transaksi akhir giliran. Jika kosong, prompt log
+            langsung ditulis.
+        reservation (Optional): Posisi antrean admission yang dipesan route.
 
     Yields:
         str: Potongan-potongan respons dari model AI.
@@ -98,153 +447,503 @@ async def chat_with_retry_stream(
     Raises:
         Exception: Jika jumlah maksimum percobaan retry tercapai tanpa respons sukses.
     """
-    max_retries = 3
-    retry_delay = 1
+    with span("get_chat_messages", feature, chat_id=chat_id):
+        chat_history = completed_messages(await get_chat_messages(chat_id))
+    logger.info(f"Retrieved {len(chat_history)} messages from chat history")
+
+    async with SessionLocal() as db:
+        # Konteks user, FAQ, atau rules fitur
+        with span("build_system_prompt", feature, chat_id=chat_id):
+            system_blocks = await build_system_blocks(db, user_id, feature)
+            system_message = system_text(system_blocks)
+
+        # Building messages, riwayat lama diganti ringkasan sesuai batas token fitur
+        with span("build_history_window", feature, chat_id=chat_id):
+            chat_history, history_summary = await build_history_window(
+                db, chat_id, chat_history, feature
+            )
+            messages = prepare_messages(
+                chat_history, message, file_contents, history_summary
+            )
 
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"Attempt {attempt + 1} for user {user_id}, chat {chat_id}")
+        # Adding prompt logs
+        with span("prompt_logs", feature, chat_id=chat_id):
+            if on_prompt is not None:
+                on_prompt(str(messages), system_message)
+            else:
+                await prompt_logs_manager.add_prompt_logs(db, user_id, str(messages), system_message)
+
+    # Model, batas output, dan timeout dipilih per fitur, ukuran prompt, dan jumlah lampiran.
+    # Tokenisasi prompt besar dijalankan di thread agar stream lain di event loop tidak tertahan
+    prompt_tokens = await asyncio.to_thread(estimate_request_tokens, system_message, messages)
+    route = model_router.select(feature, prompt_tokens, len(file_contents or []))
+    logger.info(
+        f"Routing chat {chat_id} ({feature.value}, ~{prompt_tokens} tokens) "
+        f"to route {route.name} ({route.model})"
+    )
+
+    # Giliran identik (temperature=0) dijawab dari cache tanpa memanggil model
+    with span("response_cache_lookup", feature, chat_id=chat_id):
+        response_key = response_cache_service.cache_key(
+            route.model, feature, system_blocks, messages
+        )
+        cached_response = await response_cache_service.get_response(response_key, feature)
+    if cached_response is not None:
+        logger.info(f"Response cache hit for user {user_id}, chat {chat_id}")
+        if reservation is not None:
+            reservation.release()
+        for chunk in response_cache_service.iter_chunks(cached_response):
+            yield chunk
+        return
+
+    # Request identik yang sedang berjalan (misalnya FAQ populer) cukup ikut membaca
+    # stream yang sama alih-alih memanggil model lagi
+    if Config.SINGLE_FLIGHT_ENABLED:
+        if model_flights.in_flight(response_key):
+            single_flight_joins.inc(feature=feature.value)
+            logger.info(f"Joining in-flight model stream for user {user_id}, chat {chat_id}")
+            # Ikut membaca stream yang sudah berjalan tidak memakai slot model
+            if reservation is not None:
+                reservation.release()
+        async for text in model_flights.stream(
+            response_key,
+            lambda: stream_with_retries(
+                user_id, chat_id, feature, route, system_blocks, system_message, messages,
+                response_key, on_event, reservation,
+            ),
+        ):
+            yield text
+    else:
+        async for text in stream_with_retries(
+            user_id, chat_id, feature, route, system_blocks, system_message, messages,
+            response_key, on_event, reservation,
+        ):
+            yield text
+
+
+async def stream_with_retries(
+    user_id: int,
+    chat_id: UUID,
+    feature: Feature,
+    route: ModelRoute,
+    system_blocks: List[Dict],
+    system_message: str,
+    messages: List[Dict],
+    response_key: str,
+    on_event: Optional[Callable[[Dict], Awaitable]] = None,
+    reservation: Optional[AdmissionReservation] = None,
+):
+    """
+    Menjalankan panggilan model dengan retry dan melanjutkan stream yang gagal di tengah jalan.
+    Slot model diambil dari admission control lebih dulu (memakai `reservation` jika
+    ada); selama menunggu, posisi antrean dikirim lewat `on_event`. Jawaban yang
+    selesai disimpan ke response cache.
+    """
 
-            chat_history = await get_chat_messages(chat_id)
-            logger.info(f"Retrieved {len(chat_history)} messages from chat history")
-
-            db = SessionLocal()
-            try:
-                base_prompt = "Anda adalah asisten AI untuk muatmuat.com, hanya diizinkan menjawab pertanyaan tentang pemrograman, logika pemrograman, serta profil perusahaan muatmuat.com. Pertanyaan di luar topik ini tidak akan dijawab. Bahasa jawaban disesuaikan dengan bahasa pengguna. Jawab pertanyaan se efektif mungkin."
-
-                if feature == Feature.GENERAL:
-                    system_message = base_prompt + """
-                    Anda dapat menjawab pertanyaan terkait pemrograman, logika pemrograman, dan profil muatmuat.com.
-                    Untuk pertanyaan tentang standar code perusahaan, arahkan ke fitur Code Check.
-                    Untuk dokumentasi code, arahkan ke fitur Code Helper.
-                    Untuk pertanyaan produk dan profil muatmuat.com, arahkan ke fitur CS Chatbot.
-                    """
-                    # contexts are applied for all features
-                    context = context_manager.get_latest_context(db, user_id)
-                    logger.info(f"Fetching context for user_id: {user_id}")
-                    logger.info(f"DB session: {db}")
-                    if context:
-                        system_message += f"\n\nBerikut ini adalah konteks tambahan:"
-                        for c in context:
-                            if c.content_type == "text":
-                                system_message += f"\n{c.content}"
-                            elif c.content_type == "file":
-                                system_message += (
-                                    f"\n\nBerikut ini adalah konteks tambahan dari file: \n{c.content_raw}"
-                                )
-                    system_message += "\n Apabila terdapat konteks, jawab pertanyaan sesuai masing-masing konteks yang disertakan. Konteks adalah batasan anda dalam menjawab pertanyaan"
-
-                elif feature == Feature.CODE_CHECK:
-                    system_message = base_prompt + """
-                    Anda akan mengevaluasi apakah kode sesuai dengan standar perusahaan.
-                    Untuk dokumentasi code, arahkan ke fitur Code Helper.
-                    Untuk pertanyaan umum, arahkan ke fitur General.
-                    Untuk pertanyaan tentang profil perusahaan, arahkan ke fitur CS Chatbot.
-                    """
-
-                elif feature == Feature.CODE_CHECK_FRONTEND:
-                    rule = await code_check_rules_service.get_rules_by_type(db, feature)
-                    system_message = base_prompt + f"""
-                    Anda akan mengevaluasi apakah kode sesuai dengan standar perusahaan dengan rules berikut ini.
-                    Anda harus menunjukkan perbaikan kode yang seharusnya.
-                    {rule["rule"]}
-                    """
-
-                elif feature == Feature.CODE_CHECK_BACKEND:
-                    rule = await code_check_rules_service.get_rules_by_type(db, feature)
-                    system_message = base_prompt + f"""
-                    Anda akan mengevaluasi apakah kode sesuai dengan standar perusahaan dengan rules berikut ini.
-                    Anda harus menunjukkan perbaikan kode yang seharusnya.
-                    {rule["rule"]}
-                    """
-
-                elif feature == Feature.CODE_CHECK_APPS:
-                    rule = await code_check_rules_service.get_rules_by_type(db, feature)
-                    system_message = base_prompt + f"""
-                    Anda akan mengevaluasi apakah kode sesuai dengan standar perusahaan dengan rules berikut ini.
-                    Anda harus menunjukkan perbaikan kode yang seharusnya.
-                    {rule["rule"]}
-                    """
-
-                elif feature == Feature.CODE_HELPER:
-                    system_message = base_prompt + """
-                    Anda akan membantu menambahkan komentar dokumentasi pada kode secara rinci.
-                    Untuk pertanyaan umum, arahkan ke fitur General.
-                    Untuk evaluasi kesesuaian kode, arahkan ke fitur Code Check.
-                    Untuk pertanyaan tentang profil perusahaan, arahkan ke fitur CS Chatbot.
-                    """
-
-                elif feature == Feature.CS_CHATBOT:
-                    knowledge_base_items = kb.get_all_items(db)
-                    knowledge_str = "\n".join(
-                        [f"Q: {item.get('question', '')}\nA: {item.get('answer', '')}" for item in knowledge_base_items]
-                    )
-                    system_message = base_prompt + """
-                    Anda akan menjawab pertanyaan terkait produk dan layanan dari muatmuat.com. Berikut FAQ yang tersedia:\n""" + knowledge_str + """
-                    Untuk pertanyaan umum, arahkan ke fitur General.
-                    Untuk evaluasi kode, arahkan ke fitur Code Check.
-                    Untuk dokumentasi kode, arahkan ke fitur Code Helper.
-                    Anda tidak perlu memberikan bahwa informasi yang tersedia dalam FAQ, seolah anda memang mengetahuinya.
-                    """
-
-                else:
-                    raise ValueError(f"Invalid feature: {feature}")
-
-                # Menambahkan file_contents ke dalam pesan jika ada
-                if file_contents:
-                    for i, file_content in enumerate(file_contents):
-                        system_message += f"\n\nFile {i+1} content:\n{file_content}"
-
-                system_message += """
-                Jika pertanyaan tidak terkait dengan informasi di atas, jawab dengan bijak bahwa Anda tidak memiliki informasi tersebut.
-                Tidak perlu meminta maaf.
-                Kamu tetap harus meyakinkan user bahwa kamu masih bisa menjawab pertanyaan lain"""
-
-                # Menambahkan konteks dari file
-                # if file_contents:
-                #     system_message += "\n\nAttached files content:\n"
-                #     for file in file_contents:
-                #         system_message += f"\nFile: {file['name']}\nContent:\n{file['content'][:1000]}...\n"
-
-                # Building messages
-                messages = prepare_messages(chat_history, message, file_contents)
-
-                # Adding prompt logs
-                prompt_logs_manager.add_prompt_logs(db, user_id, str(messages), system_message)
-
-                async with AsyncAnthropic(api_key=CLAUDE_API_KEY) as client:
-                    stream = await client.messages.create(
-                        model=MODEL_NAME,
-                        messages=messages,
-                        system=system_message,
-                        max_tokens=5000,
-                        temperature=0,
-                        stream=True,
-                    )
+    async def on_position(position: int):
+        if on_event is not None:
+            await on_event({"type": "queued", "position": position})
 
-                    async for chunk in stream:
-                        if chunk.type == "content_block_delta":
-                            yield chunk.delta.text
+    waiting_since = time.perf_counter()
+    async with admission.slot(user_id, feature, on_position, reservation):
+        record_span("admission_wait", time.perf_counter() - waiting_since, feature, chat_id=chat_id)
+        async for text in _stream_with_retries(
+            user_id, chat_id, feature, route, system_blocks, system_message, messages,
+            response_key,
+        ):
+            yield text
+
+
+async def _stream_with_retries(
+    user_id: int,
+    chat_id: UUID,
+    feature: Feature,
+    route: ModelRoute,
+    system_blocks: List[Dict],
+    system_message: str,
+    messages: List[Dict],
+    response_key: str,
+):
+    # Teks yang sudah dikirim ke klien; jika stream gagal di tengah jalan,
+    # percobaan berikutnya melanjutkan dari sini alih-alih mengulang dari awal
+    response_parts: List[str] = []
+    for attempt in range(Config.LLM_MAX_RETRIES):
+        try:
+            logger.info(f"Attempt {attempt + 1} for user {user_id}, chat {chat_id}")
+            request_messages = messages
+            skip_leading_whitespace = False
+            partial = "".join(response_parts)
+            prefill = partial.rstrip()
+            if prefill:
+                # API menolak prefill assistant yang diakhiri whitespace
+                request_messages = messages + [{"role": "assistant", "content": prefill}]
+                skip_leading_whitespace = len(prefill) < len(partial)
                 logger.info(
-                    f"Finished processing stream response for user {user_id}, chat {chat_id}"
+                    f"Continuing stream for chat {chat_id} after {len(prefill)} characters"
                 )
-                return
-            finally:
-                db.close()  # Pastikan untuk menutup session repositories
+
+            async for text in stream_completion(
+                feature, route, system_blocks, system_message, request_messages
+            ):
+                if skip_leading_whitespace:
+                    text = text.lstrip()
+                    if not text:
+                        continue
+                    skip_leading_whitespace = False
+                response_parts.append(text)
+                yield text
+
+            await response_cache_service.set_response(
+                response_key, feature, user_id, "".join(response_parts)
+            )
+            logger.info(
+                f"Finished processing stream response for user {user_id}, chat {chat_id}"
+            )
+            return
 
         except Exception as e:
             logger.error(
                 f"Error in API request for user {user_id}: {str(e)}", exc_info=True
             )
-            if attempt == max_retries - 1:
+            if attempt == Config.LLM_MAX_RETRIES - 1 or not is_retryable(e):
                 raise
-            await asyncio.sleep(retry_delay)
-            retry_delay *= 2
+            await asyncio.sleep(retry_delay(attempt, e))
 
     raise Exception("Maximum retry attempts reached without successful response.")
 
 
-def prepare_messages(chat_history, new_message, file_contents: Optional[List[Dict[str, str]]]=None):
+async def stream_completion(
+    feature: Feature,
+    route: ModelRoute,
+    system_blocks: List[Dict],
+    system_message: str,
+    messages: List[Dict],
+):
+    """
+    Satu panggilan streaming ke backend model memakai model, batas output, dan timeout rute.
+
+    Yields:
+        str: Potongan teks jawaban.
+    """
+    llm_route_requests.inc(feature=feature.value, route=route.name)
+    started = time.perf_counter()
+    # Blok system yang stabil ditandai cache_control agar dipakai ulang oleh prompt cache
+    events = get_backend().stream(
+        model=route.model,
+        system=system_blocks,
+        messages=messages,
+        max_tokens=route.max_tokens,
+        temperature=0,
+        timeout=route.timeout,
+    )
+
+    first_token_at = None
+    output_tokens = 0
+    try:
+        async for event in events:
+            if event.type == "text":
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    ttft = first_token_at - started
+                    llm_route_ttft.observe(ttft, route=route.name)
+                    llm_ttft.observe(ttft, feature=feature.value)
+                    record_span("model_ttft", ttft, feature, route=route.name)
+                yield event.text
+            elif event.type == "usage":
+                record_usage(feature, event.usage, route.name)
+                if event.usage is not None and event.usage.input_tokens is None:
+                    output_tokens = event.usage.output_tokens
+    finally:
+        finished = time.perf_counter()
+        llm_route_latency.observe(finished - started, route=route.name)
+        record_span(
+            "model_stream", finished - started, feature,
+            route=route.name, output_tokens=output_tokens,
+        )
+        if first_token_at is not None and output_tokens and finished > first_token_at:
+            llm_tokens_per_second.observe(
+                output_tokens / (finished - first_token_at), feature=feature.value
+            )
+        # Tutup stream backend (dan koneksinya) walaupun berhenti di tengah jalan
+        await events.aclose()
+
+
+# Status yang tidak akan berhasil walaupun diulang
+NON_RETRYABLE_STATUS = {400, 401, 403, 404, 413, 422}
+
+
+def is_retryable(error: Exception) -> bool:
+    return getattr(error, "status_code", None) not in NON_RETRYABLE_STATUS
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Membaca petunjuk `retry-after-ms` / `retry-after` dari response error provider.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms is not None:
+            return float(retry_after_ms) / 1000
+        retry_after = headers.get("retry-after")
+        if retry_after is None:
+            return None
+        try:
+            return float(retry_after)
+        except ValueError:
+            retry_at = parsedate_to_datetime(retry_after)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(attempt: int, error: Exception) -> float:
+    """
+    Backoff eksponensial dengan full jitter, tidak lebih cepat dari retry-after provider.
+    """
+    backoff = min(Config.LLM_RETRY_MAX_DELAY, Config.LLM_RETRY_BASE_DELAY * 2 ** attempt)
+    delay = random.uniform(0, backoff)
+    retry_after = retry_after_seconds(error)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, Config.LLM_RETRY_MAX_DELAY))
+    return delay
+
+
+BASE_PROMPT = "Anda adalah asisten AI untuk muatmuat.com, hanya diizinkan menjawab pertanyaan tentang pemrograman, logika pemrograman, serta profil perusahaan muatmuat.com. Pertanyaan di luar topik ini tidak akan dijawab. Bahasa jawaban disesuaikan dengan bahasa pengguna. Jawab pertanyaan se efektif mungkin."
+
+
+def _dedent(text: str) -> str:
+    # Membuang indentasi dari string triple-quote agar tidak ikut terkirim sebagai token
+    return textwrap.dedent(text).strip()
+
+
+CLOSING_PROMPT = "\n" + _dedent("""
+    Jika pertanyaan tidak terkait dengan informasi di atas, jawab dengan bijak bahwa Anda tidak memiliki informasi tersebut.
+    Tidak perlu meminta maaf.
+    Kamu tetap harus meyakinkan user bahwa kamu masih bisa menjawab pertanyaan lain""")
+
+GENERAL_PROMPT = _dedent("""
+    Anda dapat menjawab pertanyaan terkait pemrograman, logika pemrograman, dan profil muatmuat.com.
+    Untuk pertanyaan tentang standar code perusahaan, arahkan ke fitur Code Check.
+    Untuk dokumentasi code, arahkan ke fitur Code Helper.
+    Untuk pertanyaan produk dan profil muatmuat.com, arahkan ke fitur CS Chatbot.
+    """)
+
+GENERAL_CONTEXT_PROMPT = (
+    "\n Apabila terdapat konteks, jawab pertanyaan sesuai masing-masing konteks yang disertakan. "
+    "Konteks adalah batasan anda dalam menjawab pertanyaan"
+)
+
+CODE_CHECK_PROMPT = _dedent("""
+    Anda akan mengevaluasi apakah kode sesuai dengan standar perusahaan.
+    Untuk dokumentasi code, arahkan ke fitur Code Helper.
+    Untuk pertanyaan umum, arahkan ke fitur General.
+    Untuk pertanyaan tentang profil perusahaan, arahkan ke fitur CS Chatbot.
+    """)
+
+# Rules disisipkan setelah dedent karena isinya bisa memiliki indentasi sendiri
+CODE_CHECK_RULES_PROMPT = _dedent("""
+    Anda akan mengevaluasi apakah kode sesuai dengan standar perusahaan dengan rules berikut ini.
+    Anda harus menunjukkan perbaikan kode yang seharusnya.
+    """)
+
+CODE_HELPER_PROMPT = _dedent("""
+    Anda akan membantu menambahkan komentar dokumentasi pada kode secara rinci.
+    Untuk pertanyaan umum, arahkan ke fitur General.
+    Untuk evaluasi kesesuaian kode, arahkan ke fitur Code Check.
+    Untuk pertanyaan tentang profil perusahaan, arahkan ke fitur CS Chatbot.
+    """)
+
+CS_CHATBOT_PROMPT = _dedent("""
+    Anda akan menjawab pertanyaan terkait produk dan layanan dari muatmuat.com. Berikut FAQ yang tersedia:
+    """)
+
+CS_CHATBOT_CLOSING_PROMPT = _dedent("""
+    Untuk pertanyaan umum, arahkan ke fitur General.
+    Untuk evaluasi kode, arahkan ke fitur Code Check.
+    Untuk dokumentasi kode, arahkan ke fitur Code Helper.
+    Anda tidak perlu memberikan bahwa informasi yang tersedia dalam FAQ, seolah anda memang mengetahuinya.
+    """)
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+CODE_CHECK_RULE_FEATURES = (
+    Feature.CODE_CHECK_FRONTEND,
+    Feature.CODE_CHECK_BACKEND,
+    Feature.CODE_CHECK_APPS,
+)
+
+# System prompt yang sudah disusun: key versi -> (waktu kedaluwarsa, blok)
+_system_prompt_cache: "OrderedDict[Tuple, Tuple[float, Tuple[Dict, ...]]]" = OrderedDict()
+
+
+def _text_block(text: str, cache: bool = False) -> Dict:
+    block = {"type": "text", "text": text}
+    if cache:
+        block["cache_control"] = CACHE_CONTROL
+    return block
+
+
+def system_prompt_version(user_id: int, feature: Feature) -> Tuple:
+    """
+    Key cache system prompt: fitur beserta versi sumber data yang dipakai fitur itu
+    (konteks user untuk GENERAL, rules untuk code check per platform, FAQ untuk CS).
+    """
+    context_version = data_versions.get(USER_CONTEXT, user_id) if feature == Feature.GENERAL else 0
+    rules_version = (
+        data_versions.get(CODE_CHECK_RULES, feature) if feature in CODE_CHECK_RULE_FEATURES else 0
+    )
+    kb_version = data_versions.get(KNOWLEDGE_BASE) if feature == Feature.CS_CHATBOT else 0
+    return (
+        feature.value,
+        user_id if feature == Feature.GENERAL else None,
+        context_version,
+        rules_version,
+        kb_version,
+    )
+
+
+async def build_system_blocks(
+    db: AsyncSession,
+    user_id: int,
+    feature: Feature = Feature.GENERAL,
+) -> List[Dict]:
+    """
+    Mengembalikan system prompt fitur dari cache, atau menyusunnya jika belum ada.
+
+    Key cache berisi versi konteks user, rules, dan FAQ yang dinaikkan manager setiap
+    kali data tersebut ditulis, sehingga prompt yang tersimpan tidak pernah berasal dari
+    data lama di worker yang menulis. Worker lain memakai SYSTEM_PROMPT_CACHE_TTL.
+
+    Returns:
+        List[Dict]: Daftar blok teks untuk parameter `system`.
+    """
+    # Versi dibaca sebelum query agar penulisan yang terjadi di tengah penyusunan
+    # tidak tersimpan dengan versi baru
+    key = system_prompt_version(user_id, feature)
+    entry = _system_prompt_cache.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        _system_prompt_cache.move_to_end(key)
+        return list(entry[1])
+
+    blocks = await assemble_system_blocks(db, user_id, feature)
+    _system_prompt_cache[key] = (time.monotonic() + Config.SYSTEM_PROMPT_CACHE_TTL, tuple(blocks))
+    _system_prompt_cache.move_to_end(key)
+    while len(_system_prompt_cache) > Config.SYSTEM_PROMPT_CACHE_MAX_ENTRIES:
+        _system_prompt_cache.popitem(last=False)
+    return blocks
+
+
+async def assemble_system_blocks(
+    db: AsyncSession,
+    user_id: int,
+    feature: Feature = Feature.GENERAL,
+) -> List[Dict]:
+    """
+    Menyusun system prompt sebagai blok-blok berurutan, dari yang paling stabil.
+
+    Urutan blok:
+        1. Prompt dasar + instruksi fitur + FAQ/rules (sama untuk semua user di fitur itu).
+        2. Konteks milik user (hanya GENERAL, stabil per user).
+        3. Instruksi penutup.
+
+    Konten file tidak dimasukkan ke system prompt; file dikirim satu kali sebagai blok
+    pada pesan user (lihat `prepare_messages`).
+
+    Blok 1 dan 2 diberi cache_control sehingga giliran berikutnya memakai prompt cache.
+
+    Returns:
+        List[Dict]: Daftar blok teks untuk parameter `system`.
+    """
+    blocks = []
+
+    if feature == Feature.GENERAL:
+        blocks.append(_text_block(f"{BASE_PROMPT}\n{GENERAL_PROMPT}", cache=True))
+        # contexts are applied for all features
+        context = await context_manager.get_latest_context(db, user_id)
+        logger.info(f"Fetching context for user_id: {user_id}")
+        context_message = ""
+        if context:
+            context_message += f"\n\nBerikut ini adalah konteks tambahan:"
+            for c in context:
+                if c.content_type == "text":
+                    context_message += f"\n{c.content}"
+                elif c.content_type == "file":
+                    context_message += (
+                        f"\n\nBerikut ini adalah konteks tambahan dari file: \n{c.content_raw}"
+                    )
+        context_message += GENERAL_CONTEXT_PROMPT
+        blocks.append(_text_block(context_message, cache=bool(context)))
+
+    elif feature == Feature.CODE_CHECK:
+        blocks.append(_text_block(f"{BASE_PROMPT}\n{CODE_CHECK_PROMPT}", cache=True))
+
+    elif feature in CODE_CHECK_RULE_FEATURES:
+        rule = await code_check_rules_service.get_rules_by_type(db, feature)
+        blocks.append(
+            _text_block(f"{BASE_PROMPT}\n{CODE_CHECK_RULES_PROMPT}\n{rule['rule']}", cache=True)
+        )
+
+    elif feature == Feature.CODE_HELPER:
+        blocks.append(_text_block(f"{BASE_PROMPT}\n{CODE_HELPER_PROMPT}", cache=True))
+
+    elif feature == Feature.CS_CHATBOT:
+        knowledge_base_items = await kb.get_all_items(db)
+        knowledge_str = "\n".join(
+            [f"Q: {item.get('question', '')}\nA: {item.get('answer', '')}" for item in knowledge_base_items]
+        )
+        blocks.append(_text_block(
+            f"{BASE_PROMPT}\n{CS_CHATBOT_PROMPT}\n{knowledge_str}\n{CS_CHATBOT_CLOSING_PROMPT}",
+            cache=True,
+        ))
+
+    else:
+        raise ValueError(f"Invalid feature: {feature}")
+
+    blocks.append(_text_block(CLOSING_PROMPT))
+    return blocks
+
+
+def system_text(system_blocks: List[Dict]) -> str:
+    """
+    Menggabungkan blok system prompt menjadi satu teks (untuk log dan API tanpa cache).
+    """
+    return "".join(block["text"] for block in system_blocks)
+
+
+def record_usage(feature: Feature, usage: Optional[LLMUsage], route: str = ""):
+    """
+    Mencatat pemakaian token dari backend model, termasuk cache hit (read) dan miss (creation).
+    Usage di awal stream berisi token input, sedangkan usage di akhir stream hanya token output.
+    """
+    if usage is None:
+        return
+    labels = {"feature": feature.value, "route": route}
+    if usage.output_tokens:
+        llm_output_tokens.inc(usage.output_tokens, **labels)
+    if usage.input_tokens is None:
+        return
+    input_tokens = usage.input_tokens
+    cache_read = usage.cache_read_input_tokens or 0
+    cache_creation = usage.cache_creation_input_tokens or 0
+    llm_input_tokens.inc(input_tokens, **labels)
+    llm_cache_read_tokens.inc(cache_read, **labels)
+    llm_cache_creation_tokens.inc(cache_creation, **labels)
+    logger.info(
+        f"Token usage for {feature.value} ({route}): input={input_tokens}, "
+        f"cache_read={cache_read}, cache_creation={cache_creation}"
+    )
+
+
+def prepare_messages(
+    chat_history,
+    new_message,
+    file_contents: Optional[List[Dict[str, str]]] = None,
+    history_summary: Optional[str] = None,
+):
     """
     Menyiapkan pesan untuk dikirim ke API Claude.
 
@@ -252,6 +951,7 @@ def prepare_messages(chat_history, new_message, file_contents: Optional[List[Dic
         chat_history (List[Dict]): Riwayat chat.
         new_message (str): Pesan baru dari pengguna.
         file_contents (Optional): Konten file yang diunggah, jika ada.
+        history_summary (Optional[str]): Ringkasan giliran lama yang tidak masuk jendela riwayat.
 
     Returns:
         List[Dict]: Daftar pesan yang siap dikirim ke API.
@@ -260,6 +960,15 @@ def prepare_messages(chat_history, new_message, file_contents: Optional[List[Dic
     messages = []
     # untuk menentukan last role
     last_role = None
+    # ringkasan riwayat lama menjadi pesan user pertama
+    if history_summary:
+        messages.append(
+            {
+                "role": "user",
+                "content": f"Ringkasan percakapan sebelumnya:\n{history_summary}",
+            }
+        )
+        last_role = "user"
     # untuk menyusun message
     for msg in chat_history:
         role = "user" if msg["is_user"] else "assistant"
@@ -277,15 +986,16 @@ def prepare_messages(chat_history, new_message, file_contents: Optional[List[Dic
             {"role": "assistant", "content": "I understand. How can I help you?"}
         )
 
-    user_message_content = [{"type": "text", "text": new_message}]
-    # Jika ada file_contents, tambahkan ke pesan
-    if file_contents:
-        for file in file_contents:
-            user_message_content.append(
-                {
-                    "type": "text",
-                    "text": f"File: {file['name']}\nContent: {file['content']}...",
-                }
-            )
+    # File dikirim satu kali sebagai blok terstruktur sebelum pertanyaan. Blok file
+    # terakhir diberi cache_control sehingga retry dan lanjutan stream pada giliran
+    # ini membaca file dari prompt cache.
+    user_message_content = [
+        _text_block(f"File: {file['name']}\nContent:\n{file['content']}")
+        for file in file_contents or []
+    ]
+    if user_message_content and Config.PROMPT_CACHE_ENABLED:
+        user_message_content[-1]["cache_control"] = CACHE_CONTROL
+    if new_message:
+        user_message_content.append(_text_block(new_message))
     messages.append({"role": "user", "content": user_message_content})
     return messages
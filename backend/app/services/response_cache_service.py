@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator, List, Optional, Tuple
+
+from app.config.config import Config
+from app.config.database import SessionLocal
+from app.repositories.data_versions import data_versions, CODE_CHECK_RULES, KNOWLEDGE_BASE, USER_CONTEXT
+from app.repositories.response_cache_manager import response_cache_manager
+from app.utils.feature_utils import Feature
+from app.utils.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+response_cache_hits = counter(
+    "response_cache_hits_total", "Jawaban yang diambil dari response cache", ("feature", "tier")
+)
+response_cache_misses = counter(
+    "response_cache_misses_total", "Giliran yang tidak ada di response cache", ("feature",)
+)
+
+
+def cache_key(model: str, feature: Feature, system: Any, messages: List[Any]) -> str:
+    """
+    Membuat key cache dari semua input yang menentukan jawaban model (temperature=0).
+    """
+    payload = json.dumps(
+        {
+            "model": model,
+            "feature": feature.value,
+            "system": system,
+            "messages": messages,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """
+    Cache LRU di memori dengan TTL per entri. Setiap entri diberi tag fitur dan user
+    agar dapat diinvalidasi ketika data sumber prompt berubah.
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str, Optional[int], str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, _, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, feature: str, user_id: Optional[int], value: str):
+        self._entries[key] = (time.monotonic() + self.ttl, feature, user_id, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, feature: str, user_id: Optional[int] = None) -> int:
+        keys = [
+            key
+            for key, (_, entry_feature, entry_user_id, _) in self._entries.items()
+            if entry_feature == feature and (user_id is None or entry_user_id == user_id)
+        ]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+
+_memory_cache = LRUCache(Config.RESPONSE_CACHE_MAX_ENTRIES, Config.RESPONSE_CACHE_TTL)
+
+
+async def get_response(key: str, feature: Feature) -> Optional[str]:
+    """
+    Mencari jawaban di cache memori, lalu di tabel response_cache jika diaktifkan.
+    """
+    if not Config.RESPONSE_CACHE_ENABLED:
+        return None
+
+    value = _memory_cache.get(key)
+    if value is not None:
+        response_cache_hits.inc(feature=feature.value, tier="memory")
+        return value
+
+    if Config.RESPONSE_CACHE_PERSISTENT:
+        try:
+            async with SessionLocal() as db:
+                entry = await response_cache_manager.get_response(db, key)
+            if entry is not None:
+                _memory_cache.set(key, entry.feature, entry.user_id, entry.response)
+                response_cache_hits.inc(feature=feature.value, tier="database")
+                return entry.response
+        except Exception as e:
+            logger.error(f"Error reading persistent response cache: {str(e)}")
+
+    response_cache_misses.inc(feature=feature.value)
+    return None
+
+
+async def set_response(key: str, feature: Feature, user_id: int, response: str):
+    if not Config.RESPONSE_CACHE_ENABLED or not response:
+        return
+
+    _memory_cache.set(key, feature.value, user_id, response)
+
+    if Config.RESPONSE_CACHE_PERSISTENT:
+        try:
+            expires_at = datetime.now(timezone.utc) + timedelta(seconds=Config.RESPONSE_CACHE_TTL)
+            async with SessionLocal() as db:
+                await response_cache_manager.save_response(
+                    db, key, feature.value, user_id, response, expires_at
+                )
+        except Exception as e:
+            logger.error(f"Error writing persistent response cache: {str(e)}")
+
+
+async def invalidate(feature: Feature, user_id: Optional[int] = None):
+    """
+    Menghapus jawaban cache suatu fitur (opsional hanya milik satu user), dipanggil
+    ketika knowledge base, code check rules, atau konteks user berubah.
+    """
+    removed = _memory_cache.invalidate(feature.value, user_id)
+    if Config.RESPONSE_CACHE_PERSISTENT:
+        try:
+            async with SessionLocal() as db:
+                removed += await response_cache_manager.delete_responses(db, feature.value, user_id)
+        except Exception as e:
+            logger.error(f"Error invalidating persistent response cache: {str(e)}")
+    logger.info(f"Response cache invalidated for {feature.value} (user={user_id}): {removed} entries")
+
+
+async def purge_expired() -> int:
+    """
+    Menghapus baris response_cache yang sudah kedaluwarsa; pembacaan hanya menyaring
+    TTL, sehingga tanpa ini tabel terus membesar.
+    """
+    try:
+        async with SessionLocal() as db:
+            removed = await response_cache_manager.delete_expired(db)
+    except Exception as e:
+        logger.error(f"Error purging persistent response cache: {str(e)}")
+        return 0
+    if removed:
+        logger.info(f"Purged {removed} expired persistent response cache entries")
+    return removed
+
+
+async def purge_loop(interval: float):
+    while True:
+        await purge_expired()
+        await asyncio.sleep(interval)
+
+
+_purger: Optional[asyncio.Task] = None
+
+
+def start_purger(interval: float):
+    """
+    Menjalankan penghapusan berkala cache persisten; tidak melakukan apa-apa jika
+    tabel response_cache tidak dipakai.
+    """
+    global _purger
+    if not (Config.RESPONSE_CACHE_ENABLED and Config.RESPONSE_CACHE_PERSISTENT):
+        return
+    _purger = asyncio.create_task(purge_loop(interval))
+
+
+async def stop_purger():
+    global _purger
+    if _purger is not None:
+        _purger.cancel()
+        await asyncio.gather(_purger, return_exceptions=True)
+        _purger = None
+
+
+async def invalidate_on_change(source: str, key):
+    """
+    Listener data_versions: jawaban yang tersimpan tidak berlaku lagi ketika sumber
+    prompt-nya (FAQ, rules fitur, atau konteks user) ditulis.
+    """
+    if source == KNOWLEDGE_BASE:
+        await invalidate(Feature.CS_CHATBOT)
+    elif source == CODE_CHECK_RULES:
+        await invalidate(key)
+    elif source == USER_CONTEXT:
+        # Konteks hanya dipakai fitur GENERAL
+        await invalidate(Feature.GENERAL, key)
+
+
+data_versions.on_change(invalidate_on_change)
+
+
+def iter_chunks(response: str, size: int = Config.RESPONSE_CACHE_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Memecah jawaban dari cache menjadi potongan agar dikirim seperti stream model biasa.
+    """
+    for start in range(0, len(response), size):
+        yield response[start:start + size]
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from app.utils.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+single_flight_joins = counter(
+    "single_flight_joins_total", "Request yang menumpang stream model yang sedang berjalan", ("feature",)
+)
+
+
+class Flight:
+    """
+    Satu stream model yang sedang berjalan beserta potongan teks yang sudah diterima.
+    """
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self.condition = asyncio.Condition()
+
+
+class SingleFlight:
+    """
+    Menggabungkan request identik yang datang bersamaan menjadi satu panggilan model.
+
+    Request pertama untuk sebuah key menjalankan `factory` di task terpisah; request
+    berikutnya dengan key yang sama selama stream masih berjalan ikut membaca potongan
+    teks yang sama (dimulai dari awal). Stream dibatalkan jika semua pembaca pergi.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, Flight] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    async def stream(
+        self, key: str, factory: Callable[[], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(key, flight, factory))
+
+        flight.subscribers += 1
+        index = 0
+        try:
+            while True:
+                async with flight.condition:
+                    while index >= len(flight.parts) and not flight.done:
+                        await flight.condition.wait()
+                    parts = flight.parts[index:]
+                    index = len(flight.parts)
+                    done = flight.done
+                for part in parts:
+                    yield part
+                if done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Tidak ada lagi yang menunggu jawaban ini
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    async def _run(self, key: str, flight: Flight, factory: Callable[[], AsyncIterator[str]]):
+        try:
+            async for part in factory():
+                async with flight.condition:
+                    flight.parts.append(part)
+                    flight.condition.notify_all()
+        except asyncio.CancelledError:
+            flight.error = Exception("Upstream stream cancelled")
+        except Exception as e:
+            flight.error = e
+        finally:
+            self._forget(key, flight)
+            async with flight.condition:
+                flight.done = True
+                flight.condition.notify_all()
+
+    def _forget(self, key: str, flight: Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+model_flights = SingleFlight()
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from app.config.config import Config
+from app.utils.sse_utils import format_event
+
+logger = logging.getLogger(__name__)
+
+
+class StreamBuffer:
+    """
+    Buffer replay terbatas untuk satu stream jawaban chat.
+
+    Setiap event diberi nomor urut dan disimpan sebagai frame SSE yang sudah jadi.
+    Klien yang terputus dapat menyambung kembali dengan Last-Event-ID dan menerima
+    event setelah nomor tersebut. Jika event yang dibutuhkan sudah terbuang dari buffer,
+    klien menerima event `snapshot` berisi seluruh teks jawaban sampai event terakhir
+    yang terbuang, dan teks tersebut menggantikan teks yang sudah dimiliki klien.
+    """
+
+    def __init__(self, chat_id: UUID, user_id: int, max_events: int = Config.STREAM_BUFFER_MAX_EVENTS):
+        self.chat_id = chat_id
+        self.user_id = user_id
+        self.done = False
+        self._events: Deque[Tuple[int, str, Optional[str]]] = deque()
+        self._max_events = max_events
+        self._next_id = 1
+        # Teks dari event message yang sudah terbuang dari buffer
+        self._evicted_parts: List[str] = []
+        self._evicted_until = 0
+        self._condition = asyncio.Condition()
+        self.subscribers = 0
+        # Dipanggil ketika pembaca terakhir pergi sebelum stream selesai
+        self.on_idle: Optional[Callable[[], None]] = None
+        # Dipanggil setiap kali ada pembaca yang mulai membaca
+        self.on_subscribe: Optional[Callable[[], None]] = None
+
+    async def publish(self, payload: Dict[str, Any]) -> int:
+        async with self._condition:
+            event_id = self._next_id
+            self._next_id += 1
+            text = payload.get("content") if payload.get("type") == "message" else None
+            self._events.append((event_id, format_event(payload, event_id), text))
+            if len(self._events) > self._max_events:
+                evicted_id, _, evicted_text = self._events.popleft()
+                if evicted_text:
+                    self._evicted_parts.append(evicted_text)
+                self._evicted_until = evicted_id
+            self._condition.notify_all()
+            return event_id
+
+    async def finish(self):
+        async with self._condition:
+            self.done = True
+            self._condition.notify_all()
+
+    async def subscribe(self, last_event_id: int = 0) -> AsyncIterator[str]:
+        """
+        Mengembalikan frame SSE setelah `last_event_id`, lalu mengikuti stream
+        yang sedang berjalan sampai selesai.
+        """
+        cursor = last_event_id
+        self.subscribers += 1
+        if self.on_subscribe is not None:
+            self.on_subscribe()
+        try:
+            while True:
+                async with self._condition:
+                    frames = []
+                    if cursor < self._evicted_until:
+                        snapshot = {"type": "snapshot", "content": "".join(self._evicted_parts)}
+                        frames.append(format_event(snapshot, self._evicted_until))
+                        cursor = self._evicted_until
+                    for event_id, frame, _ in self._events:
+                        if event_id > cursor:
+                            frames.append(frame)
+                            cursor = event_id
+                    if not frames:
+                        if self.done:
+                            return
+                        await self._condition.wait()
+                        continue
+                for frame in frames:
+                    yield frame
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self.on_idle is not None:
+                self.on_idle()
+
+
+_buffers: Dict[UUID, StreamBuffer] = {}
+
+
+def create_buffer(chat_id: UUID, user_id: int) -> StreamBuffer:
+    """
+    Membuat buffer baru untuk chat. Buffer dari giliran sebelumnya diganti.
+    """
+    buffer = StreamBuffer(chat_id, user_id)
+    _buffers[chat_id] = buffer
+    return buffer
+
+
+def get_buffer(chat_id: UUID) -> Optional[StreamBuffer]:
+    return _buffers.get(chat_id)
+
+
+async def finish_buffer(buffer: StreamBuffer):
+    """
+    Menandai stream selesai dan menghapus buffer setelah STREAM_BUFFER_TTL detik.
+    Setelah itu resume dilayani dari jawaban yang tersimpan di database.
+    """
+    await buffer.finish()
+
+    def _evict():
+        if _buffers.get(buffer.chat_id) is buffer:
+            del _buffers[buffer.chat_id]
+
+    asyncio.get_running_loop().call_later(Config.STREAM_BUFFER_TTL, _evict)
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.config import Config
+from app.services.code_review_service import is_map_reduce_feature
+from app.services.prompt_service import build_system_blocks, system_text
+from app.utils.feature_utils import Feature
+from app.utils.token_utils import estimate_tokens, truncate_to_tokens, MESSAGE_OVERHEAD_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# File yang biasanya tidak berguna untuk review dan dibuang lebih dulu
+LOW_PRIORITY_NAMES = {"package-lock.json", "yarn.lock", "pnpm-lock.yaml", "composer.lock", "poetry.lock"}
+LOW_PRIORITY_DIRS = {"node_modules", "vendor", "dist", "build", ".git", "__pycache__", ".next"}
+LOW_PRIORITY_SUFFIXES = (".min.js", ".min.css", ".map", ".svg", ".lock")
+DOC_SUFFIXES = (".md", ".txt", ".json", ".yml", ".yaml", ".xml", ".csv", ".ini", ".toml")
+
+
+def file_priority(name: str) -> int:
+    """
+    Prioritas file lampiran: 0 = lockfile/hasil build/vendor, 1 = dokumen/konfigurasi,
+    2 = kode sumber. File dengan prioritas lebih tinggi dimasukkan lebih dulu.
+    """
+    parts = name.replace("\\", "/").split("/")
+    basename = parts[-1].lower()
+    if basename in LOW_PRIORITY_NAMES or basename.endswith(LOW_PRIORITY_SUFFIXES):
+        return 0
+    if any(part in LOW_PRIORITY_DIRS for part in parts[:-1]):
+        return 0
+    if basename.endswith(DOC_SUFFIXES) or not os.path.splitext(basename)[1]:
+        return 1
+    return 2
+
+
+def fit_attachments(
+    file_contents: List[Dict[str, str]], token_budget: int, max_file_tokens: Optional[int] = None
+) -> Tuple[List[Dict[str, str]], List[str], int]:
+    """
+    Memilih lampiran yang muat dalam batas token.
+
+    File dimasukkan berurutan dari prioritas tertinggi lalu yang terkecil. File kode
+    sumber yang tidak muat dipotong jika sisa batas masih cukup
+    (ATTACHMENT_MIN_TRUNCATED_TOKENS); file lain yang tidak muat dibuang. Jika
+    `max_file_tokens` diisi, setiap file juga dipotong sampai batas tersebut.
+
+    Returns:
+        Tuple: (lampiran yang dipakai sesuai urutan asli, daftar catatan, total token lampiran)
+    """
+    measured = [
+        (index, file, estimate_tokens(file["content"]) + MESSAGE_OVERHEAD_TOKENS)
+        for index, file in enumerate(file_contents)
+        if file["content"]
+    ]
+    measured.sort(key=lambda item: (-file_priority(item[1]["name"]), item[2]))
+
+    kept: List[Tuple[int, Dict[str, str]]] = []
+    notices: List[str] = []
+    used = 0
+    for index, file, tokens in measured:
+        remaining = token_budget - used
+        if max_file_tokens is not None:
+            remaining = min(remaining, max_file_tokens)
+        if tokens <= remaining:
+            kept.append((index, file))
+            used += tokens
+        elif file_priority(file["name"]) == 2 and remaining >= Config.ATTACHMENT_MIN_TRUNCATED_TOKENS:
+            content = truncate_to_tokens(file["content"], remaining - MESSAGE_OVERHEAD_TOKENS)
+            content += f"\n[... file dipotong: {tokens} token melebihi batas lampiran ...]"
+            kept.append((index, {**file, "content": content}))
+            used += remaining
+            notices.append(f"File {file['name']} dipotong karena melebihi batas token lampiran.")
+        else:
+            notices.append(f"File {file['name']} tidak disertakan karena melebihi batas token lampiran.")
+
+    kept.sort(key=lambda item: item[0])
+    return [file for _, file in kept], notices, used
+
+
+async def preflight_request(
+    db: AsyncSession,
+    user_id: int,
+    feature: Feature,
+    message: str,
+    file_contents: List[Dict[str, str]],
+) -> Tuple[List[Dict[str, str]], List[str]]:
+    """
+    Menghitung ukuran prompt sebelum memanggil model dan menyesuaikan lampiran dengan
+    batas token fitur.
+
+    Bagian tetap prompt (system prompt fitur, jendela riwayat maksimum, pesan user, dan
+    cadangan output) dihitung lebih dulu; sisanya menjadi batas lampiran.
+
+    Returns:
+        Tuple: (lampiran yang sudah disesuaikan, catatan untuk user)
+
+    Raises:
+        HTTPException: 413 beserta rincian token jika bagian tetap prompt saja sudah
+            melebihi batas konteks model.
+    """
+    system_tokens = estimate_tokens(system_text(await build_system_blocks(db, user_id, feature)))
+    breakdown: Dict[str, Any] = {
+        "limit": Config.MODEL_CONTEXT_TOKENS,
+        "system": system_tokens,
+        "history": Config.history_token_budget(feature.value) + Config.SUMMARY_MAX_TOKENS,
+        "message": estimate_tokens(message),
+        "output_reserve": Config.PROMPT_OUTPUT_RESERVE_TOKENS,
+    }
+    fixed_tokens = sum(value for key, value in breakdown.items() if key != "limit")
+    available = Config.MODEL_CONTEXT_TOKENS - fixed_tokens
+    if available < 0:
+        breakdown["attachments"] = 0
+        raise HTTPException(
+            status_code=413,
+            detail={"message": "Pesan terlalu besar untuk diproses model", "tokens": breakdown},
+        )
+
+    if not file_contents:
+        return file_contents, []
+
+    if is_map_reduce_feature(feature):
+        # Review map-reduce: lampiran dibagi ke beberapa panggilan model, sehingga
+        # batasnya total project dan setiap file harus muat dalam satu batch
+        token_budget = Config.CODE_REVIEW_MAX_TOKENS
+        max_file_tokens = Config.CODE_REVIEW_BATCH_TOKENS
+    else:
+        token_budget = min(Config.attachment_token_budget(feature.value), available)
+        max_file_tokens = None
+    # Tokenisasi lampiran besar dijalankan di thread agar event loop tidak tertahan
+    kept, notices, attachment_tokens = await asyncio.to_thread(
+        fit_attachments, file_contents, token_budget, max_file_tokens
+    )
+    if not kept and any(file["content"] for file in file_contents):
+        breakdown["attachments"] = sum(estimate_tokens(file["content"]) for file in file_contents)
+        breakdown["attachment_budget"] = token_budget
+        raise HTTPException(
+            status_code=413,
+            detail={"message": "Lampiran terlalu besar untuk diproses model", "tokens": breakdown},
+        )
+
+    logger.info(
+        f"Preflight for user {user_id} ({feature.value}): fixed={fixed_tokens}, "
+        f"attachments={attachment_tokens}/{token_budget}, files={len(kept)}/{len(file_contents)}"
+    )
+    return kept, notices
@@ -1,4 +1,7 @@
 import os
+from typing import BinaryIO, Dict, List, Union
+from zipfile import ZipFile
+
 from fastapi import UploadFile
 import logging
 
@@ -50,3 +53,27 @@ async def save_uploaded_file(file: UploadFile) -> str:
         logging.error(f"Failed to save file {file.filename}. Error: {e}")
         raise
     return file_path
+
+
+def read_zip_contents(file: Union[str, BinaryIO]) -> List[Dict[str, str]]:
+    """
+    Membaca semua file teks di dalam zip (folder dilewati).
+
+    Args:
+        file (Union[str, BinaryIO]): Path atau file object zip.
+
+    Returns:
+        List[Dict[str, str]]: Daftar {"name": path di dalam zip, "content": isi file}.
+    """
+    file_contents = []
+    with ZipFile(file, "r") as zip_file:
+        for info in zip_file.infolist():
+            if info.is_dir():
+                continue
+            file_contents.append(
+                {
+                    "name": info.filename,
+                    "content": zip_file.read(info).decode("utf-8", errors="ignore"),
+                }
+            )
+    return file_contents
@@ -0,0 +1,165 @@
+import bisect
+import threading
+from typing import Dict, List, Tuple, Union
+
+_lock = threading.Lock()
+
+
+class Counter:
+    """
+    Counter sederhana dengan label, disimpan di memori proses (per worker).
+    """
+
+    def __init__(self, name: str, description: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labelnames)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Dict[Tuple[str, ...], float]:
+        with _lock:
+            return dict(self._values)
+
+
+class Histogram:
+    """
+    Histogram dengan bucket tetap (kumulatif saat diekspor), disimpan per worker.
+    """
+
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # key label -> [jumlah per bucket (+Inf di akhir), total nilai, jumlah observasi]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[key] = entry
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self) -> Dict[Tuple[str, ...], Tuple[List[int], float, int]]:
+        with _lock:
+            return {key: (list(v[0]), v[1], v[2]) for key, v in self._values.items()}
+
+
+REGISTRY: List[Union[Counter, Histogram]] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Tuple[str, ...], key: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, key)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus() -> str:
+    """
+    Mengekspor semua metrik di REGISTRY dalam format teks Prometheus (versi 0.0.4).
+    Nilai adalah milik worker yang menjawab request, bukan gabungan semua worker.
+    """
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        if isinstance(metric, Histogram):
+            lines.append(f"# TYPE {metric.name} histogram")
+            for key, (bucket_counts, total, count) in sorted(metric.samples().items()):
+                cumulative = 0
+                bounds = [_format_value(b) for b in metric.buckets] + ["+Inf"]
+                for bound, bucket_count in zip(bounds, bucket_counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(metric.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{metric.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(metric.labelnames, key)
+                lines.append(f"{metric.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{metric.name}_count{labels} {count}")
+        else:
+            lines.append(f"# TYPE {metric.name} counter")
+            for key, value in sorted(metric.samples().items()):
+                labels = _format_labels(metric.labelnames, key)
+                lines.append(f"{metric.name}{labels} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def counter(name: str, description: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+    metric = Counter(name, description, labelnames)
+    REGISTRY.append(metric)
+    return metric
+
+
+def histogram(
+    name: str,
+    description: str,
+    labelnames: Tuple[str, ...] = (),
+    buckets: Tuple[float, ...] = Histogram.DEFAULT_BUCKETS,
+) -> Histogram:
+    metric = Histogram(name, description, labelnames, buckets)
+    REGISTRY.append(metric)
+    return metric
+
+
+llm_input_tokens = counter(
+    "llm_input_tokens_total", "Input token yang tidak berasal dari cache", ("feature", "route")
+)
+llm_output_tokens = counter(
+    "llm_output_tokens_total", "Output token yang dihasilkan model", ("feature", "route")
+)
+llm_cache_read_tokens = counter(
+    "llm_cache_read_input_tokens_total", "Input token yang dibaca dari prompt cache", ("feature", "route")
+)
+llm_cache_creation_tokens = counter(
+    "llm_cache_creation_input_tokens_total", "Input token yang ditulis ke prompt cache", ("feature", "route")
+)
+llm_route_requests = counter(
+    "llm_route_requests_total", "Panggilan model per rute", ("feature", "route")
+)
+llm_route_ttft = histogram(
+    "llm_route_ttft_seconds", "Waktu sampai token pertama per rute", ("route",)
+)
+llm_route_latency = histogram(
+    "llm_route_latency_seconds", "Durasi total stream model per rute", ("route",)
+)
+llm_ttft = histogram(
+    "llm_ttft_seconds", "Waktu sampai token pertama per fitur", ("feature",)
+)
+llm_tokens_per_second = histogram(
+    "llm_output_tokens_per_second",
+    "Kecepatan output model setelah token pertama per fitur",
+    ("feature",),
+    buckets=(5, 10, 20, 40, 60, 80, 100, 150, 200, 300, 500),
+)
+chat_stage_duration = histogram(
+    "chat_stage_duration_seconds",
+    "Durasi setiap tahap pipeline chat",
+    ("stage", "feature"),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
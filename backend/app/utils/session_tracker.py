@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.utils.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+db_session_leaks = counter(
+    "db_session_leaks_total",
+    "Sesi database di luar get_db yang tidak ditutup atau terlalu lama memegang transaksi",
+    ("reason",),
+)
+
+# Frame dari modul ini dan SQLAlchemy dilewati saat mencari pembuka sesi
+_SKIPPED_PATHS = (os.path.dirname(os.path.abspath(__file__)), f"{os.sep}sqlalchemy{os.sep}")
+
+
+def _caller() -> str:
+    frame = sys._getframe(1)
+    while frame is not None:
+        path = frame.f_code.co_filename
+        if not any(skipped in path for skipped in _SKIPPED_PATHS):
+            return f"{os.path.relpath(path)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class SessionTracker:
+    """
+    Melacak sesi yang dibuka di luar dependency get_db (task background, generasi
+    stream, cache). Sesi dianggap bocor jika dibuang garbage collector tanpa close(),
+    atau jika masih memegang transaksi (dan koneksi pool) lebih lama dari batas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # id sesi -> (weakref sesi, waktu dibuka, lokasi pembuka)
+        self._sessions: Dict[int, Tuple[weakref.ref, float, str]] = {}
+        self._reported: Set[int] = set()
+
+    def opened(self, session: AsyncSession):
+        key = id(session)
+        origin = _caller()
+        with self._lock:
+            self._sessions[key] = (weakref.ref(session), time.monotonic(), origin)
+        weakref.finalize(session, self._collected, key, origin)
+
+    def closed(self, session: AsyncSession):
+        with self._lock:
+            self._sessions.pop(id(session), None)
+            self._reported.discard(id(session))
+
+    def _collected(self, key: int, origin: str):
+        with self._lock:
+            leaked = self._sessions.pop(key, None) is not None
+            self._reported.discard(key)
+        if leaked:
+            db_session_leaks.inc(reason="not_closed")
+            logger.error(f"Database session opened at {origin} was garbage collected without close()")
+
+    def open_count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def leaked(self, older_than: float) -> List[Dict]:
+        """
+        Mengembalikan sesi yang memegang transaksi lebih lama dari `older_than` detik.
+        Setiap sesi dicatat di log dan counter sekali saja.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entries = list(self._sessions.items())
+        leaks = []
+        for key, (ref, opened_at, origin) in entries:
+            session = ref()
+            age = now - opened_at
+            if session is None or age < older_than or not session.in_transaction():
+                continue
+            leaks.append({"origin": origin, "age_seconds": round(age, 1)})
+            with self._lock:
+                if key in self._reported:
+                    continue
+                self._reported.add(key)
+            db_session_leaks.inc(reason="held_transaction")
+            logger.warning(
+                f"Database session opened at {origin} has held a transaction for {age:.0f} s"
+            )
+        return leaks
+
+    async def monitor(self, older_than: float):
+        while True:
+            await asyncio.sleep(older_than)
+            self.leaked(older_than)
+
+
+session_tracker = SessionTracker()
+_monitor: Optional[asyncio.Task] = None
+
+
+def start_monitor(older_than: float):
+    """
+    Memeriksa sesi yang bocor secara berkala agar tercatat walaupun /health tidak dipanggil.
+    """
+    global _monitor
+    _monitor = asyncio.create_task(session_tracker.monitor(older_than))
+
+
+async def stop_monitor():
+    global _monitor
+    if _monitor is not None:
+        _monitor.cancel()
+        await asyncio.gather(_monitor, return_exceptions=True)
+        _monitor = None
+
+
+class TrackedSession(AsyncSession):
+    """
+    AsyncSession yang terdaftar di session_tracker sampai close() dipanggil
+    (termasuk lewat `async with SessionLocal() as db`).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        session_tracker.opened(self)
+
+    async def close(self):
+        try:
+            await super().close()
+        finally:
+            session_tracker.closed(self)
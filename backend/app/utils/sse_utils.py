@@ -0,0 +1,33 @@
+import json
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # orjson opsional, fallback ke json bawaan
+    orjson = None
+
+
+def dumps(payload: Dict[str, Any]) -> str:
+    """
+    Serialisasi JSON untuk frame SSE. Memakai orjson jika terpasang.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload).decode("utf-8")
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def format_event(payload: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """
+    Membentuk satu frame Server-Sent Events.
+
+    Args:
+        payload (Dict): Data event, misalnya {"type": "message", "content": "..."}.
+        event_id (Optional[int]): Nomor urut event, dipakai klien sebagai Last-Event-ID.
+
+    Returns:
+        str: Frame SSE yang siap dikirim.
+    """
+    data = dumps(payload)
+    if event_id is None:
+        return f"data: {data}\n\n"
+    return f"id: {event_id}\ndata: {data}\n\n"
@@ -0,0 +1,86 @@
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+
+async def coalesce_chunks(
+    chunks: AsyncIterator[str], window: float, max_bytes: int
+) -> AsyncIterator[str]:
+    """
+    Menggabungkan potongan teks kecil dari model menjadi potongan yang lebih besar.
+
+    Potongan dikirim ketika jendela waktu `window` (detik) sejak potongan pertama yang
+    tertunda habis, atau ketika ukuran yang tertunda mencapai `max_bytes` (dihitung
+    dari panjang teks). Stream sumber dibaca oleh satu task terpisah yang hanya
+    menambah ke list, sehingga biaya per delta sangat kecil dan teks yang tertunda
+    tetap terkirim tepat waktu walaupun model sedang diam.
+
+    Args:
+        chunks (AsyncIterator[str]): Stream potongan teks dari model.
+        window (float): Jendela waktu penggabungan dalam detik (0 = tanpa batas waktu).
+        max_bytes (int): Ukuran maksimum potongan gabungan (0 = tanpa batas ukuran).
+
+    Yields:
+        str: Potongan teks gabungan.
+    """
+    if window <= 0 and max_bytes <= 0:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    loop = asyncio.get_running_loop()
+    pending: List[str] = []
+    pending_size = 0
+    ready = False
+    finished = False
+    error: Optional[BaseException] = None
+    timer: Optional[asyncio.TimerHandle] = None
+    waiter: Optional[asyncio.Future] = None
+
+    def signal():
+        nonlocal ready
+        ready = True
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def pump():
+        nonlocal pending_size, timer, finished, error
+        try:
+            async for chunk in chunks:
+                pending.append(chunk)
+                pending_size += len(chunk)
+                if 0 < max_bytes <= pending_size:
+                    signal()
+                elif timer is None and window > 0:
+                    timer = loop.call_later(window, signal)
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            error = e
+        finished = True
+        signal()
+
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            if not ready:
+                waiter = loop.create_future()
+                await waiter
+                waiter = None
+            ready = False
+            if timer is not None:
+                timer.cancel()
+                timer = None
+            if pending:
+                batch = "".join(pending)
+                pending.clear()
+                pending_size = 0
+                yield batch
+            if finished and not pending:
+                if error is not None:
+                    raise error
+                return
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if not task.done():
+            task.cancel()
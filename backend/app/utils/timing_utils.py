@@ -0,0 +1,92 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.feature_utils import Feature
+from app.utils.metrics import chat_stage_duration
+
+# Logger terpisah agar record timing mudah difilter atau dikirim ke sink tersendiri
+logger = logging.getLogger("app.timing")
+
+# Daftar (tahap, durasi) milik request HTTP yang sedang berjalan, diisi ServerTimingMiddleware
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def record_span(name: str, duration: float, feature: Optional[Feature] = None, **fields):
+    """
+    Mencatat durasi satu tahap: histogram chat_stage_duration_seconds, header
+    Server-Timing request yang sedang berjalan, dan satu record log JSON.
+    """
+    feature_value = feature.value if feature is not None else ""
+    chat_stage_duration.observe(duration, stage=name, feature=feature_value)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, duration))
+    record = {"span": name, "duration_ms": round(duration * 1000, 2), "feature": feature_value, **fields}
+    logger.info(json.dumps(record, default=str), extra={"span": record})
+
+
+@contextmanager
+def span(name: str, feature: Optional[Feature] = None, **fields):
+    """
+    Mengukur durasi blok kode sebagai satu tahap, juga jika blok berakhir dengan error.
+
+    Contoh:
+        with span("prompt_logs", feature, chat_id=chat_id):
+            await prompt_logs_manager.add_prompt_logs(...)
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - started, feature, **fields)
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    durations: Dict[str, float] = {}
+    for name, duration in timings:
+        durations[name] = durations.get(name, 0) + duration
+    durations["app"] = total
+    return ", ".join(f"{name};dur={duration * 1000:.1f}" for name, duration in durations.items())
+
+
+class ServerTimingMiddleware:
+    """
+    Menambahkan header Server-Timing (tahap yang dicatat lewat `span` + total "app")
+    pada response non-streaming. Response SSE dilewati karena header sudah terkirim
+    sebelum tahap-tahapnya selesai.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                content_type = next(
+                    (value for key, value in headers if key.lower() == b"content-type"), b""
+                )
+                if not content_type.startswith(b"text/event-stream"):
+                    value = server_timing_header(timings, time.perf_counter() - started)
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
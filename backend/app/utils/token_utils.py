@@ -0,0 +1,96 @@
+import logging
+from functools import lru_cache
+from importlib import resources
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Perkiraan kasar jumlah karakter per token untuk teks campuran kode dan bahasa alami,
+# dipakai jika tokenizer lokal tidak tersedia
+CHARS_PER_TOKEN = 4
+
+# Overhead per pesan (role dan pemisah) di sisi API
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    """
+    Memuat tokenizer Claude yang dibundel paket anthropic (tokenizer.json) memakai
+    paket `tokenizers`. Hasilnya perkiraan (bukan hitungan resmi model Claude 3), tetapi
+    jauh lebih dekat daripada heuristik karakter untuk kode.
+
+    Returns:
+        Optional[Tokenizer]: Tokenizer, atau None jika tidak dapat dimuat.
+    """
+    try:
+        from tokenizers import Tokenizer
+
+        tokenizer_file = resources.files("anthropic").joinpath("tokenizer.json")
+        return Tokenizer.from_str(tokenizer_file.read_text(encoding="utf-8"))
+    except Exception as e:
+        logger.warning(f"Local tokenizer unavailable, using character heuristic: {str(e)}")
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Memperkirakan jumlah token sebuah teks tanpa memanggil API.
+
+    Args:
+        text (str): Teks yang akan dihitung.
+
+    Returns:
+        int: Perkiraan jumlah token.
+    """
+    if not text:
+        return 0
+    tokenizer = get_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False).ids)
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Memotong teks sehingga jumlah tokennya tidak melebihi `max_tokens`.
+    """
+    if max_tokens <= 0:
+        return ""
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return text[: max_tokens * CHARS_PER_TOKEN]
+    offsets = tokenizer.encode(text, add_special_tokens=False).offsets
+    if len(offsets) <= max_tokens:
+        return text
+    return text[: offsets[max_tokens - 1][1]]
+
+
+def estimate_message_tokens(message: Dict[str, Any]) -> int:
+    """
+    Memperkirakan jumlah token satu pesan riwayat chat (dict dari ChatManager).
+    """
+    return estimate_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+def estimate_history_tokens(messages: List[Dict[str, Any]]) -> int:
+    return sum(estimate_message_tokens(message) for message in messages)
+
+
+def estimate_content_tokens(content: Any) -> int:
+    """
+    Memperkirakan token isi pesan API, baik berupa string maupun daftar blok teks.
+    """
+    if isinstance(content, str):
+        return estimate_tokens(content)
+    return sum(estimate_tokens(block.get("text", "")) for block in content or [])
+
+
+def estimate_request_tokens(system: str, messages: List[Dict[str, Any]]) -> int:
+    """
+    Memperkirakan total token input satu request (system prompt + messages).
+    """
+    return estimate_tokens(system) + sum(
+        estimate_content_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
@@ -0,0 +1,147 @@
+"""
+Mengukur lag event loop saat query database berjalan bersamaan dengan stream model:
+query sinkron (psycopg2, seperti Session lama di dalam route async) dibandingkan
+query async (asyncpg lewat async_engine aplikasi).
+
+Butuh Postgres yang dapat dijangkau lewat variabel DB_* yang sama dengan server.
+Model memakai backend palsu, jadi tidak ada panggilan ke Claude API. Dari folder backend:
+
+    python -m benchmarks.event_loop_lag --db both --streams 50 --db-tasks 20
+
+Lag diukur dengan ticker yang tidur TICK_INTERVAL lalu mencatat keterlambatannya
+bangun; inter-token gap adalah jeda antar potongan teks yang diterima stream palsu.
+"""
+
+import argparse
+import asyncio
+import math
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import List
+
+from sqlalchemy import create_engine, text
+
+from app.config.database import async_engine, SQLALCHEMY_DATABASE_URL
+from app.services.llm_backend import FakeBackend, FakeLLMError
+
+TICK_INTERVAL = 0.005
+
+
+@dataclass
+class Stats:
+    lag: List[float] = field(default_factory=list)
+    token_gaps: List[float] = field(default_factory=list)
+    queries: int = 0
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    # Nearest-rank
+    index = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def ticker(stats: Stats, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_INTERVAL)
+        stats.lag.append(max(0.0, time.perf_counter() - started - TICK_INTERVAL))
+
+
+async def fake_stream(backend: FakeBackend, stats: Stats, number: int, stop: asyncio.Event):
+    messages = [{"role": "user", "content": f"pertanyaan {number}"}]
+    while not stop.is_set():
+        previous = None
+        try:
+            async for event in backend.stream("fake", "system", messages, max_tokens=200):
+                if event.type != "text":
+                    continue
+                now = time.perf_counter()
+                if previous is not None:
+                    stats.token_gaps.append(now - previous)
+                previous = now
+                if stop.is_set():
+                    return
+        except FakeLLMError:
+            # Error yang disuntikkan (FAKE_LLM_ERROR_RATE) tidak relevan untuk pengukuran ini
+            continue
+
+
+async def sync_queries(sync_engine, query: str, stats: Stats, stop: asyncio.Event):
+    # Query dijalankan langsung di event loop, sama seperti memanggil Session sinkron di route async
+    with sync_engine.connect() as connection:
+        while not stop.is_set():
+            connection.execute(text(query))
+            stats.queries += 1
+            await asyncio.sleep(0)
+
+
+async def async_queries(query: str, stats: Stats, stop: asyncio.Event):
+    async with async_engine.connect() as connection:
+        while not stop.is_set():
+            await connection.execute(text(query))
+            stats.queries += 1
+
+
+async def run_mode(mode: str, args) -> Stats:
+    stats = Stats()
+    stop = asyncio.Event()
+    backend = FakeBackend()
+    sync_engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_size=args.db_tasks) if mode == "sync" else None
+
+    tasks = [asyncio.create_task(ticker(stats, stop))]
+    tasks += [asyncio.create_task(fake_stream(backend, stats, n, stop)) for n in range(args.streams)]
+    for _ in range(args.db_tasks):
+        if mode == "sync":
+            tasks.append(asyncio.create_task(sync_queries(sync_engine, args.query, stats, stop)))
+        elif mode == "async":
+            tasks.append(asyncio.create_task(async_queries(args.query, stats, stop)))
+
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+    if sync_engine is not None:
+        sync_engine.dispose()
+    return stats
+
+
+def report(mode: str, stats: Stats, duration: float):
+    print(f"\n[{mode}] queries={stats.queries} ({stats.queries / duration:.1f}/s)")
+    for label, values in (("loop lag", stats.lag), ("token gap", stats.token_gaps)):
+        if not values:
+            print(f"  {label:<10} -")
+            continue
+        print(
+            f"  {label:<10} p50={percentile(values, 50) * 1000:7.2f} ms  "
+            f"p95={percentile(values, 95) * 1000:7.2f} ms  "
+            f"p99={percentile(values, 99) * 1000:7.2f} ms  "
+            f"max={max(values) * 1000:7.2f} ms  mean={statistics.mean(values) * 1000:7.2f} ms"
+        )
+
+
+async def run(args):
+    modes = ["none", "sync", "async"] if args.db == "both" else ["none", args.db]
+    for mode in modes:
+        report(mode, await run_mode(mode, args), args.duration)
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--db", choices=("sync", "async", "both"), default="both",
+        help="Driver query yang dibandingkan; 'none' (tanpa query) selalu dijalankan sebagai baseline",
+    )
+    parser.add_argument("--streams", type=int, default=50, help="Jumlah stream model palsu bersamaan")
+    parser.add_argument("--db-tasks", type=int, default=10, help="Jumlah task query bersamaan")
+    parser.add_argument("--query", default="SELECT pg_sleep(0.005)")
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Load test end-to-end untuk POST /chat/send: login, membuat chat, lalu menjalankan
+stream chat bersamaan ke beberapa fitur, dengan dan tanpa lampiran zip.
+
+Jalankan server dengan backend model palsu dan Postgres lokal, misalnya:
+
+    LLM_BACKEND=fake FAKE_LLM_TTFT_MS=300 FAKE_LLM_TOKENS_PER_SECOND=60 \\
+        uvicorn main:app --workers 2
+
+lalu dari folder backend:
+
+    python -m benchmarks.load_test --users 10 --concurrency 20 --requests 200
+
+User load test (loadtest-0, loadtest-1, ...) didaftarkan otomatis jika belum ada.
+Beban dibagi ke beberapa user karena admission membatasi stream per user
+(ADMISSION_MAX_PER_USER). Koneksi DB yang dipakai dibaca dari pg_stat_activity
+memakai variabel DB_* yang sama dengan server.
+"""
+
+import argparse
+import asyncio
+import io
+import math
+import os
+import random
+import statistics
+import time
+import zipfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+import psycopg2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_FEATURES = "GENERAL,CODE_HELPER,CS_CHATBOT,CODE_CHECK_FRONTEND"
+
+QUESTIONS = [
+    "Bagaimana cara membuat endpoint REST dengan FastAPI?",
+    "Jelaskan perbedaan let dan const di JavaScript.",
+    "Tolong review kode berikut sesuai standar.",
+    "Apa itu muatmuat.com?",
+]
+
+SAMPLE_FILE = """
+function getUser(id) {
+    var result = fetch('/api/user/' + id)
+    return result
+}
+"""
+
+
+@dataclass
+class Result:
+    feature: str
+    with_zip: bool
+    status: int = 0
+    ttfb: Optional[float] = None
+    ttlb: Optional[float] = None
+    events: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class Stats:
+    results: List[Result] = field(default_factory=list)
+    db_connections: List[int] = field(default_factory=list)
+
+
+def make_zip(files: int, lines: int) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for index in range(files):
+            archive.writestr(f"src/components/file_{index}.js", SAMPLE_FILE * lines)
+    return buffer.getvalue()
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    """
+    Login sebagai user load test, mendaftarkannya lebih dulu jika belum ada.
+    """
+    response = await client.post("/login", data={"username": username, "password": password})
+    if response.status_code == 401:
+        register = await client.post("/register", json={"username": username, "password": password})
+        register.raise_for_status()
+        response = await client.post("/login", data={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def create_chat(client: httpx.AsyncClient, token: str, feature: str) -> str:
+    # user_id di path tidak dipakai server (user diambil dari token), tetapi tetap diisi
+    response = await client.post(
+        "/user/0/chats",
+        params={"feature": feature},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def send_chat(
+    client: httpx.AsyncClient,
+    token: str,
+    chat_id: str,
+    feature: str,
+    zip_bytes: Optional[bytes],
+) -> Result:
+    """
+    Mengirim satu pesan dan membaca stream sampai selesai. TTFB diukur sampai frame SSE
+    pertama, TTLB sampai stream ditutup.
+    """
+    result = Result(feature=feature, with_zip=zip_bytes is not None)
+    files = {"files": ("project.zip", zip_bytes, "application/zip")} if zip_bytes else None
+    started = time.perf_counter()
+    try:
+        async with client.stream(
+            "POST",
+            "/chat/send",
+            params={"feature": feature},
+            data={"message": random.choice(QUESTIONS), "chat_id": chat_id},
+            files=files,
+            headers={"Authorization": f"Bearer {token}"},
+        ) as response:
+            result.status = response.status_code
+            if response.status_code >= 400:
+                # 413 (preflight) dan 429 (admission) dijawab sebelum stream dimulai
+                result.error = (await response.aread()).decode(errors="ignore")[:200]
+            else:
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    if result.ttfb is None:
+                        result.ttfb = time.perf_counter() - started
+                    result.events += 1
+                    if '"type": "error"' in line or '"type":"error"' in line:
+                        result.error = line[5:].strip()
+        result.ttlb = time.perf_counter() - started
+    except httpx.HTTPError as e:
+        result.error = f"{type(e).__name__}: {str(e)}"
+    return result
+
+
+def db_connections_in_use() -> Optional[int]:
+    try:
+        connection = psycopg2.connect(
+            dbname=os.getenv("DB_NAME"),
+            user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"),
+            host=os.getenv("DB_HOST"),
+            port=os.getenv("DB_PORT"),
+        )
+    except psycopg2.Error:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            # Koneksi sampler sendiri tidak dihitung
+            cursor.execute(
+                "SELECT count(*) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+            )
+            return cursor.fetchone()[0]
+    finally:
+        connection.close()
+
+
+async def sample_db_connections(stats: Stats, interval: float, stop: asyncio.Event):
+    while not stop.is_set():
+        count = await asyncio.to_thread(db_connections_in_use)
+        if count is not None:
+            stats.db_connections.append(count)
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    # Nearest-rank
+    index = min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def format_latency(label: str, values: List[float]) -> str:
+    if not values:
+        return f"  {label:<5} -"
+    return (
+        f"  {label:<5} p50={percentile(values, 50) * 1000:8.1f} ms  "
+        f"p95={percentile(values, 95) * 1000:8.1f} ms  "
+        f"p99={percentile(values, 99) * 1000:8.1f} ms"
+    )
+
+
+def report(stats: Stats, wall: float):
+    results = stats.results
+    ok = [r for r in results if r.error is None and r.status == 200]
+    failed = [r for r in results if r.error is not None or r.status != 200]
+    print(f"\nrequests={len(results)} ok={len(ok)} failed={len(failed)} wall={wall:.2f} s")
+    print(f"throughput={len(results) / wall:.2f} req/s ({len(ok) / wall:.2f} ok req/s)")
+
+    groups: Dict[str, List[Result]] = {"all": ok}
+    for result in ok:
+        key = f"{result.feature}{' +zip' if result.with_zip else ''}"
+        groups.setdefault(key, []).append(result)
+    for key, group in groups.items():
+        print(f"{key} (n={len(group)})")
+        print(format_latency("TTFB", [r.ttfb for r in group if r.ttfb is not None]))
+        print(format_latency("TTLB", [r.ttlb for r in group if r.ttlb is not None]))
+
+    statuses: Dict[str, int] = {}
+    for result in failed:
+        key = str(result.status or (result.error or "").split(":")[0])
+        statuses[key] = statuses.get(key, 0) + 1
+    if statuses:
+        print("failures: " + ", ".join(f"{key}={count}" for key, count in sorted(statuses.items())))
+
+    if stats.db_connections:
+        print(
+            f"db connections: max={max(stats.db_connections)} "
+            f"avg={statistics.mean(stats.db_connections):.1f} samples={len(stats.db_connections)}"
+        )
+    else:
+        print("db connections: tidak tersedia (periksa DB_* env)")
+
+
+async def run(args):
+    features = [feature.strip() for feature in args.features.split(",") if feature.strip()]
+    zip_bytes = make_zip(args.zip_files, args.zip_lines)
+    limits = httpx.Limits(max_connections=args.concurrency + args.users)
+    timeout = httpx.Timeout(args.timeout)
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        tokens = await asyncio.gather(
+            *(login(client, f"{args.user_prefix}{index}", args.password) for index in range(args.users))
+        )
+        # Satu chat per (user, fitur) agar riwayat chat ikut bertambah seperti pemakaian nyata
+        chats = {
+            (index, feature): await create_chat(client, token, feature)
+            for index, token in enumerate(tokens)
+            for feature in features
+        }
+        print(f"{args.users} users, {len(chats)} chats, features={','.join(features)}")
+
+        stats = Stats()
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_db_connections(stats, args.db_sample_interval, stop))
+        queue: asyncio.Queue = asyncio.Queue()
+        for number in range(args.requests):
+            queue.put_nowait(number)
+
+        async def worker():
+            while True:
+                try:
+                    number = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                user = number % args.users
+                feature = features[number % len(features)]
+                with_zip = random.random() < args.zip_ratio
+                stats.results.append(
+                    await send_chat(
+                        client, tokens[user], chats[(user, feature)], feature,
+                        zip_bytes if with_zip else None,
+                    )
+                )
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        wall = time.perf_counter() - started
+        stop.set()
+        await sampler
+
+    report(stats, wall)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--user-prefix", default="loadtest-")
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--features", default=DEFAULT_FEATURES)
+    parser.add_argument("--zip-ratio", type=float, default=0.2, help="Porsi request dengan lampiran zip")
+    parser.add_argument("--zip-files", type=int, default=20)
+    parser.add_argument("--zip-lines", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--db-sample-interval", type=float, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
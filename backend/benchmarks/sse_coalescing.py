@@ -0,0 +1,116 @@
+"""
+Benchmark CPU per stream untuk jalur SSE chat: satu frame JSON per delta model
+(cara lama) dibandingkan penggabungan delta + serializer cepat (cara baru).
+
+Jalankan dari folder backend:
+
+    python -m benchmarks.sse_coalescing --streams 50 --tokens 5000
+
+Gunakan --tps untuk mensimulasikan kecepatan model (token/detik); tanpa --tps
+delta dikirim secepat mungkin sehingga hanya penggabungan berbasis ukuran yang aktif.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.utils.sse_utils import format_event
+from app.utils.stream_utils import coalesce_chunks
+
+# Rata-rata panjang teks per delta dari model (karakter)
+DELTA_TEXT = "abc "
+
+
+async def fake_deltas(tokens: int, tps: float):
+    delay = 1 / tps if tps else 0
+    for _ in range(tokens):
+        if delay:
+            await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0)
+        yield DELTA_TEXT
+
+
+class Transport:
+    """
+    Meniru biaya per frame di sisi server: antrean ke response dan encode ke bytes.
+    """
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.frames = 0
+        self.task = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        while True:
+            frame = await self.queue.get()
+            if frame is None:
+                return
+            frame.encode("utf-8")
+            self.frames += 1
+
+    async def send(self, frame: str):
+        self.queue.put_nowait(frame)
+        await asyncio.sleep(0)
+
+    async def close(self) -> int:
+        self.queue.put_nowait(None)
+        await self.task
+        return self.frames
+
+
+async def old_stream(tokens: int, tps: float) -> int:
+    transport = Transport()
+    bot_response = ""
+    async for chunk in fake_deltas(tokens, tps):
+        bot_response += chunk
+        await transport.send(f"data: {json.dumps({'type': 'message', 'content': chunk})}\n\n")
+    return await transport.close()
+
+
+async def new_stream(tokens: int, tps: float, window_ms: int, max_bytes: int) -> int:
+    transport = Transport()
+    event_id = 0
+    response_parts = []
+    async for chunk in coalesce_chunks(fake_deltas(tokens, tps), window_ms / 1000, max_bytes):
+        response_parts.append(chunk)
+        event_id += 1
+        await transport.send(format_event({"type": "message", "content": chunk}, event_id))
+    "".join(response_parts)
+    return await transport.close()
+
+
+async def run(label: str, factory, streams: int):
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    frames = await asyncio.gather(*(factory() for _ in range(streams)))
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    print(
+        f"{label:<10} streams={streams} frames/stream={frames[0]:>5} "
+        f"cpu/stream={cpu / streams * 1000:8.2f} ms  wall={wall:6.2f} s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--tokens", type=int, default=5000)
+    parser.add_argument("--tps", type=float, default=0)
+    parser.add_argument("--window-ms", type=int, default=50)
+    parser.add_argument("--max-bytes", type=int, default=512)
+    args = parser.parse_args()
+
+    asyncio.run(run("before", lambda: old_stream(args.tokens, args.tps), args.streams))
+    asyncio.run(
+        run(
+            "after",
+            lambda: new_stream(args.tokens, args.tps, args.window_ms, args.max_bytes),
+            args.streams,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import logging
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 from fastapi import FastAPI
@@ -7,12 +8,20 @@ from fastapi.staticfiles import StaticFiles
 
 from app.api.auth_routes import auth_routes
 from app.api.chat_routes import chat_routes
+from app.api.code_check_job_routes import code_check_job_routes
 from app.api.code_check_rules_routes import code_check_rules_routes
 from app.api.context_routes import context_routes
 from app.api.file_routes import file_routes
+from app.api.health_routes import health_routes
 from app.api.knowledge_base_routes import knowledge_base_routes
+from app.api.metrics_routes import metrics_routes
 from app.api.user_routes import user_routes
-from app.config.database import engine, Base, create_tables
+from app.config.config import Config
+from app.config.database import async_engine, engine, Base, create_tables
+from app.services.anthropic_client import init_client, close_client
+from app.services import code_check_job_service, response_cache_service
+from app.utils import session_tracker
+from app.utils.timing_utils import ServerTimingMiddleware
 
 # Konfigurasi logging diletakkan di bagian paling atas
 logging.basicConfig(
@@ -27,8 +36,29 @@ load_dotenv()
 # Buat tabel di repositories jika belum ada
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Satu client Claude API (dengan connection pool) per worker
+    await init_client()
+    # Worker background untuk job code check asinkron
+    code_check_job_service.start_workers()
+    # Pemeriksaan berkala sesi database yang bocor
+    session_tracker.start_monitor(Config.DB_SESSION_LEAK_AFTER)
+    # Penghapusan berkala baris cache jawaban yang kedaluwarsa di Postgres
+    response_cache_service.start_purger(Config.RESPONSE_CACHE_PURGE_INTERVAL)
+    try:
+        yield
+    finally:
+        await response_cache_service.stop_purger()
+        await session_tracker.stop_monitor()
+        await code_check_job_service.stop_workers()
+        await close_client()
+        await async_engine.dispose()
+
+
 # Inisialisasi FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Mount folder untuk serving file statis
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
@@ -40,16 +70,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Header Server-Timing untuk response non-streaming
+app.add_middleware(ServerTimingMiddleware)
+
 # Tambahkan router untuk endpoint
 app.include_router(auth_routes, tags=["Auth Routes"])
 app.include_router(user_routes, tags=["User Routes"])
 app.include_router(chat_routes, tags=["Chat Routes"])
 app.include_router(context_routes, tags=["Context Routes"])
 app.include_router(code_check_rules_routes, tags=["Code Check Rules Routes"])
+app.include_router(code_check_job_routes, tags=["Code Check Job Routes"])
 app.include_router(file_routes, tags=["File Routes"])
 app.include_router(knowledge_base_routes, tags=["Knowledge Base Routes"])
+app.include_router(metrics_routes, tags=["Metrics Routes"])
+app.include_router(health_routes, tags=["Health Routes"])
 
 create_tables()
 
@@ -0,0 +1,15 @@
+import os
+
+# Config dan engine database dibaca saat modul app di-import; nilai ini hanya agar
+# import berhasil. Test tidak membuka koneksi ke database maupun Claude API.
+for name, value in {
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "test",
+    "CLAUDE_API_KEY": "test",
+    "SECRET_KEY": "test",
+    "ALGORITHM": "HS256",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,75 @@
+import asyncio
+import io
+from zipfile import ZipFile
+
+from app.services import prompt_service
+from app.utils.feature_utils import Feature
+from app.utils.token_utils import estimate_content_tokens, estimate_request_tokens
+
+QUESTION = "Tolong review project ini."
+
+ZIP_MEMBERS = {
+    "src/app.py": "def handler(event):\n    return {'status': 200, 'marker': 'APP_PY_MARKER'}\n" * 40,
+    "src/utils.py": "def slugify(value):\n    return value.lower().replace(' ', '-')  # UTILS_MARKER\n" * 40,
+    "README.md": "# Project\n\nDokumentasi singkat README_MARKER untuk review.\n" * 20,
+}
+
+
+def read_zip_attachments(members):
+    """
+    Membuat zip di memori lalu membacanya dengan cara yang sama seperti
+    `send_chat_message` membaca lampiran zip.
+    """
+    buffer = io.BytesIO()
+    with ZipFile(buffer, "w") as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    with ZipFile(buffer, "r") as archive:
+        return [
+            {"name": name, "content": archive.read(name).decode("utf-8", errors="ignore")}
+            for name in archive.namelist()
+        ]
+
+
+def request_texts(system, messages):
+    texts = [system]
+    for message in messages:
+        if isinstance(message["content"], str):
+            texts.append(message["content"])
+        else:
+            texts.extend(block["text"] for block in message["content"])
+    return texts
+
+
+def prepared_request(file_contents):
+    system_blocks = asyncio.run(prompt_service.assemble_system_blocks(None, 1, Feature.CODE_CHECK))
+    system = prompt_service.system_text(system_blocks)
+    messages = prompt_service.prepare_messages([], QUESTION, file_contents)
+    return system, messages
+
+
+def test_each_attachment_is_sent_once():
+    file_contents = read_zip_attachments(ZIP_MEMBERS)
+    system, messages = prepared_request(file_contents)
+
+    texts = request_texts(system, messages)
+    for file in file_contents:
+        assert sum(text.count(file["content"]) for text in texts) == 1, file["name"]
+        assert file["content"] not in system
+
+
+def test_request_tokens_count_attachments_once():
+    file_contents = read_zip_attachments(ZIP_MEMBERS)
+    system, messages = prepared_request(file_contents)
+    base_system, base_messages = prepared_request([])
+
+    total = estimate_request_tokens(system, messages)
+    base = estimate_request_tokens(base_system, base_messages)
+    file_blocks = messages[-1]["content"][:-1]
+    attachment_tokens = estimate_content_tokens(file_blocks)
+
+    assert len(file_blocks) == len(ZIP_MEMBERS)
+    assert total == base + attachment_tokens
+    # Sebelum perbaikan lampiran juga masuk ke system prompt, sehingga dihitung dua kali
+    assert total < base + 2 * attachment_tokens
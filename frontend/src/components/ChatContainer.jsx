@@ -13,6 +13,9 @@ function ChatContainer({ chatId, onBackToList, userId }) {
   const [previewFile, setPreviewFile] = useState(null);
   const [error, setError] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
+  const [olderCursor, setOlderCursor] = useState(null);
+  const [isLoadingOlder, setIsLoadingOlder] = useState(false);
+  const [streamStatus, setStreamStatus] = useState(null);
   const abortControllerRef = useRef(null);
   const { activeFeature } = useFeature();
 
@@ -36,15 +39,10 @@ function ChatContainer({ chatId, onBackToList, userId }) {
 
     try {
       const response = await getChatMessages(chatId);
-      const formattedMessages = response.messages.map((message) => ({
-        type: message.is_user ? "user-message" : "bot-message",
-        content: message.content,
-        timestamp: message.timestamp,
-        file_url: message.file_url,
-        file_name: message.file_name,
-      }));
+      const formattedMessages = formatMessages(response.messages);
       console.info("messages:", formattedMessages);
       setMessages(formattedMessages);
+      setOlderCursor(response.older_cursor);
       setError(null);
     } catch (error) {
       console.error("Error loading chat history:", error);
@@ -54,10 +52,35 @@ function ChatContainer({ chatId, onBackToList, userId }) {
     }
   };
 
+  const formatMessages = (messages) =>
+    messages.map((message) => ({
+      type: message.is_user ? "user-message" : "bot-message",
+      content: message.content,
+      timestamp: message.created_at,
+      file_id: message.file_id,
+      file_url: message.file_url,
+      file_name: message.file_name,
+    }));
+
+  const loadOlderMessages = async () => {
+    if (!olderCursor) return;
+    setIsLoadingOlder(true);
+    try {
+      const response = await getChatMessages(chatId, olderCursor);
+      setMessages(prevMessages => [...formatMessages(response.messages), ...prevMessages]);
+      setOlderCursor(response.older_cursor);
+    } catch (error) {
+      console.error("Error loading older messages:", error);
+    } finally {
+      setIsLoadingOlder(false);
+    }
+  };
+
   const handleSendMessage = async (message) => {
     if (!message.trim() && currentFiles.length === 0) return;
 
     setIsGenerating(true);
+    setStreamStatus(null);
     const newMessage = { content: message, type: "user-message" };
     setMessages(prevMessages => [...prevMessages, newMessage]);
 
@@ -71,6 +94,7 @@ function ChatContainer({ chatId, onBackToList, userId }) {
         currentFiles,
         abortControllerRef.current.signal,
         (chunk) => {
+          setStreamStatus(null);
           setMessages(prevMessages => {
             const lastMessage = prevMessages[prevMessages.length - 1];
             if (lastMessage.type === "bot-message") {
@@ -85,6 +109,7 @@ function ChatContainer({ chatId, onBackToList, userId }) {
         },
         () => {
           setIsGenerating(false);
+          setStreamStatus(null);
           setCurrentFiles([]);  // Clear the current files after sending
         },
         (error) => {
@@ -94,8 +119,26 @@ function ChatContainer({ chatId, onBackToList, userId }) {
             { content: "An error occurred. Please try again.", type: "bot-message" }
           ]);
           setIsGenerating(false);
+          setStreamStatus(null);
+        },
+        activeFeature,
+        (content) => {
+          // Setelah menyambung kembali, server mengirim seluruh jawaban sejauh ini
+          setMessages(prevMessages => {
+            const lastMessage = prevMessages[prevMessages.length - 1];
+            if (lastMessage.type === "bot-message") {
+              return [...prevMessages.slice(0, -1), { ...lastMessage, content }];
+            }
+            return [...prevMessages, { content, type: "bot-message" }];
+          });
         },
-        activeFeature
+        (status) => {
+          if (status.type === "queued") {
+            setStreamStatus(`Menunggu giliran (antrean ke-${status.position})...`);
+          } else if (status.type === "progress") {
+            setStreamStatus(`Mereview file: batch ${status.completed} dari ${status.total} selesai`);
+          }
+        }
       );
     } catch (error) {
       console.error("Failed to send message:", error);
@@ -124,11 +167,19 @@ function ChatContainer({ chatId, onBackToList, userId }) {
         Back to Chat List
       </button>
       <div id="chat-messages-container">
+        {olderCursor && (
+          <button className="load-older-button" onClick={loadOlderMessages} disabled={isLoadingOlder}>
+            {isLoadingOlder ? "Loading..." : "Load older messages"}
+          </button>
+        )}
         <ChatMessages
           messages={messages}
           onPreviewFile={handlePreviewFile}
           isGenerating={isGenerating}
         />
+        {isGenerating && streamStatus && (
+          <div className="stream-status">{streamStatus}</div>
+        )}
       </div>
       <FileUpload onFileUpload={handleFileUpload} currentFiles={currentFiles} />
       <UserInput
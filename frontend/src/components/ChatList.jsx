@@ -2,7 +2,16 @@ import React, { useState, useCallback } from 'react';
 import { useFeature } from '../contexts/FeatureContext';
 
 
-const ChatList = ({ chats, onSelectChat, onNewChat, onDeleteChat, userId }) => {
+const ChatList = ({
+  chats,
+  onSelectChat,
+  onNewChat,
+  onDeleteChat,
+  userId,
+  hasMore,
+  isLoadingMore,
+  onLoadMore,
+}) => {
   const [isCreatingChat, setIsCreatingChat] = useState(false);
   const { activeFeature } = useFeature();
 
@@ -55,14 +64,21 @@ const ChatList = ({ chats, onSelectChat, onNewChat, onDeleteChat, userId }) => {
               <div className="w-10 h-10 rounded-full bg-blue-500 text-white flex items-center justify-center text-lg mr-4">
                 {getAvatarText(chat.title)}
               </div>
-              <div className="flex-1">
+              <div className="flex-1 min-w-0">
                 <div className="text-sm font-bold text-gray-800 mb-1">
                   {chat.title || "Untitled Chat"}
                 </div>
+                {chat.preview && (
+                  <div className="text-xs text-gray-700 mb-1 truncate">
+                    {chat.last_message_is_user ? "You: " : ""}
+                    {chat.preview}
+                  </div>
+                )}
                 <div className="text-xs text-gray-600">
-                  {chat.created_at
-                    ? new Date(chat.created_at).toLocaleString()
+                  {chat.last_message_at || chat.created_at
+                    ? new Date(chat.last_message_at || chat.created_at).toLocaleString()
                     : "Unknown date"}
+                  {chat.message_count > 0 && ` · ${chat.message_count} messages`}
                 </div>
               </div>
               <button
@@ -89,6 +105,15 @@ const ChatList = ({ chats, onSelectChat, onNewChat, onDeleteChat, userId }) => {
             </li>
           ))}
         </ul>
+        {hasMore && (
+          <button
+            className="w-full py-2 px-5 mt-2 text-sm text-blue-500 border border-blue-500 rounded hover:bg-blue-50 disabled:text-gray-400 disabled:border-gray-400 disabled:cursor-not-allowed"
+            onClick={onLoadMore}
+            disabled={isLoadingMore}
+          >
+            {isLoadingMore ? "Loading..." : "Load more chats"}
+          </button>
+        )}
       </div>
     </div>
   );
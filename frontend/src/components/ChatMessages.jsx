@@ -114,8 +114,7 @@ function ChatMessages({ messages, onPreviewFile, isGenerating }) {
         <div className="file-attachment">
           <FileViewer file={{
             file_name: message.file_name,
-            file_url: message.file_url,
-            file_path: message.file_path
+            file_url: message.file_url
           }}
             onPreviewFile={() => onPreviewFile(message)}
           />
@@ -1,7 +1,33 @@
+import { useEffect, useState } from 'react';
+import { apiRequest } from '../services/api';
+
+const IMAGE_EXTENSIONS = ['jpg', 'jpeg', 'png', 'gif'];
+
 export const FileViewer = ({ file, onPreviewFile }) => {
-    if (!file || !file.file_url) return null;
+    const [imageUrl, setImageUrl] = useState(null);
+    const isImage = !!file?.file_name
+        && IMAGE_EXTENSIONS.includes(file.file_name.split('.').pop().toLowerCase());
 
-    const fileUrl = `http://localhost:8000${file.file_url}`;
+    // Endpoint file butuh token, jadi gambar diambil lewat apiRequest lalu ditampilkan sebagai blob
+    useEffect(() => {
+        if (!isImage || !file?.file_url) return;
+        let objectUrl = null;
+        let cancelled = false;
+        apiRequest(file.file_url)
+            .then((response) => response.blob())
+            .then((blob) => {
+                if (cancelled) return;
+                objectUrl = URL.createObjectURL(blob);
+                setImageUrl(objectUrl);
+            })
+            .catch((error) => console.error("Error loading file:", error));
+        return () => {
+            cancelled = true;
+            if (objectUrl) URL.revokeObjectURL(objectUrl);
+        };
+    }, [isImage, file?.file_url]);
+
+    if (!file || !file.file_url) return null;
 
     const handlePreview = () => {
         if (onPreviewFile) {
@@ -23,7 +49,8 @@ export const FileViewer = ({ file, onPreviewFile }) => {
         case 'jpeg':
         case 'png':
         case 'gif':
-            return <img src={fileUrl} alt={file.file_name} style={{ maxWidth: '100%', cursor: 'pointer' }} onClick={handlePreview} />;
+            if (!imageUrl) return <span>{file.file_name}</span>;
+            return <img src={imageUrl} alt={file.file_name} style={{ maxWidth: '100%', cursor: 'pointer' }} onClick={handlePreview} />;
         default:
             return (
                 <div onClick={handlePreview} style={{ cursor: 'pointer' }}>
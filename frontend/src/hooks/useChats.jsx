@@ -3,7 +3,9 @@ import { getUserChats } from "../services/api";
 
 export const useChats = (userId, activeFeature) => {
   const [chats, setChats] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [error, setError] = useState(null);
 
   const fetchChats = useCallback(async () => {
@@ -11,8 +13,9 @@ export const useChats = (userId, activeFeature) => {
     setIsLoading(true);
     setError(null);
     try {
-      const fetchedChats = await getUserChats(userId, activeFeature);
-      setChats(fetchedChats);
+      const page = await getUserChats(userId, activeFeature);
+      setChats(page.chats);
+      setNextCursor(page.next_cursor);
     } catch (err) {
       setError(err.message);
     } finally {
@@ -20,6 +23,29 @@ export const useChats = (userId, activeFeature) => {
     }
   }, [userId]);
 
-  return { chats, isLoading, error, fetchChats, setChats };
+  const fetchMoreChats = useCallback(async () => {
+    if (!userId || !nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const page = await getUserChats(userId, activeFeature, nextCursor);
+      setChats((prevChats) => [...prevChats, ...page.chats]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      setError(err.message);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  }, [userId, nextCursor]);
+
+  return {
+    chats,
+    isLoading,
+    error,
+    fetchChats,
+    setChats,
+    hasMore: Boolean(nextCursor),
+    isLoadingMore,
+    fetchMoreChats,
+  };
 };
 export default useChats;
@@ -14,7 +14,16 @@ function ChatListPage() {
   const [contexts, setContexts] = useState([]);
   const [showProductInfo, setShowProductInfo] = useState(true);
   const { activeFeature } = useFeature();
-  const { chats, isLoading, error, fetchChats, setChats } = useChats(user?.id, activeFeature);
+  const {
+    chats,
+    isLoading,
+    error,
+    fetchChats,
+    setChats,
+    hasMore,
+    isLoadingMore,
+    fetchMoreChats,
+  } = useChats(user?.id, activeFeature);
 
   useEffect(() => {
     if (user && user.id) {
@@ -118,6 +127,9 @@ function ChatListPage() {
           onNewChat={createNewChats}
           onDeleteChat={handleDeleteChat}
           userId={user.id}
+          hasMore={hasMore}
+          isLoadingMore={isLoadingMore}
+          onLoadMore={fetchMoreChats}
         />
       </div>
       
@@ -124,7 +124,17 @@ const HomePage = () => {
           ]);
           setIsGenerating(false);
         },
-        activeFeature
+        activeFeature,
+        (content) => {
+          // Setelah menyambung kembali, server mengirim seluruh jawaban sejauh ini
+          setMessages(prevMessages => {
+            const lastMessage = prevMessages[prevMessages.length - 1];
+            if (lastMessage.type === "bot-message") {
+              return [...prevMessages.slice(0, -1), { ...lastMessage, content }];
+            }
+            return [...prevMessages, { content, type: "bot-message" }];
+          });
+        }
       );
     } catch (error) {
       console.error("Failed to send message:", error);
@@ -69,9 +69,116 @@ export const getUser = async () => {
   return response.json();
 };
 
+// Nomor event SSE terakhir yang diterima per chat, dikirim sebagai Last-Event-ID
+// saat stream yang terputus disambung kembali
+const lastEventIds = new Map();
+
+const MAX_STREAM_RECONNECTS = 5;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+/**
+ * Membaca stream SSE jawaban chat dan meneruskan setiap event ke handler.
+ *
+ * @param {Response} response - Response fetch dengan body text/event-stream
+ * @param {string} chatId - ID chat
+ * @param {Object} handlers - onChunk, onSnapshot, onStatus, onDone, dan onError
+ * @returns {Promise<Object>} - finished: stream berakhir dengan event done/error,
+ *   received: ada event yang diterima
+ */
+const readChatStream = async (response, chatId, handlers) => {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  let received = false;
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) return { finished: false, received };
+
+    buffer += decoder.decode(value, { stream: true });
+    const frames = buffer.split("\n\n");
+    buffer = frames.pop();
+
+    for (const frame of frames) {
+      // Frame SSE dapat berisi baris "id: N" sebelum baris "data: ..."
+      const lines = frame.split("\n");
+      const idLine = lines.find((l) => l.startsWith("id: "));
+      const dataLine = lines.find((l) => l.startsWith("data: "));
+      if (!dataLine) continue;
+
+      let data;
+      try {
+        data = JSON.parse(dataLine.slice(5));
+      } catch (e) {
+        console.error("Error parsing SSE data:", e);
+        continue;
+      }
+      if (idLine) {
+        lastEventIds.set(chatId, Number(idLine.slice(4)));
+      }
+      received = true;
+
+      switch (data.type) {
+        case "message":
+          handlers.onChunk(data.content);
+          break;
+        case "snapshot":
+          // Teks jawaban sejauh ini dari server, menggantikan teks parsial milik klien
+          handlers.onSnapshot(data.content);
+          break;
+        case "notice":
+          // Catatan dari server, misalnya lampiran yang dipotong karena batas token
+          handlers.onChunk(`> ${data.content}\n\n`);
+          break;
+        case "queued":
+        case "progress":
+          // Posisi antrean model dan progres review per batch
+          handlers.onStatus(data);
+          break;
+        case "error":
+          lastEventIds.delete(chatId);
+          handlers.onError(new Error(data.content));
+          return { finished: true, received };
+        case "done":
+          lastEventIds.delete(chatId);
+          handlers.onDone(data);
+          return { finished: true, received };
+      }
+    }
+  }
+};
+
+/**
+ * Menyambung kembali stream jawaban chat mulai setelah event terakhir yang diterima.
+ *
+ * @param {string} chatId - ID chat
+ * @param {AbortSignal} signal - Signal untuk abort request (opsional)
+ * @returns {Promise<Response>} - Response stream SSE
+ */
+export const resumeChatStream = async (chatId, signal) => {
+  const response = await fetch(`${API_BASE_URL}/chat/${chatId}/stream`, {
+    signal,
+    headers: {
+      Authorization: `Bearer ${localStorage.getItem("token")}`,
+      "Last-Event-ID": String(lastEventIds.get(chatId) || 0),
+    },
+  });
+  if (!response.ok) {
+    const error = new Error(`HTTP error! status: ${response.status}`);
+    error.status = response.status;
+    throw error;
+  }
+  return response;
+};
+
 /**
  * Mengirim pesan chat baru dan menangani respons streaming.
  *
+ * Jika koneksi terputus sebelum jawaban selesai, stream disambung kembali lewat
+ * `GET /chat/{chatId}/stream` dengan header Last-Event-ID, bukan mengirim ulang
+ * pesan (yang akan memicu generasi baru di server).
+ *
  * @param {string} userId - ID pengguna
  * @param {string} chatId - ID chat
  * @param {string} message - Isi pesan
@@ -80,6 +187,10 @@ export const getUser = async () => {
  * @param {function} onChunk - Callback untuk setiap chunk pesan
  * @param {function} onDone - Callback ketika streaming selesai
  * @param {function} onError - Callback untuk menangani error
+ * @param {string} activeFeature - Fitur chat
+ * @param {function} onSnapshot - Callback berisi seluruh teks jawaban sejauh ini,
+ *   menggantikan teks parsial setelah menyambung kembali
+ * @param {function} [onStatus] - Callback untuk event queued dan progress (opsional)
  */
 export const sendChatMessage = async (
   userId,
@@ -90,7 +201,9 @@ export const sendChatMessage = async (
   onChunk,
   onDone,
   onError,
-  activeFeature
+  activeFeature,
+  onSnapshot,
+  onStatus = () => {}
 ) => {
   const formData = new FormData();
   formData.append("message", message);
@@ -103,8 +216,9 @@ export const sendChatMessage = async (
   }
   console.log("FormData contents:", [...formData.entries()]);
 
+  let response;
   try {
-    const response = await fetch(`${API_BASE_URL}/chat/send?feature=${activeFeature}`, {
+    response = await fetch(`${API_BASE_URL}/chat/send?feature=${activeFeature}`, {
       method: "POST",
       body: formData,
       signal,
@@ -114,72 +228,90 @@ export const sendChatMessage = async (
     });
 
     if (!response.ok) {
+      if (response.status === 413) {
+        // Prompt terlalu besar: tampilkan pesan dan rincian token dari server
+        const { detail } = await response.json();
+        throw new Error(`${detail.message} (${JSON.stringify(detail.tokens)})`);
+      }
       throw new Error(`HTTP error! status: ${response.status}`);
     }
+  } catch (error) {
+    onError(error);
+    return;
+  }
 
-    const reader = response.body.getReader();
-    const decoder = new TextDecoder();
-    let buffer = "";
+  // Server sudah menerima pesan; mulai dari sini koneksi yang putus disambung kembali
+  lastEventIds.delete(chatId);
+  const handlers = { onChunk, onSnapshot, onStatus, onDone, onError };
+  let reconnects = 0;
+
+  while (true) {
+    try {
+      const { finished, received } = await readChatStream(response, chatId, handlers);
+      if (finished) return;
+      if (received) reconnects = 0;
+    } catch (error) {
+      if (signal?.aborted) {
+        onError(error);
+        return;
+      }
+      console.error("Chat stream interrupted:", error);
+    }
 
+    // Stream terputus sebelum event done: sambung kembali dengan jeda yang makin panjang
     while (true) {
-      const { done, value } = await reader.read();
-      if (done) break;
-
-      buffer += decoder.decode(value, { stream: true });
-      const lines = buffer.split("\n\n");
-      buffer = lines.pop();
-
-      for (const line of lines) {
-        if (line.startsWith("data: ")) {
-          try {
-            const data = JSON.parse(line.slice(5));
-            switch (data.type) {
-              case "message":
-                onChunk(data.content);
-                break;
-              case "error":
-                onError(new Error(data.content));
-                break;
-              case "done":
-                onDone();
-                break;
-            }
-          } catch (e) {
-            console.error("Error parsing SSE data:", e);
-          }
+      if (reconnects >= MAX_STREAM_RECONNECTS) {
+        lastEventIds.delete(chatId);
+        onError(new Error("Koneksi ke server terputus. Silakan muat ulang chat."));
+        return;
+      }
+      await sleep(1000 * 2 ** reconnects);
+      reconnects += 1;
+      try {
+        response = await resumeChatStream(chatId, signal);
+        break;
+      } catch (error) {
+        if (signal?.aborted || error.status) {
+          // Abort oleh user, atau server tidak punya jawaban untuk dilanjutkan
+          lastEventIds.delete(chatId);
+          onError(error);
+          return;
         }
+        console.error("Failed to resume chat stream:", error);
       }
     }
-  } catch (error) {
-    onError(error);
   }
 };
 
 /**
- * Mengambil pesan-pesan dari chat tertentu.
+ * Mengambil satu halaman pesan dari chat tertentu (default: halaman terbaru).
  *
  * @param {number} chatId - ID chat
- * @returns {Promise<Array>} - Array berisi pesan-pesan chat
+ * @param {string} [before] - Cursor older_cursor untuk memuat pesan yang lebih lama
+ * @returns {Promise<Object>} - Pesan-pesan chat beserta older_cursor dan newer_cursor
  */
-export const getChatMessages = async (chatId) => {
+export const getChatMessages = async (chatId, before) => {
   if (!chatId) {
     console.error("Invalid chat ID");
     return;
   }
-  const response = await apiRequest(`/chat/${chatId}/messages`);
+  const query = before ? `?before=${encodeURIComponent(before)}` : "";
+  const response = await apiRequest(`/chat/${chatId}/messages${query}`);
   const data = await response.json();
   console.log("API response for user chats:", data);
   return data;
 };
 
 /**
- * Mengambil daftar chat untuk pengguna tertentu.
+ * Mengambil satu halaman daftar chat untuk pengguna tertentu.
  *
  * @param {string} userId - ID pengguna
- * @returns {Promise<Array>} - Array berisi daftar chat pengguna
+ * @param {string} [before] - Cursor next_cursor dari halaman sebelumnya
+ * @returns {Promise<Object>} - Objek berisi chats dan next_cursor
  */
-export const getUserChats = async (userId, activeFeature) => {
-  const response = await apiRequest(`/user/${userId}/chats?feature=${activeFeature}`);
+export const getUserChats = async (userId, activeFeature, before) => {
+  const query = before ? `&before=${encodeURIComponent(before)}` : "";
+  const response = await apiRequest(`/user/${userId}/chats?feature=${activeFeature}${query}`);
   return response.json();
 };
 